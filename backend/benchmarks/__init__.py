@@ -0,0 +1 @@
+# Backend micro-benchmarks
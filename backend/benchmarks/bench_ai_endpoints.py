@@ -0,0 +1,202 @@
+"""
+Load benchmark: /suggestions and /reflections/summary at a target request
+rate, against a server running the fake LLM provider.
+
+Start the server with the fake provider (latency, error rate and answer
+size are set with the LLM_FAKE_* variables), then run from backend/:
+
+    LLM_PROVIDER=fake LLM_FAKE_LATENCY_MS=800 ADMIN_API_KEY=bench uvicorn server:app --port 8001
+    ADMIN_API_KEY=bench python -m benchmarks.bench_ai_endpoints --base-url http://localhost:8001 --rps 50 --duration 30
+
+ADMIN_API_KEY must match the server's: the event loop and cache counters
+come from /api/admin/cache-stats, which requires the X-Admin-Key header.
+
+Requests are sent open-loop (one every 1/rps seconds, whatever the
+server's pace), and latency is measured from the scheduled send time,
+so a slow server cannot hide its queueing delay.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+from services.loop_monitor import EventLoopLagMonitor, LAG_BUCKETS
+
+CATEGORIES = [None, "learning", "productivity", "well_being"]
+ENERGY_LEVELS = ["low", "medium", "high"]
+MOODS = ["positive", "neutral", "negative"]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def histogram_quantile(buckets: Dict[str, int], q: float) -> Optional[str]:
+    """Bucket label holding the q-quantile of a LatencyHistogram bucket dict."""
+    total = sum(buckets.values())
+    if not total:
+        return None
+    seen = 0
+    for label, count in buckets.items():
+        seen += count
+        if seen >= q * total:
+            return label
+    return None
+
+
+def diff_buckets(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {label: count - before.get(label, 0) for label, count in after.items()}
+
+
+async def create_users(client: httpx.AsyncClient, count: int, reflections: int, seed: int) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    run = uuid.uuid4().hex[:8]
+    headers = []
+    for i in range(count):
+        response = await client.post("/api/auth/register", json={
+            "email": f"bench_{run}_{i}@example.com", "password": "bench-password", "name": f"Bench {i}"
+        })
+        response.raise_for_status()
+        user_headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        for n in range(reflections):
+            await client.post("/api/reflections", headers=user_headers, json={
+                "content": f"Réflexion {n}: séance courte, concentration correcte.",
+                "mood": rng.choice(MOODS),
+            })
+        headers.append(user_headers)
+    return headers
+
+
+async def cache_stats(client: httpx.AsyncClient) -> Dict[str, Any]:
+    response = await client.get("/api/admin/cache-stats", headers={"X-Admin-Key": os.environ.get("ADMIN_API_KEY", "")})
+    response.raise_for_status()
+    return response.json()
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    users: List[Dict[str, str]],
+    rps: float,
+    duration: float,
+    summary_share: float,
+    contexts: int,
+    seed: int
+) -> Dict[str, Dict[str, Any]]:
+    rng = random.Random(seed)
+    # A fixed pool of request contexts: fewer contexts, more cache hits and coalescing
+    pool = [
+        {"available_time": rng.randint(2, 30), "energy_level": rng.choice(ENERGY_LEVELS),
+         "preferred_category": rng.choice(CATEGORIES)}
+        for _ in range(contexts)
+    ]
+    results = {
+        "suggestions": {"latencies": [], "errors": 0, "sources": {}},
+        "reflections_summary": {"latencies": [], "errors": 0, "sources": {}},
+    }
+
+    async def one(scheduled: float, endpoint: str, headers: Dict[str, str], body: Optional[dict]):
+        result = results[endpoint]
+        try:
+            if body is None:
+                response = await client.get("/api/reflections/summary", headers=headers)
+            else:
+                response = await client.post("/api/suggestions", headers=headers, json=body)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if not ok:
+            result["errors"] += 1
+            return
+        result["latencies"].append(time.perf_counter() - scheduled)
+        source = response.json().get("source", "llm")
+        result["sources"][source] = result["sources"].get(source, 0) + 1
+
+    tasks = []
+    started = time.perf_counter()
+    for i in range(int(rps * duration)):
+        scheduled = started + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        headers = rng.choice(users)
+        if rng.random() < summary_share:
+            tasks.append(asyncio.ensure_future(one(scheduled, "reflections_summary", headers, None)))
+        else:
+            tasks.append(asyncio.ensure_future(one(scheduled, "suggestions", headers, rng.choice(pool))))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    for result in results.values():
+        result["elapsed"] = elapsed
+    return results
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        print(f"Creating {args.users} users with {args.reflections} reflections each...")
+        users = await create_users(client, args.users, args.reflections, args.seed)
+
+        before = await cache_stats(client)
+        client_lag = EventLoopLagMonitor()
+        client_lag.start()
+        results = await drive(
+            client, users, args.rps, args.duration, args.summary_share, args.contexts, args.seed
+        )
+        client_lag.stop()
+        after = await cache_stats(client)
+
+    print(f"\ntarget {args.rps:g} rps for {args.duration:g} s, {args.contexts} suggestion contexts, "
+          f"provider={after['llm_gateway']['provider']}")
+    print(f"{'endpoint':<22}{'ok':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  sources")
+    for endpoint, result in results.items():
+        latencies = result["latencies"]
+        cells = [percentile(latencies, q) for q in (0.5, 0.95, 0.99)]
+        print(
+            f"{endpoint:<22}{len(latencies):>7}{result['errors']:>8}{len(latencies) / result['elapsed']:>9.1f}"
+            + "".join(f"{c * 1000:>9.0f}" if c is not None else f"{'-':>9}" for c in cells)
+            + f"  {result['sources']}"
+        )
+
+    gateway = {k: after["llm_gateway"][k] - before["llm_gateway"][k] for k in ("calls", "retries", "errors", "timeouts")}
+    flights = {k: after["llm_single_flight"][k] - before["llm_single_flight"][k] for k in ("calls", "executions", "coalesced")}
+    cache = {k: after["suggestion_cache"][k] - before["suggestion_cache"][k] for k in ("hits", "misses")}
+    print(f"\nLLM gateway: {gateway}, peak in flight {after['llm_gateway']['peak_in_flight']}")
+    print(f"single-flight: {flights}")
+    print(f"suggestion cache: {cache}")
+
+    server_lag = diff_buckets(before["event_loop_lag"]["buckets"], after["event_loop_lag"]["buckets"])
+    print(
+        "server event loop lag: p50 " + str(histogram_quantile(server_lag, 0.5))
+        + ", p95 " + str(histogram_quantile(server_lag, 0.95))
+        + ", p99 " + str(histogram_quantile(server_lag, 0.99))
+        + f" (seconds, bucket bounds {LAG_BUCKETS}), max since start {after['event_loop_lag']['max_seconds']} s"
+    )
+    print(f"benchmark client loop lag: max {client_lag.max_lag * 1000:.1f} ms (high values mean the client is the bottleneck)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--summary-share", type=float, default=0.2, help="share of /reflections/summary requests")
+    parser.add_argument("--contexts", type=int, default=200, help="distinct /suggestions request bodies")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--reflections", type=int, default=5, help="reflections per user")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
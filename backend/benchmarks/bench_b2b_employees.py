@@ -0,0 +1,121 @@
+"""
+Benchmark: GET /b2b/employees as one keyset-paginated aggregation vs. the
+per-employee find_one + count_documents loop it replaced.
+
+Needs a MongoDB (MONGO_URL); works in a throwaway database that is
+dropped at the end. Run from backend/:
+
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_b2b_employees
+
+For each company size the legacy loop lists everyone; the aggregation is
+timed on the first page (what the dashboard loads) and on walking every
+page with the largest page size.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any
+
+import server
+from services.company_stats import MAX_PAGE_SIZE
+from services.db_indexes import ensure_indexes
+from benchmarks.bench_session_completion import CountingDatabase, CATEGORIES
+
+
+async def legacy_get_employees(db, company_id: str, admin_user_id: str) -> Dict[str, Any]:
+    """get_employees as it was before the aggregation rewrite."""
+    company = await db.companies.find_one({"company_id": company_id}, {"_id": 0})
+    employees = []
+    for i, emp_id in enumerate(company.get("employees", [])):
+        emp = await db.users.find_one({"user_id": emp_id}, {"_id": 0})
+        if emp:
+            sessions = await db.user_sessions_history.count_documents({"user_id": emp_id, "completed": True})
+            employees.append({
+                "employee_number": i + 1,
+                "name": emp.get("name", "Collaborateur"),
+                "total_time": emp.get("total_time_invested", 0),
+                "streak_days": emp.get("streak_days", 0),
+                "total_sessions": sessions,
+                "is_admin": emp_id == admin_user_id
+            })
+    return {"employees": employees, "total": len(employees)}
+
+
+async def seed(db, employees: int, sessions: int) -> Dict[str, Any]:
+    for collection in ("users", "companies", "user_sessions_history"):
+        await db[collection].delete_many({})
+
+    rng = random.Random(employees)
+    company_id = f"company_{uuid.uuid4().hex[:12]}"
+    user_ids = [f"bench_user_{i}" for i in range(employees)]
+    users, history = [], []
+    for user_id in user_ids:
+        count = rng.randint(0, sessions * 2)
+        users.append({
+            "user_id": user_id, "name": f"Employee {user_id}", "company_id": company_id,
+            "total_time_invested": count * 5, "total_sessions": count, "streak_days": rng.randint(0, 30),
+        })
+        history += [
+            {"session_id": uuid.uuid4().hex, "user_id": user_id, "category": rng.choice(CATEGORIES),
+             "completed": True, "actual_duration": 5, "completed_at": datetime.now(timezone.utc).isoformat()}
+            for _ in range(count)
+        ]
+    await db.users.insert_many(users)
+    await db.companies.insert_one({"company_id": company_id, "employees": user_ids, "admin_user_id": user_ids[0]})
+    if history:
+        await db.user_sessions_history.insert_many(history)
+    return {"company_id": company_id, "user_id": user_ids[0], "is_company_admin": True}
+
+
+async def measure(name: str, base_db, call):
+    db = CountingDatabase(base_db)
+    server.db = db
+    started = time.perf_counter()
+    listed = await call(db)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28}{listed:>10}{db.round_trips:>14}{elapsed * 1000:>12.1f}")
+
+
+async def run(base_db, employees: int, sessions: int):
+    admin = await seed(base_db, employees, sessions)
+    print(f"\n{employees} employees, ~{sessions} sessions each")
+    print(f"{'flow':<28}{'listed':>10}{'round-trips':>14}{'wall ms':>12}")
+
+    async def legacy(db):
+        return len((await legacy_get_employees(db, admin["company_id"], admin["user_id"]))["employees"])
+
+    async def first_page(db):
+        return len((await server.get_employees(user=admin))["employees"])
+
+    async def all_pages(db):
+        listed, cursor = 0, None
+        while True:
+            page = await server.get_employees(limit=MAX_PAGE_SIZE, cursor=cursor, user=admin)
+            listed += len(page["employees"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return listed
+
+    await measure("legacy N+1", base_db, legacy)
+    await measure("aggregation, first page", base_db, first_page)
+    await measure(f"aggregation, pages of {MAX_PAGE_SIZE}", base_db, all_pages)
+
+
+async def main(args):
+    database = server.client[f"infinea_bench_{uuid.uuid4().hex[:8]}"]
+    try:
+        await ensure_indexes(database)
+        for employees in args.employees:
+            await run(database, employees, args.sessions)
+    finally:
+        await server.client.drop_database(database.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--sessions", type=int, default=5, help="average completed sessions per employee")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark: DurationIndex vs. the linear duration filters it replaced.
+
+Run from backend/:  python -m benchmarks.bench_duration_index
+"""
+import random
+import time
+from typing import List, Dict
+
+from services.duration_index import DurationIndex
+
+CATEGORIES = ["learning", "productivity", "well_being"]
+ENERGY_LEVELS = ["low", "medium", "high"]
+QUERIES = 500
+
+
+def make_catalog(size: int, seed: int = 42, max_duration: int = 60) -> List[Dict]:
+    """Random catalog; a small max_duration gives many equal durations (ties)."""
+    rng = random.Random(seed)
+    actions = []
+    for i in range(size):
+        duration_min = rng.randint(1, max_duration)
+        actions.append({
+            "action_id": f"action_{i}",
+            "title": f"Action {i}",
+            "category": rng.choice(CATEGORIES),
+            "energy_level": rng.choice(ENERGY_LEVELS),
+            "duration_min": duration_min,
+            "duration_max": duration_min + rng.randint(0, max_duration // 2),
+            "is_premium": rng.random() < 0.3,
+        })
+    return actions
+
+
+# ---------- the linear filters as they were in server.py / slot_detector.py ----------
+
+def linear_get_actions(actions, duration, category):
+    matches = [a for a in actions if a["category"] == category]
+    return [a for a in matches if a["duration_min"] <= duration <= a["duration_max"]][:100]
+
+
+def linear_suggestions(actions, duration, category, energy):
+    return [
+        a for a in actions
+        if a["duration_min"] <= duration and a["category"] == category
+        and a["energy_level"] == energy and not a["is_premium"]
+    ][:50]
+
+
+def linear_match_slot(actions, duration, category):
+    actions = [a for a in actions if not a.get("is_premium", False)]
+    matching = [a for a in actions if a["duration_min"] <= duration and a.get("category") == category]
+    if not matching:
+        matching = [a for a in actions if a["duration_min"] <= duration]
+    if matching:
+        matching.sort(key=lambda a: abs(a["duration_min"] - duration))
+        return matching[0]
+    return None
+
+
+def timed(fn, queries) -> float:
+    started = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def run(size: int):
+    actions = make_catalog(size)
+    rng = random.Random(size)
+    queries = [(rng.randint(1, 60), rng.choice(CATEGORIES), rng.choice(ENERGY_LEVELS)) for _ in range(QUERIES)]
+
+    started = time.perf_counter()
+    index = DurationIndex(actions)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Same answers: best slot match is identical, filtered sets are identical
+    for duration, category, energy in queries[:200]:
+        best = index.best_fit(duration, category, include_premium=False) or index.best_fit(duration, include_premium=False)
+        assert best is linear_match_slot(actions, duration, category)
+        indexed = index.fitting(duration, category=category, within_max=True)
+        expected = [a for a in actions if a["category"] == category and a["duration_min"] <= duration <= a["duration_max"]]
+        assert sorted(a["action_id"] for a in indexed) == sorted(a["action_id"] for a in expected)
+
+    rows = [
+        ("/actions?duration", lambda d, c, e: linear_get_actions(actions, d, c),
+         lambda d, c, e: index.fitting(d, category=c, within_max=True, limit=100)),
+        ("/suggestions", lambda d, c, e: linear_suggestions(actions, d, c, e),
+         lambda d, c, e: index.fitting(d, category=c, energy_level=e, include_premium=False, limit=50)),
+        ("match_action_to_slot", lambda d, c, e: linear_match_slot(actions, d, c),
+         lambda d, c, e: index.best_fit(d, category=c, include_premium=False)),
+    ]
+
+    print(f"\ncatalog={size:,} actions  (index build {build_ms:.1f} ms)")
+    print(f"{'call site':<24}{'linear us/op':>14}{'index us/op':>14}{'speedup':>10}")
+    for name, linear_fn, index_fn in rows:
+        linear_us = timed(linear_fn, queries)
+        index_us = timed(index_fn, queries)
+        print(f"{name:<24}{linear_us:>14.1f}{index_us:>14.1f}{linear_us / index_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    for size in (10_000, 100_000):
+        run(size)
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: catalog responses validated and encoded per request vs.
+pre-encoded bytes from EncodedResponseCache.
+
+Run from backend/:  python -m benchmarks.bench_encoded_responses
+"""
+import json
+import random
+import time
+from typing import List, Dict
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from services.encoded_responses import EncodedResponseCache, dumps, orjson
+
+CATEGORIES = ["learning", "productivity", "well_being"]
+ENERGY_LEVELS = ["low", "medium", "high"]
+REQUESTS = 300
+
+
+class MicroAction(BaseModel):
+    # Same shape as server.MicroAction
+    action_id: str
+    title: str
+    description: str
+    category: str
+    duration_min: int
+    duration_max: int
+    energy_level: str
+    instructions: List[str]
+    is_premium: bool = False
+    icon: str = "sparkles"
+
+
+def make_catalog(size: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    actions = []
+    for i in range(size):
+        duration_min = rng.randint(2, 10)
+        actions.append({
+            "action_id": f"action_{i}",
+            "title": f"Action {i}",
+            "description": "Une micro-action de quelques minutes pour avancer sur vos objectifs.",
+            "category": rng.choice(CATEGORIES),
+            "duration_min": duration_min,
+            "duration_max": duration_min + rng.randint(0, 10),
+            "energy_level": rng.choice(ENERGY_LEVELS),
+            "instructions": [f"Étape {n}" for n in range(1, 5)],
+            "is_premium": rng.random() < 0.3,
+            "icon": "sparkles",
+        })
+    return actions
+
+
+def make_app(actions: List[Dict]) -> FastAPI:
+    app = FastAPI()
+    cache = EncodedResponseCache()
+
+    def select(category, energy):
+        return [
+            a for a in actions
+            if (not category or a["category"] == category) and (not energy or a["energy_level"] == energy)
+        ][:100]
+
+    @app.get("/legacy", response_model=List[MicroAction])
+    async def legacy(category: str = None, energy: str = None):
+        return select(category, energy)
+
+    @app.get("/encoded", response_model=List[MicroAction])
+    async def encoded(category: str = None, energy: str = None):
+        body = cache.get_or_build(
+            "v1", (category, energy),
+            lambda: [MicroAction(**a).model_dump() for a in select(category, energy)]
+        )
+        return Response(content=body, media_type="application/json")
+
+    return app
+
+
+def cpu_per_request(client: TestClient, path: str, params: List[Dict]) -> float:
+    """Process CPU time per request in microseconds (client overhead included)."""
+    started = time.process_time()
+    for p in params:
+        client.get(path, params=p)
+    return (time.process_time() - started) / len(params) * 1e6
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run(size: int):
+    actions = make_catalog(size)
+    rng = random.Random(size)
+    params = [
+        {k: v for k, v in (("category", rng.choice(CATEGORIES + [None])),
+                           ("energy", rng.choice(ENERGY_LEVELS + [None]))) if v}
+        for _ in range(REQUESTS)
+    ]
+
+    client = TestClient(make_app(actions))
+    # Same bodies on both paths
+    for p in params[:20]:
+        assert client.get("/legacy", params=p).json() == client.get("/encoded", params=p).json()
+
+    baseline = cpu_per_request(client, "/legacy", params)
+    encoded = cpu_per_request(client, "/encoded", params)
+
+    page = actions[:100]
+    print(f"\ncatalog={size:,} actions, 100 per page  (encoder: {'orjson' if orjson else 'json'})")
+    print(f"{'path':<34}{'us/op':>12}")
+    print(f"{'json.dumps (encode only)':<34}{timed(lambda: json.dumps(page).encode(), 200):>12.1f}")
+    print(f"{'dumps (encode only)':<34}{timed(lambda: dumps(page), 200):>12.1f}")
+    print(f"{'GET response_model (CPU)':<34}{baseline:>12.1f}")
+    print(f"{'GET pre-encoded bytes (CPU)':<34}{encoded:>12.1f}")
+    print(f"{'CPU saved per request':<34}{baseline - encoded:>12.1f}  ({baseline / encoded:.1f}x)")
+
+
+if __name__ == "__main__":
+    for size in (200, 10_000):
+        run(size)
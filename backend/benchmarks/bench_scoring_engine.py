@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: vectorized ScoringEngine vs. the per-action score_action
+ranking and the linear slot matching it replaces.
+
+Run from backend/:  python -m benchmarks.bench_scoring_engine
+"""
+import random
+import time
+
+from services.scoring_engine import ScoringEngine, SLOT_WEIGHTS
+from services.suggestion_ranking import score_action
+
+from .bench_duration_index import make_catalog, linear_match_slot, CATEGORIES, ENERGY_LEVELS
+
+BATCH = 10_000
+SCALAR_SAMPLE = 100
+
+
+def scalar_suggestions(actions, duration, energy, category, k=3):
+    """Filter + closest-fit order + stable sort on score_action, as server.py did."""
+    candidates = [
+        (duration - a["duration_min"], seq, a) for seq, a in enumerate(actions)
+        if a["duration_min"] <= duration and a["category"] == category
+        and a["energy_level"] == energy and not a["is_premium"]
+    ]
+    candidates.sort(key=lambda c: (c[0], c[1]))
+    ranked = sorted((a for _, _, a in candidates), key=lambda a: score_action(a, duration, energy, category), reverse=True)
+    return ranked[:k]
+
+
+def run(size: int):
+    actions = make_catalog(size)
+    rng = random.Random(size)
+    contexts = [(rng.randint(1, 60), rng.choice(ENERGY_LEVELS), rng.choice(CATEGORIES)) for _ in range(BATCH)]
+    times = [t for t, _, _ in contexts]
+    energies = [e for _, e, _ in contexts]
+    categories = [c for _, _, c in contexts]
+
+    started = time.perf_counter()
+    engine = ScoringEngine(actions)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    suggestion_options = dict(include_premium=False, require_category=True, require_energy=True)
+    sample = contexts[:SCALAR_SAMPLE]
+
+    # Same answers as the scalar rankers
+    for t, e, c in sample:
+        assert engine.top_k(t, e, c, **suggestion_options) == scalar_suggestions(actions, t, e, c)
+        best = engine.top_k(t, category=c, k=1, include_premium=False, weights=SLOT_WEIGHTS)
+        assert (best[0] if best else None) is linear_match_slot(actions, t, c)
+
+    # Batch ranking (deduplicated contexts) agrees with per-context ranking
+    batch = engine.top_k_batch(times[:SCALAR_SAMPLE], energies[:SCALAR_SAMPLE], categories[:SCALAR_SAMPLE], **suggestion_options)
+    for row, (t, e, c) in zip(batch, sample):
+        assert [actions[i] for i in row if i >= 0] == engine.top_k(t, e, c, **suggestion_options)
+
+    started = time.perf_counter()
+    for t, e, c in sample:
+        scalar_suggestions(actions, t, e, c)
+    scalar_suggest_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    started = time.perf_counter()
+    for t, _, c in sample:
+        linear_match_slot(actions, t, c)
+    scalar_slot_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    started = time.perf_counter()
+    for t, e, c in sample:
+        engine.top_k(t, e, c, **suggestion_options)
+    single_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    started = time.perf_counter()
+    engine.top_k_batch(times, energies, categories, k=3, **suggestion_options)
+    batch_suggest_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.top_k_batch(times, categories=categories, k=1, include_premium=False, weights=SLOT_WEIGHTS)
+    batch_slot_s = time.perf_counter() - started
+
+    print(f"\ncatalog={size:,} actions, batch={BATCH:,} contexts  (engine build {build_ms:.1f} ms)")
+    print(f"{'ranking':<28}{'scalar us/ctx':>15}{'engine us/ctx':>15}{'speedup':>10}")
+    rows = [
+        ("suggestions (single ctx)", scalar_suggest_us, single_us),
+        ("suggestions (batch)", scalar_suggest_us, batch_suggest_s / BATCH * 1e6),
+        ("slot matching (batch)", scalar_slot_us, batch_slot_s / BATCH * 1e6),
+    ]
+    for name, scalar_us, engine_us in rows:
+        print(f"{name:<28}{scalar_us:>15.1f}{engine_us:>15.1f}{scalar_us / engine_us:>9.1f}x")
+    print(f"batch wall time: suggestions {batch_suggest_s:.2f} s, slots {batch_slot_s:.2f} s")
+
+
+if __name__ == "__main__":
+    for size in (1_000, 10_000, 100_000):
+        run(size)
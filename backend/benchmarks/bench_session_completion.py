@@ -0,0 +1,210 @@
+"""
+Concurrency benchmark: POST /sessions/complete as a single atomic update vs.
+the read-modify-write sequence it replaced.
+
+Needs a MongoDB (MONGO_URL); works in a throwaway database that is
+dropped at the end. Run from backend/:
+
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_session_completion
+
+Every completion of the run is started at once. Round-trips are counted
+per collection call; lost updates show up as a wrong total time and
+concurrent awards as duplicate badges.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any
+
+import server
+from server import BADGES, SessionComplete
+
+CATEGORIES = ["learning", "productivity", "well_being"]
+
+
+class CountingDatabase:
+    """Database proxy counting round-trips (awaited calls and cursor reads)."""
+
+    def __init__(self, db):
+        self._db = db
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        return CountingCollection(self, getattr(self._db, name))
+
+
+class CountingCollection:
+    def __init__(self, counter: CountingDatabase, collection):
+        self._counter = counter
+        self._collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        if name in ("find", "aggregate"):
+            return lambda *args, **kwargs: CountingCursor(self._counter, method(*args, **kwargs))
+
+        async def call(*args, **kwargs):
+            self._counter.round_trips += 1
+            return await method(*args, **kwargs)
+        return call
+
+
+class CountingCursor:
+    def __init__(self, counter: CountingDatabase, cursor):
+        self._counter = counter
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args):
+        self._cursor = self._cursor.limit(*args)
+        return self
+
+    async def to_list(self, length):
+        self._counter.round_trips += 1
+        return await self._cursor.to_list(length)
+
+
+async def legacy_complete_session(db, user_id: str, completion: SessionComplete) -> Dict[str, Any]:
+    """complete_session + check_and_award_badges as they were before the atomic rewrite."""
+    session = await db.user_sessions_history.find_one(
+        {"session_id": completion.session_id, "user_id": user_id}, {"_id": 0}
+    )
+    if not session:
+        raise LookupError(completion.session_id)
+    await db.user_sessions_history.update_one(
+        {"session_id": completion.session_id},
+        {"$set": {
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "actual_duration": completion.actual_duration,
+            "completed": True,
+            "notes": completion.notes
+        }}
+    )
+
+    user_doc = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+    today = datetime.now(timezone.utc).date()
+    last_session = user_doc.get("last_session_date")
+    new_streak = user_doc.get("streak_days", 0)
+    if last_session:
+        last_date = datetime.fromisoformat(last_session).date()
+        if last_date == today - timedelta(days=1):
+            new_streak += 1
+        elif last_date != today:
+            new_streak = 1
+    else:
+        new_streak = 1
+    await db.users.update_one(
+        {"user_id": user_id},
+        {"$inc": {"total_time_invested": completion.actual_duration},
+         "$set": {"streak_days": new_streak, "last_session_date": today.isoformat()}}
+    )
+
+    # check_and_award_badges: user read, count, aggregation, push
+    user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+    earned_ids = [b["badge_id"] for b in user.get("badges", [])]
+    total_sessions = await db.user_sessions_history.count_documents({"user_id": user_id, "completed": True})
+    category_stats = await db.user_sessions_history.aggregate([
+        {"$match": {"user_id": user_id, "completed": True}},
+        {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+    ]).to_list(10)
+    category_counts = {stat["_id"]: stat["count"] for stat in category_stats}
+
+    new_badges = []
+    for badge in BADGES:
+        condition = badge["condition"]
+        if badge["badge_id"] in earned_ids:
+            continue
+        if condition["type"] == "sessions_completed":
+            earned = total_sessions >= condition["value"]
+        elif condition["type"] == "streak_days":
+            earned = user.get("streak_days", 0) >= condition["value"]
+        elif condition["type"] == "total_time":
+            earned = user.get("total_time_invested", 0) >= condition["value"]
+        elif condition["type"] == "category_sessions":
+            earned = category_counts.get(condition["category"], 0) >= condition["value"]
+        elif condition["type"] == "all_categories":
+            earned = all(category_counts.get(cat, 0) >= condition["value"] for cat in CATEGORIES)
+        else:
+            earned = user.get("subscription_tier") == condition["value"]
+        if earned:
+            new_badges.append({"badge_id": badge["badge_id"], "name": badge["name"], "icon": badge["icon"]})
+    if new_badges:
+        await db.users.update_one({"user_id": user_id}, {"$push": {"badges": {"$each": new_badges}}})
+
+    for badge in new_badges:
+        await db.notifications.insert_one({
+            "notification_id": f"notif_{uuid.uuid4().hex[:12]}",
+            "user_id": user_id,
+            "type": "badge_earned",
+            "title": f"Nouveau badge : {badge['name']}",
+        })
+    return {"new_badges": new_badges}
+
+
+async def atomic_complete_session(db, user_id: str, completion: SessionComplete) -> Dict[str, Any]:
+    return await server.complete_session(completion, user={"user_id": user_id})
+
+
+async def run_flow(name: str, flow, base_db, users: int, sessions: int, duration: int):
+    for collection in ("users", "user_sessions_history", "notifications"):
+        await base_db[collection].delete_many({})
+
+    user_ids = [f"bench_user_{i}" for i in range(users)]
+    await base_db.users.insert_many([
+        {"user_id": u, "subscription_tier": "free", "total_time_invested": 0, "streak_days": 0,
+         "last_session_date": None, "badges": []}
+        for u in user_ids
+    ])
+    completions = []
+    session_docs = []
+    for u in user_ids:
+        for n in range(sessions):
+            session_id = f"session_{uuid.uuid4().hex[:12]}"
+            session_docs.append({
+                "session_id": session_id, "user_id": u, "category": CATEGORIES[n % len(CATEGORIES)],
+                "started_at": datetime.now(timezone.utc).isoformat(), "completed": False
+            })
+            completions.append((u, SessionComplete(session_id=session_id, actual_duration=duration)))
+    await base_db.user_sessions_history.insert_many(session_docs)
+
+    db = CountingDatabase(base_db)
+    server.db = db
+    started = time.perf_counter()
+    await asyncio.gather(*[flow(db, u, completion) for u, completion in completions])
+    elapsed = time.perf_counter() - started
+
+    lost_minutes = 0
+    duplicate_badges = 0
+    async for user in base_db.users.find({}, {"_id": 0, "total_time_invested": 1, "badges": 1}):
+        lost_minutes += sessions * duration - user.get("total_time_invested", 0)
+        ids = [b["badge_id"] for b in user.get("badges", [])]
+        duplicate_badges += len(ids) - len(set(ids))
+
+    print(
+        f"{name:<10}{len(completions) / elapsed:>15.0f}{db.round_trips / len(completions):>18.2f}"
+        f"{elapsed * 1000:>12.0f}{lost_minutes:>14}{duplicate_badges:>18}"
+    )
+
+
+async def main(args):
+    database = server.client[f"infinea_bench_{uuid.uuid4().hex[:8]}"]
+    try:
+        print(f"\n{args.users} users x {args.sessions} sessions, all completed concurrently")
+        print(f"{'flow':<10}{'completions/s':>15}{'round-trips/compl':>18}{'wall ms':>12}{'lost minutes':>14}{'duplicate badges':>18}")
+        await run_flow("legacy", legacy_complete_session, database, args.users, args.sessions, args.duration)
+        await run_flow("atomic", atomic_complete_session, database, args.users, args.sessions, args.duration)
+    finally:
+        await server.client.drop_database(database.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=12, help="sessions per user")
+    parser.add_argument("--duration", type=int, default=5, help="minutes per session")
+    asyncio.run(main(parser.parse_args()))
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Depends, Response
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Depends, Response, Query
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 import urllib.parse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -8,25 +8,123 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pymongo import ReturnDocument
 from typing import List, Optional, Dict, Any
 import uuid
+import asyncio
+import hashlib
+import hmac
+import json
+import time
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
 import httpx
 
+from services.principal_cache import PrincipalCache
+from services.password_hasher import PasswordHasher, HasherBusyError
+from services.db_indexes import ensure_indexes
+from services.db_migrations import run_migrations, run_background_migrations
+from services.user_stats import record_completion, get_user_stats_doc
+from services.stats_cache import StatsCache
+from services.activity_rollup import record_daily_activity, activity_history, GRANULARITIES, MAX_RANGE_DAYS
+from services.activity_prefix import record_prefix_activity, range_totals, user_owner, company_owner
+from services.company_stats import employee_page, company_dashboard, company_member_ids, EMPLOYEE_SORTS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.badge_engine import BADGES, BADGE_INDEX, badge_inputs, badge_award, completion_inputs, push_badges
+from services.action_catalog import ActionCatalog
+from services.encoded_responses import EncodedResponseCache, dumps as encode_json
+from services.suggestion_cache import SuggestionCache, suggestion_context_key
+from services.single_flight import SingleFlight
+from services.llm_gateway import LlmGateway
+from services.llm_providers import create_llm_provider
+from services.loop_monitor import EventLoopLagMonitor
+from services.suggestion_ranking import rule_based_suggestion, suggestion_response
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL') or os.environ.get('MONGODB_URI', '')
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware so native datetime fields (TTL expiries) round-trip as UTC
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ.get('DB_NAME', 'infinea')]
+# Refuse to start when a required index cannot be ensured
+DB_INDEXES_STRICT = os.environ.get('DB_INDEXES_STRICT', 'false').lower() == 'true'
+# Run the full-history backfills in a startup task (false: python -m services.db_migrations)
+MIGRATIONS_IN_BACKGROUND = os.environ.get('MIGRATIONS_IN_BACKGROUND', 'true').lower() == 'true'
+migration_task: Optional[asyncio.Task] = None
 
 # JWT Config
 JWT_SECRET = os.environ.get('JWT_SECRET', 'infinea-secret-key-change-in-production')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 168  # 7 days
+JWT_TOKEN_TYPE = "access"
+# Embed subscription_tier/company flags in the JWT so slim routes skip the user fetch
+JWT_EMBED_PRINCIPAL = os.environ.get('JWT_EMBED_PRINCIPAL', 'false').lower() == 'true'
+SESSION_TOKEN_PREFIX = "session_"
+# Shared secret for operator routes under /admin, sent as X-Admin-Key (unset disables them)
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY', '')
+
+# Principal cache (auth lookups for get_current_user)
+principal_cache = PrincipalCache(
+    ttl_seconds=float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '30')),
+    max_entries=int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', '10000')),
+)
+
+# Process-local micro-action catalog (reloaded on version bump)
+action_catalog = ActionCatalog()
+CATALOG_POLL_SECONDS = float(os.environ.get('CATALOG_POLL_SECONDS', '30'))
+CATALOG_CACHE_CONTROL = os.environ.get('CATALOG_CACHE_CONTROL', 'public, max-age=300')
+# Ready-to-send JSON bodies per catalog filter combination
+encoded_responses = EncodedResponseCache(
+    max_entries=int(os.environ.get('ENCODED_RESPONSE_CACHE_MAX_ENTRIES', '512'))
+)
+
+# /suggestions responses keyed on the normalized request context
+suggestion_cache = SuggestionCache(
+    ttl_seconds=float(os.environ.get('SUGGESTION_CACHE_TTL_SECONDS', '600')),
+    max_entries=int(os.environ.get('SUGGESTION_CACHE_MAX_ENTRIES', '5000')),
+    max_bytes=int(os.environ.get('SUGGESTION_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+)
+
+# App-wide LLM access; the provider is installed at startup
+llm_gateway = LlmGateway(
+    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', '16')),
+    call_timeout=float(os.environ.get('LLM_CALL_TIMEOUT_SECONDS', '15')),
+    max_retries=int(os.environ.get('LLM_MAX_RETRIES', '1')),
+    retry_base_delay=float(os.environ.get('LLM_RETRY_BASE_DELAY_SECONDS', '0.5')),
+)
+# "emergent" (needs EMERGENT_LLM_KEY) or "fake", a local stand-in for load tests
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'emergent')
+LLM_FAKE_OPTIONS = dict(
+    latency_ms=float(os.environ.get('LLM_FAKE_LATENCY_MS', '800')),
+    latency_sigma=float(os.environ.get('LLM_FAKE_LATENCY_SIGMA', '0.5')),
+    error_rate=float(os.environ.get('LLM_FAKE_ERROR_RATE', '0')),
+    response_chars=int(os.environ.get('LLM_FAKE_RESPONSE_CHARS', '400')),
+    seed=int(os.environ.get('LLM_FAKE_SEED', '0')),
+)
+# Database part of GET /stats per user, patched by session completion
+stats_cache = StatsCache(
+    ttl_seconds=float(os.environ.get('STATS_CACHE_TTL_SECONDS', '300')),
+    max_entries=int(os.environ.get('STATS_CACHE_MAX_ENTRIES', '10000')),
+)
+
+# Concurrent identical LLM calls share one in-flight request
+llm_flights = SingleFlight()
+LLM_SUGGESTION_TIMEOUT_SECONDS = float(os.environ.get('LLM_SUGGESTION_TIMEOUT_SECONDS', '20'))
+LLM_SUMMARY_TIMEOUT_SECONDS = float(os.environ.get('LLM_SUMMARY_TIMEOUT_SECONDS', '45'))
+# /suggestions answers with the rule-based ranking if the LLM is not done by then (0 waits for it)
+SUGGESTION_DEADLINE_SECONDS = float(os.environ.get('SUGGESTION_DEADLINE_SECONDS', '3'))
+suggestion_sources: Dict[str, int] = {}
+SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', '10'))
+# Event loop lag sampling, reported in /admin/cache-stats (0 disables)
+loop_monitor = EventLoopLagMonitor(float(os.environ.get('EVENT_LOOP_LAG_INTERVAL_SECONDS', '0.1')))
+
+# bcrypt runs on a bounded worker pool, off the event loop
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+    max_workers=int(os.environ.get('BCRYPT_MAX_WORKERS', '2')),
+    max_pending=int(os.environ.get('BCRYPT_MAX_PENDING', '32')),
+)
 
 # Create the main app
 app = FastAPI(title="InFinea API")
@@ -110,23 +208,54 @@ class ProgressStats(BaseModel):
 
 # ============== HELPER FUNCTIONS ==============
 
-def create_token(user_id: str) -> str:
+def create_token(user_id: str, user: Optional[dict] = None) -> str:
     payload = {
         "user_id": user_id,
+        "typ": JWT_TOKEN_TYPE,
         "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
+    if JWT_EMBED_PRINCIPAL and user is not None:
+        payload["principal"] = {
+            "subscription_tier": user.get("subscription_tier", "free"),
+            "company_id": user.get("company_id"),
+            "is_company_admin": user.get("is_company_admin", False),
+        }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def verify_token(token: str) -> Optional[str]:
+def set_session_cookie(response: Response, token: str):
+    response.set_cookie(
+        key="session_token",
+        value=token,
+        httponly=True,
+        secure=True,
+        samesite="none",
+        path="/",
+        max_age=JWT_EXPIRATION_HOURS * 3600
+    )
+
+def decode_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get("user_id")
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    # Tokens minted before the typ claim existed are access tokens
+    if payload.get("typ", JWT_TOKEN_TYPE) != JWT_TOKEN_TYPE:
+        return None
+    return payload
 
-async def get_current_user(request: Request) -> dict:
+def verify_token(token: str) -> Optional[str]:
+    payload = decode_token(token)
+    if not payload:
+        return None
+    return payload.get("user_id")
+
+def is_session_token(token: str) -> bool:
+    """OAuth session tokens are opaque and prefixed; everything else is a JWT"""
+    return token.startswith(SESSION_TOKEN_PREFIX)
+
+def get_session_token(request: Request) -> Optional[str]:
     # Check cookie first
     session_token = request.cookies.get("session_token")
     
@@ -136,16 +265,27 @@ async def get_current_user(request: Request) -> dict:
         if auth_header and auth_header.startswith("Bearer "):
             session_token = auth_header.split(" ")[1]
     
+    return session_token
+
+async def get_current_user(request: Request) -> dict:
+    session_token = get_session_token(request)
+    
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    # Check if it's a Google OAuth session
-    session_doc = await db.user_sessions.find_one(
-        {"session_token": session_token},
-        {"_id": 0}
-    )
+    cached_user = principal_cache.get(session_token)
+    if cached_user:
+        return cached_user
     
-    if session_doc:
+    if is_session_token(session_token):
+        # Google OAuth session
+        session_doc = await db.user_sessions.find_one(
+            {"session_token": session_token},
+            {"_id": 0}
+        )
+        if not session_doc:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        
         # Check expiry
         expires_at = session_doc.get("expires_at")
         if isinstance(expires_at, str):
@@ -159,25 +299,80 @@ async def get_current_user(request: Request) -> dict:
             {"user_id": session_doc["user_id"]},
             {"_id": 0}
         )
-        if user:
-            return user
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        
+        principal_cache.put(session_token, user, expires_at=expires_at.timestamp())
+        return user
     
-    # Try JWT token
-    user_id = verify_token(session_token)
-    if not user_id:
+    # JWT: verified in CPU, no session lookup
+    payload = decode_token(session_token)
+    if not payload or not payload.get("user_id"):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+    user = await db.users.find_one({"user_id": payload["user_id"]}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    principal_cache.put(session_token, user, expires_at=payload.get("exp"))
     return user
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+async def get_current_principal(request: Request) -> dict:
+    """
+    Slim principal for routes that only need user_id and access flags.
+    Served straight from the JWT claims when the token embeds a premium
+    tier, otherwise falls back to the (cached) full user document: a free
+    claim may predate an upgrade, e.g. one applied by the Stripe webhook,
+    which cannot refresh the client's token. Tiers are never downgraded.
+    """
+    session_token = get_session_token(request)
+    
+    if session_token and not is_session_token(session_token):
+        payload = decode_token(session_token)
+        principal = payload.get("principal") if payload else None
+        if principal and payload.get("user_id") and principal.get("subscription_tier") == "premium":
+            return {"user_id": payload["user_id"], **principal}
+    
+    return await get_current_user(request)
+
+async def require_admin(request: Request):
+    """Operator routes: X-Admin-Key must match ADMIN_API_KEY"""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API disabled")
+    if not hmac.compare_digest(request.headers.get("X-Admin-Key", "").encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Admin access required")
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+async def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def encoded_json_response(body: bytes, etag: str, cache_control: str) -> Response:
+    """Send pre-encoded JSON bytes as-is, skipping response_model validation"""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
 
 def default_onboarding_state() -> Dict[str, Any]:
     return {
@@ -206,10 +401,11 @@ async def register(user_data: UserCreate, response: Response):
         "user_id": user_id,
         "email": user_data.email,
         "name": user_data.name,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password(user_data.password),
         "picture": None,
         "subscription_tier": "free",
         "total_time_invested": 0,
+        "total_sessions": 0,
         "streak_days": 0,
         "last_session_date": None,
         "onboarding": default_onboarding_state(),
@@ -218,16 +414,8 @@ async def register(user_data: UserCreate, response: Response):
     
     await db.users.insert_one(user_doc)
     
-    token = create_token(user_id)
-    response.set_cookie(
-        key="session_token",
-        value=token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=JWT_EXPIRATION_HOURS * 3600
-    )
+    token = create_token(user_id, user_doc)
+    set_session_cookie(response, token)
     
     return {
         "user_id": user_id,
@@ -246,19 +434,19 @@ async def login(user_data: UserLogin, response: Response):
     if "password_hash" not in user:
         raise HTTPException(status_code=401, detail="Please login with Google")
     
-    if not verify_password(user_data.password, user["password_hash"]):
+    if not await verify_password(user_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Transparently upgrade hashes made with a different cost factor
+    if password_hasher.needs_rehash(user["password_hash"]):
+        await db.users.update_one(
+            {"user_id": user["user_id"]},
+            {"$set": {"password_hash": await hash_password(user_data.password)}}
+        )
+        principal_cache.invalidate_user(user["user_id"])
     
-    token = create_token(user["user_id"])
-    response.set_cookie(
-        key="session_token",
-        value=token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=JWT_EXPIRATION_HOURS * 3600
-    )
+    token = create_token(user["user_id"], user)
+    set_session_cookie(response, token)
     
     return {
         "user_id": user["user_id"],
@@ -341,6 +529,7 @@ async def google_oauth_callback(request: Request, response: Response, code: str
             {"user_id": user_id},
             {"$set": {"name": name, "picture": picture}},
         )
+        principal_cache.invalidate_user(user_id)
     else:
         user_id = f"user_{uuid.uuid4().hex[:12]}"
         user_doc = {
@@ -350,6 +539,7 @@ async def google_oauth_callback(request: Request, response: Response, code: str
             "picture": picture,
             "subscription_tier": "free",
             "total_time_invested": 0,
+            "total_sessions": 0,
             "streak_days": 0,
             "last_session_date": None,
             "onboarding": default_onboarding_state(),
@@ -358,12 +548,12 @@ async def google_oauth_callback(request: Request, response: Response, code: str
         await db.users.insert_one(user_doc)
 
     # Création de la session locale
-    session_token = f"session_{uuid.uuid4().hex}"
+    session_token = f"{SESSION_TOKEN_PREFIX}{uuid.uuid4().hex}"
     expires_at = datetime.now(timezone.utc) + timedelta(days=7)
     await db.user_sessions.insert_one({
         "user_id": user_id,
         "session_token": session_token,
-        "expires_at": expires_at.isoformat(),
+        "expires_at": expires_at,
         "created_at": datetime.now(timezone.utc).isoformat(),
     })
 
@@ -411,7 +601,7 @@ async def process_oauth_session(request: Request, response: Response):
     )
 
     # JWT en backup pour localStorage
-    jwt_token = create_token(user_id)
+    jwt_token = create_token(user_id, user)
 
     return {
         "user_id": user_id,
@@ -440,6 +630,7 @@ async def logout(request: Request, response: Response):
     session_token = request.cookies.get("session_token")
     if session_token:
         await db.user_sessions.delete_one({"session_token": session_token})
+        principal_cache.invalidate_token(session_token)
     
     response.delete_cookie(key="session_token", path="/", samesite="none", secure=True)
     return {"message": "Logged out successfully"}
@@ -478,6 +669,7 @@ async def submit_onboarding_step(payload: OnboardingStepSubmit, user: dict = Dep
         {"user_id": user["user_id"]},
         {"$set": {"onboarding": new_onboarding}},
     )
+    principal_cache.invalidate_user(user["user_id"])
 
     return {"onboarding": new_onboarding}
 
@@ -485,64 +677,77 @@ async def submit_onboarding_step(payload: OnboardingStepSubmit, user: dict = Dep
 
 @api_router.get("/actions", response_model=List[MicroAction])
 async def get_actions(
+    request: Request,
     category: Optional[str] = None,
     duration: Optional[int] = None,
     energy: Optional[str] = None
 ):
-    query = {}
-    if category:
-        query["category"] = category
-    if energy:
-        query["energy_level"] = energy
-    
-    actions = await db.micro_actions.find(query, {"_id": 0}).to_list(100)
-    
-    if duration:
-        actions = [a for a in actions if a["duration_min"] <= duration <= a["duration_max"]]
+    etag = action_catalog.etag
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    
+    def build():
+        if duration:
+            # Closest fit first, via the duration interval index
+            actions = action_catalog.duration_index.fitting(
+                duration, category=category, energy_level=energy, within_max=True, limit=100
+            )
+        else:
+            actions = action_catalog.find(category=category, energy_level=energy)[:100]
+        # Validated once per catalog version instead of on every request
+        return [MicroAction(**a).model_dump() for a in actions]
     
-    return actions
+    body = encoded_responses.get_or_build(etag, ("actions", category, duration, energy), build)
+    return encoded_json_response(body, etag, CATALOG_CACHE_CONTROL)
 
 @api_router.get("/actions/{action_id}")
-async def get_action(action_id: str):
-    action = await db.micro_actions.find_one({"action_id": action_id}, {"_id": 0})
+async def get_action(action_id: str, request: Request):
+    etag = action_catalog.etag
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    
+    action = action_catalog.get(action_id)
     if not action:
         raise HTTPException(status_code=404, detail="Action not found")
-    return action
+    
+    body = encoded_responses.get_or_build(etag, ("action", action_id), lambda: action)
+    return encoded_json_response(body, etag, CATALOG_CACHE_CONTROL)
 
 # ============== AI SUGGESTIONS ROUTE ==============
 
-@api_router.post("/suggestions")
-async def get_ai_suggestions(
-    ai_request: AIRequest,
-    user: dict = Depends(get_current_user)
-):
-    """Get AI-powered micro-action suggestions based on time and energy"""
-    from emergentintegrations.llm.chat import LlmChat, UserMessage
+SUGGESTION_SYSTEM_MESSAGE = """Tu es l'assistant InFinea, expert en productivité et bien-être. 
+Tu aides les utilisateurs à transformer leurs moments perdus en micro-victoires.
+Réponds toujours en français, de manière concise et motivante.
+Suggère les meilleures micro-actions en fonction du temps disponible et du niveau d'énergie."""
+
+async def start_suggestion(ai_request: AIRequest, user: dict):
+    """
+    Shared first half of /suggestions and /suggestions/stream.
     
-    api_key = os.environ.get('EMERGENT_LLM_KEY')
-    if not api_key:
+    Returns (immediate, rules, llm_call): `immediate` is a finished response
+    (no matching action, or a cache hit); otherwise `rules` is the rule-based
+    answer and `llm_call` the in-flight LLM refinement.
+    """
+    if not llm_gateway.configured:
         raise HTTPException(status_code=500, detail="AI service not configured")
     
-    # Get matching actions from database
-    query = {"duration_min": {"$lte": ai_request.available_time}}
-    if ai_request.preferred_category:
-        query["category"] = ai_request.preferred_category
-    if ai_request.energy_level:
-        query["energy_level"] = ai_request.energy_level
-    
-    # Filter premium actions for free users
-    if user.get("subscription_tier") == "free":
-        query["is_premium"] = False
-    
-    available_actions = await db.micro_actions.find(query, {"_id": 0}).to_list(50)
+    # Get matching actions from the catalog (premium actions hidden for free users)
+    include_premium = user.get("subscription_tier") != "free"
+    available_actions = action_catalog.duration_index.fitting(
+        ai_request.available_time,
+        category=ai_request.preferred_category,
+        energy_level=ai_request.energy_level,
+        include_premium=include_premium,
+        limit=50
+    )
     
     if not available_actions:
         # Return default suggestion if no actions match
-        return {
+        return served_suggestion({
             "suggestion": "Prenez une pause de respiration profonde",
             "reasoning": "Aucune micro-action ne correspond exactement à vos critères. Profitez de ce moment pour vous recentrer.",
             "recommended_actions": []
-        }
+        }, "default"), None, None
     
     # Get user's recent activity for personalization
     recent_sessions = await db.user_sessions_history.find(
@@ -552,23 +757,27 @@ async def get_ai_suggestions(
     
     recent_categories = [s.get("category", "") for s in recent_sessions]
     
+    # Same catalog slice + same recent activity -> same answer
+    cache_key = suggestion_context_key(
+        action_catalog.version,
+        action_catalog.duration_index.duration_bucket(ai_request.available_time),
+        ai_request.energy_level,
+        ai_request.preferred_category,
+        include_premium,
+        recent_categories
+    )
+    cached = suggestion_cache.get(cache_key)
+    if cached is not None:
+        return served_suggestion(cached, "cache"), None, None
+    
     # Build context for AI
     actions_text = "\n".join([
         f"- {a['title']} ({a['category']}, {a['duration_min']}-{a['duration_max']}min, énergie: {a['energy_level']}): {a['description']}"
         for a in available_actions[:10]
     ])
     
-    chat = LlmChat(
-        api_key=api_key,
-        session_id=f"suggestion_{user['user_id']}_{datetime.now().timestamp()}",
-        system_message="""Tu es l'assistant InFinea, expert en productivité et bien-être. 
-Tu aides les utilisateurs à transformer leurs moments perdus en micro-victoires.
-Réponds toujours en français, de manière concise et motivante.
-Suggère les meilleures micro-actions en fonction du temps disponible et du niveau d'énergie."""
-    )
-    chat.with_model("openai", "gpt-5.2")
-    
-    prompt = f"""L'utilisateur a {ai_request.available_time} minutes disponibles et un niveau d'énergie {ai_request.energy_level}.
+    async def generate():
+        prompt = f"""L'utilisateur a {ai_request.available_time} minutes disponibles et un niveau d'énergie {ai_request.energy_level}.
 Catégories récentes: {', '.join(recent_categories) if recent_categories else 'Aucune'}
 Catégorie préférée: {ai_request.preferred_category or 'Aucune'}
 
@@ -581,12 +790,11 @@ Format ta réponse en JSON avec:
 - "reasoning": explication courte (1 phrase) pourquoi c'est le meilleur choix
 - "alternatives": liste de 2 autres titres d'actions adaptées"""
 
-    try:
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        llm_started = time.perf_counter()
+        response = await llm_gateway.complete(SUGGESTION_SYSTEM_MESSAGE, prompt, kind="suggestions")
+        llm_seconds = time.perf_counter() - llm_started
         
         # Parse AI response
-        import json
         try:
             # Try to extract JSON from response
             json_start = response.find('{')
@@ -614,19 +822,106 @@ Format ta réponse en JSON avec:
                 if len(recommended_actions) >= 3:
                     break
         
-        return {
+        result = {
             "suggestion": ai_result.get("top_pick", available_actions[0]["title"]),
             "reasoning": ai_result.get("reasoning", "Cette action est parfaite pour le temps dont vous disposez."),
             "recommended_actions": recommended_actions[:3]
         }
+        suggestion_cache.put(cache_key, result, llm_seconds=llm_seconds)
+        return result
+
+    # Users with the same context at the same moment share one LLM call
+    llm_call = asyncio.ensure_future(
+        llm_flights.do(("suggestions",) + cache_key, generate, timeout=LLM_SUGGESTION_TIMEOUT_SECONDS)
+    )
+    # Nobody may await it (deadline passed, client gone): it still fills suggestion_cache
+    llm_call.add_done_callback(lambda t: t.cancelled() or t.exception())
+    suggestion_table = action_catalog.suggestion_table
+    if suggestion_table is not None:
+        # Precomputed per (duration bucket, energy, category, tier) cell
+        top = suggestion_table.lookup(
+            ai_request.available_time, ai_request.energy_level, ai_request.preferred_category, include_premium
+        )
+        rules = suggestion_response(top, ai_request.energy_level)
+    else:
+        rules = rule_based_suggestion(
+            available_actions, ai_request.available_time, ai_request.energy_level, ai_request.preferred_category
+        )
+    return None, rules, llm_call
+
+@api_router.post("/suggestions")
+async def get_ai_suggestions(
+    ai_request: AIRequest,
+    user: dict = Depends(get_current_principal)
+):
+    """Get AI-powered micro-action suggestions based on time and energy"""
+    immediate, rules, llm_call = await start_suggestion(ai_request, user)
+    if immediate is not None:
+        return immediate
+    
+    if SUGGESTION_DEADLINE_SECONDS > 0:
+        done, _ = await asyncio.wait({llm_call}, timeout=SUGGESTION_DEADLINE_SECONDS)
+        if not done:
+            return served_suggestion(rules, "rules")
+    
+    try:
+        return served_suggestion(await llm_call, "llm")
     except Exception as e:
-        logger.error(f"AI suggestion error: {e}")
+        logger.error(f"AI suggestion error: {e!r}")
         # Fallback to rule-based suggestion
-        return {
-            "suggestion": available_actions[0]["title"] if available_actions else "Respiration profonde",
-            "reasoning": "Basé sur vos préférences et le temps disponible.",
-            "recommended_actions": available_actions[:3]
-        }
+        return served_suggestion(rules, "fallback")
+
+@api_router.post("/suggestions/stream")
+async def stream_ai_suggestions(
+    ai_request: AIRequest,
+    user: dict = Depends(get_current_principal)
+):
+    """Server-Sent Events variant of /suggestions: provisional, delta and final events"""
+    immediate, rules, llm_call = await start_suggestion(ai_request, user)
+    
+    async def events():
+        if immediate is not None:
+            yield sse_event("final", immediate)
+            return
+        
+        yield sse_event("provisional", {**rules, "source": "rules"})
+        async for keep_alive in sse_wait(llm_call):
+            yield keep_alive
+        
+        try:
+            result = llm_call.result()
+        except Exception as e:
+            logger.error(f"AI suggestion error: {e!r}")
+            yield sse_event("final", served_suggestion(rules, "fallback"))
+            return
+        
+        for field in ("suggestion", "reasoning", "recommended_actions"):
+            yield sse_event("delta", {"field": field, "value": result[field]})
+        yield sse_event("final", served_suggestion(result, "llm"))
+    
+    return sse_response(events())
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {encode_json(data).decode()}\n\n"
+
+async def sse_wait(task: asyncio.Future):
+    """Yield SSE comments while `task` runs so proxies keep the stream open"""
+    while not task.done():
+        done, _ = await asyncio.wait({task}, timeout=SSE_KEEPALIVE_SECONDS)
+        if not done:
+            yield ": keep-alive\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def served_suggestion(response: dict, source: str) -> dict:
+    """Tag a /suggestions response with the path that produced it (llm, cache, rules, fallback, default)"""
+    suggestion_sources[source] = suggestion_sources.get(source, 0) + 1
+    return {**response, "source": source}
 
 # ============== SESSION TRACKING ROUTES ==============
 
@@ -636,7 +931,7 @@ async def start_session(
     user: dict = Depends(get_current_user)
 ):
     """Start a micro-action session"""
-    action = await db.micro_actions.find_one({"action_id": session_data.action_id}, {"_id": 0})
+    action = action_catalog.get(session_data.action_id)
     if not action:
         raise HTTPException(status_code=404, detail="Action not found")
     
@@ -671,121 +966,174 @@ async def complete_session(
     user: dict = Depends(get_current_user)
 ):
     """Complete a micro-action session and update stats"""
-    session = await db.user_sessions_history.find_one(
-        {"session_id": completion.session_id, "user_id": user["user_id"]},
-        {"_id": 0}
+    # Only an open session can be completed, so a retried request cannot count twice
+    completed_fields = {
+        "completed_at": datetime.now(timezone.utc).isoformat(),
+        "actual_duration": completion.actual_duration,
+        "completed": completion.completed,
+        "notes": completion.notes
+    }
+    session = await db.user_sessions_history.find_one_and_update(
+        {"session_id": completion.session_id, "user_id": user["user_id"], "completed": {"$ne": True}},
+        {"$set": completed_fields},
+        projection={"_id": 0}
     )
     
     if not session:
+        if await db.user_sessions_history.find_one(
+            {"session_id": completion.session_id, "user_id": user["user_id"]}, {"_id": 1}
+        ):
+            raise HTTPException(status_code=409, detail="Session already completed")
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Update session
-    await db.user_sessions_history.update_one(
-        {"session_id": completion.session_id},
-        {"$set": {
-            "completed_at": datetime.now(timezone.utc).isoformat(),
-            "actual_duration": completion.actual_duration,
-            "completed": completion.completed,
-            "notes": completion.notes
-        }}
-    )
-    
     if completion.completed:
-        # Update user stats
-        user_doc = await db.users.find_one({"user_id": user["user_id"]}, {"_id": 0})
-        
-        # Calculate streak
+        # Streak and total computed by the server in one atomic update
         today = datetime.now(timezone.utc).date()
-        last_session = user_doc.get("last_session_date")
-        
-        new_streak = user_doc.get("streak_days", 0)
-        if last_session:
-            if isinstance(last_session, str):
-                last_date = datetime.fromisoformat(last_session).date()
-            else:
-                last_date = last_session.date() if hasattr(last_session, 'date') else last_session
-            
-            if last_date == today - timedelta(days=1):
-                new_streak += 1
-            elif last_date != today:
-                new_streak = 1
-        else:
-            new_streak = 1
-        
-        await db.users.update_one(
+        user_doc = await db.users.find_one_and_update(
             {"user_id": user["user_id"]},
-            {
-                "$inc": {"total_time_invested": completion.actual_duration},
-                "$set": {
-                    "streak_days": new_streak,
-                    "last_session_date": today.isoformat()
-                }
-            }
+            session_completion_update(today, completion.actual_duration),
+            projection={"_id": 0, "password_hash": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        principal_cache.invalidate_user(user["user_id"])
+        day = completed_fields["completed_at"][:10]
+        prefix_owners = [user_owner(user["user_id"])]
+        if user_doc.get("company_id"):
+            prefix_owners.append(company_owner(user_doc["company_id"]))
+        stats, *_ = await asyncio.gather(
+            record_completion(
+                db, user["user_id"], session.get("category"), completion.actual_duration, user_doc.get("streak_days", 0)
+            ),
+            record_daily_activity(db, user["user_id"], day, session.get("category"), completion.actual_duration),
+            *[record_prefix_activity(db, owner, day, completion.actual_duration) for owner in prefix_owners]
         )
+        stats_cache.patch(user["user_id"], stats, {**session, **completed_fields})
         
         # Check for new badges
-        new_badges = await check_and_award_badges(user["user_id"])
+        new_badges = await check_and_award_badges(
+            user["user_id"], user_doc, stats, changed=completion_inputs(session.get("category"))
+        )
         
-        # Create notification for new badges
-        for badge in new_badges:
-            notification = {
-                "notification_id": f"notif_{uuid.uuid4().hex[:12]}",
-                "user_id": user["user_id"],
-                "type": "badge_earned",
-                "title": f"Nouveau badge : {badge['name']}",
-                "message": f"Félicitations ! Vous avez obtenu le badge {badge['name']}",
-                "icon": badge["icon"],
-                "read": False,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            await db.notifications.insert_one(notification)
+        # Create notifications for new badges
+        if new_badges:
+            await db.notifications.insert_many([
+                {
+                    "notification_id": f"notif_{uuid.uuid4().hex[:12]}",
+                    "user_id": user["user_id"],
+                    "type": "badge_earned",
+                    "title": f"Nouveau badge : {badge['name']}",
+                    "message": f"Félicitations ! Vous avez obtenu le badge {badge['name']}",
+                    "icon": badge["icon"],
+                    "read": False,
+                    "created_at": datetime.now(timezone.utc).isoformat()
+                }
+                for badge in new_badges
+            ])
         
         return {
             "message": "Session completed!",
             "time_added": completion.actual_duration,
-            "new_streak": new_streak,
-            "total_time": user_doc.get("total_time_invested", 0) + completion.actual_duration,
+            "new_streak": user_doc.get("streak_days", 0),
+            "total_time": user_doc.get("total_time_invested", 0),
             "new_badges": new_badges
         }
     
     return {"message": "Session recorded"}
 
+def session_completion_update(today, actual_duration: int) -> List[dict]:
+    """
+    Pipeline update for a completed session: +1 streak day if the last
+    session was yesterday, unchanged if today, otherwise back to 1.
+    """
+    last_day = {"$substr": [{"$ifNull": ["$last_session_date", ""]}, 0, 10]}
+    return [{"$set": {
+        "streak_days": {"$switch": {
+            "branches": [
+                {"case": {"$eq": [last_day, today.isoformat()]},
+                 "then": {"$ifNull": ["$streak_days", 0]}},
+                {"case": {"$eq": [last_day, (today - timedelta(days=1)).isoformat()]},
+                 "then": {"$add": [{"$ifNull": ["$streak_days", 0]}, 1]}},
+            ],
+            "default": 1
+        }},
+        "total_time_invested": {"$add": [{"$ifNull": ["$total_time_invested", 0]}, actual_duration]},
+        "total_sessions": {"$add": [{"$ifNull": ["$total_sessions", 0]}, 1]},
+        "last_session_date": today.isoformat()
+    }}]
+
 @api_router.get("/stats")
 async def get_user_stats(user: dict = Depends(get_current_user)):
     """Get user progress statistics"""
-    # Get sessions by category
-    pipeline = [
-        {"$match": {"user_id": user["user_id"], "completed": True}},
-        {"$group": {"_id": "$category", "count": {"$sum": 1}, "total_time": {"$sum": "$actual_duration"}}}
-    ]
-    category_stats = await db.user_sessions_history.aggregate(pipeline).to_list(10)
-    
-    sessions_by_category = {}
-    time_by_category = {}
-    for stat in category_stats:
-        sessions_by_category[stat["_id"]] = stat["count"]
-        time_by_category[stat["_id"]] = stat["total_time"]
-    
-    # Get recent sessions
-    recent = await db.user_sessions_history.find(
-        {"user_id": user["user_id"], "completed": True},
-        {"_id": 0}
-    ).sort("completed_at", -1).limit(10).to_list(10)
-    
-    # Get total sessions count
-    total_sessions = await db.user_sessions_history.count_documents(
-        {"user_id": user["user_id"], "completed": True}
-    )
+    cached = stats_cache.get(user["user_id"])
+    if cached is None:
+        read_marker = stats_cache.read_marker()
+        stats = await get_user_stats_doc(db, user["user_id"])
+        
+        # Get recent sessions
+        recent = await db.user_sessions_history.find(
+            {"user_id": user["user_id"], "completed": True},
+            {"_id": 0}
+        ).sort("completed_at", -1).limit(10).to_list(10)
+        stats_cache.put(user["user_id"], stats, recent, read_marker)
+    else:
+        stats, recent = cached["stats"], cached["recent_sessions"]
     
     return {
         "total_time_invested": user.get("total_time_invested", 0),
-        "total_sessions": total_sessions,
+        "total_sessions": stats["total_sessions"],
         "streak_days": user.get("streak_days", 0),
-        "sessions_by_category": sessions_by_category,
-        "time_by_category": time_by_category,
+        "longest_streak": stats["longest_streak"],
+        "sessions_by_category": stats["sessions_by_category"],
+        "time_by_category": stats["time_by_category"],
         "recent_sessions": recent
     }
 
+def parse_day_range(from_day: Optional[str], to_day: Optional[str]):
+    """from/to query parameters as dates; defaults to the last 30 days"""
+    try:
+        end = datetime.fromisoformat(to_day).date() if to_day else datetime.now(timezone.utc).date()
+        start = datetime.fromisoformat(from_day).date() if from_day else end - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from and to must be YYYY-MM-DD dates")
+    if start > end:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    return start, end
+
+@api_router.get("/stats/history")
+async def get_stats_history(
+    from_day: Optional[str] = Query(None, alias="from"),
+    to_day: Optional[str] = Query(None, alias="to"),
+    granularity: str = "day",
+    user: dict = Depends(get_current_user)
+):
+    """Sessions and minutes per day, week or month (default: the last 30 days)"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    start, end = parse_day_range(from_day, to_day)
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "granularity": granularity,
+        "points": await activity_history(db, user["user_id"], start, end, granularity)
+    }
+
+@api_router.get("/stats/range")
+async def get_stats_range(
+    from_day: Optional[str] = Query(None, alias="from"),
+    to_day: Optional[str] = Query(None, alias="to"),
+    user: dict = Depends(get_current_user)
+):
+    """Total minutes and sessions between two days (default: the last 30 days)"""
+    start, end = parse_day_range(from_day, to_day)
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        **await range_totals(db, user_owner(user["user_id"]), start, end)
+    }
+
 # ============== STRIPE PAYMENT ROUTES ==============
 
 SUBSCRIPTION_PRICE = 6.99  # EUR
@@ -845,6 +1193,7 @@ async def create_checkout(
 @api_router.get("/payments/status/{session_id}")
 async def get_payment_status(
     session_id: str,
+    response: Response,
     user: dict = Depends(get_current_user)
 ):
     """Check payment status and upgrade user if successful"""
@@ -885,17 +1234,27 @@ async def get_payment_status(
                         "subscription_started_at": datetime.now(timezone.utc).isoformat()
                     }}
                 )
+                principal_cache.invalidate_user(user["user_id"])
+                await check_and_award_badges(user["user_id"], changed=["subscription"])
                 await db.payment_transactions.update_one(
                     {"session_id": session_id},
                     {"$set": {"processed": True}}
                 )
         
-        return {
+        result = {
             "status": status.status,
             "payment_status": status.payment_status,
             "amount": status.amount_total / 100,  # Convert from cents
             "currency": status.currency
         }
+        
+        # Re-issue the JWT so embedded principal claims reflect the new tier;
+        # the cookie is read before the Authorization header, so replace it too
+        if status.payment_status == "paid" and JWT_EMBED_PRINCIPAL:
+            result["token"] = create_token(user["user_id"], {**user, "subscription_tier": "premium"})
+            set_session_cookie(response, result["token"])
+        
+        return result
     except Exception as e:
         logger.error(f"Payment status error: {e}")
         raise HTTPException(status_code=400, detail="Failed to get payment status")
@@ -927,6 +1286,8 @@ async def stripe_webhook(request: Request):
                     {"user_id": user_id},
                     {"$set": {"subscription_tier": "premium"}}
                 )
+                principal_cache.invalidate_user(user_id)
+                await check_and_award_badges(user_id, changed=["subscription"])
         
         return {"status": "ok"}
     except Exception as e:
@@ -935,7 +1296,7 @@ async def stripe_webhook(request: Request):
 
 # ============== SEED DATA ==============
 
-@api_router.post("/admin/seed")
+@api_router.post("/admin/seed", dependencies=[Depends(require_admin)])
 async def seed_micro_actions():
     """Seed database with initial micro-actions"""
     
@@ -1212,9 +1573,19 @@ async def seed_micro_actions():
     # Clear existing and insert new
     await db.micro_actions.delete_many({})
     await db.micro_actions.insert_many(actions)
+    await action_catalog.bump_version(db)
     
     return {"message": f"Seeded {len(actions)} micro-actions"}
 
+@api_router.put("/admin/actions/{action_id}", dependencies=[Depends(require_admin)])
+async def upsert_micro_action(action_id: str, action_data: MicroActionCreate):
+    """Add or edit a single micro-action"""
+    action = {"action_id": action_id, **action_data.model_dump()}
+    await db.micro_actions.update_one({"action_id": action_id}, {"$set": action}, upsert=True)
+    # Re-ranks only the suggestion table cells this action can appear in
+    await action_catalog.upsert_action(db, action)
+    return action
+
 # ============== GOOGLE CALENDAR INTEGRATION ==============
 
 from integrations.google_calendar import (
@@ -1225,7 +1596,7 @@ from integrations.google_calendar import (
 from integrations.encryption import encrypt_token, decrypt_token
 from services.slot_detector import detect_free_slots, match_action_to_slot, DEFAULT_SETTINGS
 from services.smart_notifications import (
-    schedule_slot_notifications, cleanup_old_slots, get_pending_notifications
+    schedule_slot_notifications, get_pending_notifications
 )
 
 class SlotSettings(BaseModel):
@@ -1281,7 +1652,7 @@ async def connect_google_calendar(request: Request, user: dict = Depends(get_cur
         "state": state,
         "user_id": user["user_id"],
         "created_at": datetime.now(timezone.utc).isoformat(),
-        "expires_at": (datetime.now(timezone.utc) + timedelta(minutes=10)).isoformat()
+        "expires_at": datetime.now(timezone.utc) + timedelta(minutes=10)
     })
     
     # Get redirect URI from request
@@ -1450,15 +1821,11 @@ async def sync_integration(
         # Detect free slots
         slots = await detect_free_slots(events, settings)
         
-        # Clean up old slots
-        await cleanup_old_slots(db, user["user_id"])
-        
-        # Get available actions
-        actions = await db.micro_actions.find({}, {"_id": 0}).to_list(50)
-        
-        # Schedule notifications for slots
+        # Schedule notifications for slots, matched against the catalog's prebuilt indexes
         await schedule_slot_notifications(
-            db, user["user_id"], slots, actions, user.get("subscription_tier", "free")
+            db, user["user_id"], slots, action_catalog.all(), user.get("subscription_tier", "free"),
+            duration_index=action_catalog.duration_index,
+            scoring_engine=action_catalog.scoring_engine
         )
         
         # Update last sync time
@@ -1481,7 +1848,7 @@ async def sync_integration(
 # ============== FREE SLOTS ENDPOINTS ==============
 
 @api_router.get("/slots/today")
-async def get_today_slots(user: dict = Depends(get_current_user)):
+async def get_today_slots(user: dict = Depends(get_current_principal)):
     """Get free slots for today."""
     now = datetime.now(timezone.utc)
     end_of_day = now.replace(hour=23, minute=59, second=59)
@@ -1494,16 +1861,12 @@ async def get_today_slots(user: dict = Depends(get_current_user)):
     # Enrich with action details
     for slot in slots:
         if slot.get("suggested_action_id"):
-            action = await db.micro_actions.find_one(
-                {"action_id": slot["suggested_action_id"]},
-                {"_id": 0}
-            )
-            slot["suggested_action"] = action
+            slot["suggested_action"] = action_catalog.get(slot["suggested_action_id"])
     
     return {"slots": slots, "count": len(slots)}
 
 @api_router.get("/slots/week")
-async def get_week_slots(user: dict = Depends(get_current_user)):
+async def get_week_slots(user: dict = Depends(get_current_principal)):
     """Get free slots for the week."""
     now = datetime.now(timezone.utc)
     week_end = now + timedelta(days=7)
@@ -1516,7 +1879,7 @@ async def get_week_slots(user: dict = Depends(get_current_user)):
     return {"slots": slots, "count": len(slots)}
 
 @api_router.get("/slots/next")
-async def get_next_slot(user: dict = Depends(get_current_user)):
+async def get_next_slot(user: dict = Depends(get_current_principal)):
     """Get the next upcoming free slot."""
     now = datetime.now(timezone.utc)
     
@@ -1527,16 +1890,12 @@ async def get_next_slot(user: dict = Depends(get_current_user)):
     }, {"_id": 0}, sort=[("start_time", 1)])
     
     if slot and slot.get("suggested_action_id"):
-        action = await db.micro_actions.find_one(
-            {"action_id": slot["suggested_action_id"]},
-            {"_id": 0}
-        )
-        slot["suggested_action"] = action
+        slot["suggested_action"] = action_catalog.get(slot["suggested_action_id"])
     
     return {"slot": slot}
 
 @api_router.post("/slots/{slot_id}/dismiss")
-async def dismiss_slot(slot_id: str, user: dict = Depends(get_current_user)):
+async def dismiss_slot(slot_id: str, user: dict = Depends(get_current_principal)):
     """Dismiss/ignore a slot."""
     result = await db.detected_free_slots.update_one(
         {"slot_id": slot_id, "user_id": user["user_id"]},
@@ -1549,7 +1908,7 @@ async def dismiss_slot(slot_id: str, user: dict = Depends(get_current_user)):
     return {"message": "Slot dismissed"}
 
 @api_router.get("/slots/settings")
-async def get_slot_settings(user: dict = Depends(get_current_user)):
+async def get_slot_settings(user: dict = Depends(get_current_principal)):
     """Get user's slot detection settings."""
     prefs = await db.notification_preferences.find_one(
         {"user_id": user["user_id"]},
@@ -1568,7 +1927,7 @@ async def get_slot_settings(user: dict = Depends(get_current_user)):
 @api_router.put("/slots/settings")
 async def update_slot_settings(
     settings: SlotSettings,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_principal)
 ):
     """Update user's slot detection settings."""
     settings_dict = settings.model_dump()
@@ -1583,179 +1942,59 @@ async def update_slot_settings(
 
 # ============== BADGES & ACHIEVEMENTS ==============
 
-BADGES = [
-    {
-        "badge_id": "first_action",
-        "name": "Premier Pas",
-        "description": "Complétez votre première micro-action",
-        "icon": "rocket",
-        "condition": {"type": "sessions_completed", "value": 1}
-    },
-    {
-        "badge_id": "streak_3",
-        "name": "Régularité",
-        "description": "Maintenez un streak de 3 jours",
-        "icon": "flame",
-        "condition": {"type": "streak_days", "value": 3}
-    },
-    {
-        "badge_id": "streak_7",
-        "name": "Semaine Parfaite",
-        "description": "Maintenez un streak de 7 jours",
-        "icon": "star",
-        "condition": {"type": "streak_days", "value": 7}
-    },
-    {
-        "badge_id": "streak_30",
-        "name": "Mois d'Or",
-        "description": "Maintenez un streak de 30 jours",
-        "icon": "crown",
-        "condition": {"type": "streak_days", "value": 30}
-    },
-    {
-        "badge_id": "time_60",
-        "name": "Première Heure",
-        "description": "Accumulez 60 minutes de micro-actions",
-        "icon": "clock",
-        "condition": {"type": "total_time", "value": 60}
-    },
-    {
-        "badge_id": "time_300",
-        "name": "5 Heures",
-        "description": "Accumulez 5 heures de micro-actions",
-        "icon": "timer",
-        "condition": {"type": "total_time", "value": 300}
-    },
-    {
-        "badge_id": "time_600",
-        "name": "10 Heures",
-        "description": "Accumulez 10 heures de micro-actions",
-        "icon": "trophy",
-        "condition": {"type": "total_time", "value": 600}
-    },
-    {
-        "badge_id": "category_learning",
-        "name": "Apprenant",
-        "description": "Complétez 10 actions d'apprentissage",
-        "icon": "book-open",
-        "condition": {"type": "category_sessions", "category": "learning", "value": 10}
-    },
-    {
-        "badge_id": "category_productivity",
-        "name": "Productif",
-        "description": "Complétez 10 actions de productivité",
-        "icon": "target",
-        "condition": {"type": "category_sessions", "category": "productivity", "value": 10}
-    },
-    {
-        "badge_id": "category_wellbeing",
-        "name": "Zen Master",
-        "description": "Complétez 10 actions de bien-être",
-        "icon": "heart",
-        "condition": {"type": "category_sessions", "category": "well_being", "value": 10}
-    },
-    {
-        "badge_id": "all_categories",
-        "name": "Équilibre",
-        "description": "Complétez au moins 5 actions dans chaque catégorie",
-        "icon": "sparkles",
-        "condition": {"type": "all_categories", "value": 5}
-    },
-    {
-        "badge_id": "premium",
-        "name": "Investisseur",
-        "description": "Passez à Premium",
-        "icon": "gem",
-        "condition": {"type": "subscription", "value": "premium"}
-    }
-]
-
-async def check_and_award_badges(user_id: str) -> List[dict]:
-    """Check user progress and award new badges"""
-    user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+async def check_and_award_badges(
+    user_id: str,
+    user: Optional[dict] = None,
+    stats: Optional[dict] = None,
+    changed: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    Award the badges whose condition now holds.
+    
+    `user` and `stats` skip their reads when already fetched; `changed`
+    limits evaluation to the rules of those inputs (all rules if None).
+    """
+    if user is None:
+        user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
     if not user:
         return []
+    if stats is None:
+        stats = await get_user_stats_doc(db, user_id)
     
-    # Get user's current badges
-    user_badges = user.get("badges", [])
-    user_badge_ids = [b["badge_id"] for b in user_badges]
-    
-    # Get session stats
-    total_sessions = await db.user_sessions_history.count_documents(
-        {"user_id": user_id, "completed": True}
-    )
-    
-    # Get category stats
-    pipeline = [
-        {"$match": {"user_id": user_id, "completed": True}},
-        {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+    user_badge_ids = [b["badge_id"] for b in user.get("badges", [])]
+    new_badges = [
+        badge_award(badge)
+        for badge in BADGE_INDEX.evaluate(badge_inputs(user, stats), user_badge_ids, changed)
     ]
-    category_stats = await db.user_sessions_history.aggregate(pipeline).to_list(10)
-    category_counts = {stat["_id"]: stat["count"] for stat in category_stats}
     
-    new_badges = []
-    
-    for badge in BADGES:
-        if badge["badge_id"] in user_badge_ids:
-            continue
-        
-        condition = badge["condition"]
-        earned = False
-        
-        if condition["type"] == "sessions_completed":
-            earned = total_sessions >= condition["value"]
-        elif condition["type"] == "streak_days":
-            earned = user.get("streak_days", 0) >= condition["value"]
-        elif condition["type"] == "total_time":
-            earned = user.get("total_time_invested", 0) >= condition["value"]
-        elif condition["type"] == "category_sessions":
-            earned = category_counts.get(condition["category"], 0) >= condition["value"]
-        elif condition["type"] == "all_categories":
-            earned = all(
-                category_counts.get(cat, 0) >= condition["value"]
-                for cat in ["learning", "productivity", "well_being"]
-            )
-        elif condition["type"] == "subscription":
-            earned = user.get("subscription_tier") == condition["value"]
-        
-        if earned:
-            badge_award = {
-                "badge_id": badge["badge_id"],
-                "name": badge["name"],
-                "icon": badge["icon"],
-                "earned_at": datetime.now(timezone.utc).isoformat()
-            }
-            new_badges.append(badge_award)
-    
-    # Update user with new badges
+    # Update user with new badges; a concurrent call that already awarded one wins it
     if new_badges:
-        await db.users.update_one(
-            {"user_id": user_id},
-            {"$push": {"badges": {"$each": new_badges}}}
-        )
+        new_badges = await push_badges(db, user_id, new_badges)
+        if new_badges:
+            principal_cache.invalidate_user(user_id)
     
     return new_badges
 
+BADGES_ETAG = f'"badges-{hashlib.sha256(json.dumps(BADGES, sort_keys=True).encode()).hexdigest()[:16]}"'
+BADGES_BODY = encode_json(BADGES)
+
 @api_router.get("/badges")
-async def get_all_badges():
+async def get_all_badges(request: Request):
     """Get all available badges"""
-    return BADGES
+    if etag_matches(request, BADGES_ETAG):
+        return not_modified(BADGES_ETAG, CATALOG_CACHE_CONTROL)
+    return encoded_json_response(BADGES_BODY, BADGES_ETAG, CATALOG_CACHE_CONTROL)
 
 @api_router.get("/badges/user")
 async def get_user_badges(user: dict = Depends(get_current_user)):
-    """Get user's earned badges"""
-    user_badges = user.get("badges", [])
-    
-    # Check for new badges
-    new_badges = await check_and_award_badges(user["user_id"])
-    
-    all_earned = user_badges + new_badges
+    """Get user's earned badges (awarded when their inputs change, never here)"""
+    earned = user.get("badges", [])
     
     return {
-        "earned": all_earned,
-        "new_badges": new_badges,
+        "earned": earned,
+        "new_badges": [],
         "total_available": len(BADGES),
-        "total_earned": len(all_earned)
+        "total_earned": len(earned)
     }
 
 # ============== NOTIFICATIONS ==============
@@ -1910,9 +2149,11 @@ async def create_company(
         {"user_id": user["user_id"]},
         {"$set": {
             "company_id": company_id,
+            "company_joined_at": company_doc["created_at"],
             "is_company_admin": True
         }}
     )
+    principal_cache.invalidate_user(user["user_id"])
     
     return {"company_id": company_id, "name": company_data.name}
 
@@ -1934,68 +2175,34 @@ async def get_company(user: dict = Depends(get_current_user)):
     return company
 
 @api_router.get("/b2b/dashboard")
-async def get_b2b_dashboard(user: dict = Depends(get_current_user)):
-    """Get B2B analytics dashboard (anonymized QVT data)"""
+async def get_b2b_dashboard(days: Optional[int] = None, user: dict = Depends(get_current_user)):
+    """Get B2B analytics dashboard (anonymized QVT data), over the last `days` days or all time"""
     company_id = user.get("company_id")
     
     if not company_id or not user.get("is_company_admin"):
         raise HTTPException(status_code=403, detail="Admin access required")
+    if days is not None and days < 1:
+        raise HTTPException(status_code=400, detail="days must be positive")
     
     company = await db.companies.find_one(
         {"company_id": company_id},
-        {"_id": 0}
+        {"_id": 0, "name": 1}
     )
     
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    employee_ids = company.get("employees", [])
+    employee_ids = await company_member_ids(db, company_id)
     
-    # Aggregate anonymized stats
-    total_sessions = await db.user_sessions_history.count_documents(
-        {"user_id": {"$in": employee_ids}, "completed": True}
-    )
-    
-    total_time_pipeline = [
-        {"$match": {"user_id": {"$in": employee_ids}, "completed": True}},
-        {"$group": {"_id": None, "total": {"$sum": "$actual_duration"}}}
-    ]
-    total_time_result = await db.user_sessions_history.aggregate(total_time_pipeline).to_list(1)
-    total_time = total_time_result[0]["total"] if total_time_result else 0
-    
-    # Category distribution
-    category_pipeline = [
-        {"$match": {"user_id": {"$in": employee_ids}, "completed": True}},
-        {"$group": {"_id": "$category", "count": {"$sum": 1}, "time": {"$sum": "$actual_duration"}}}
-    ]
-    category_stats = await db.user_sessions_history.aggregate(category_pipeline).to_list(10)
-    
-    # Weekly activity (last 4 weeks)
-    four_weeks_ago = (datetime.now(timezone.utc) - timedelta(days=28)).isoformat()
-    weekly_pipeline = [
-        {"$match": {
-            "user_id": {"$in": employee_ids},
-            "completed": True,
-            "completed_at": {"$gte": four_weeks_ago}
-        }},
-        {"$group": {
-            "_id": {"$substr": ["$completed_at", 0, 10]},
-            "sessions": {"$sum": 1},
-            "time": {"$sum": "$actual_duration"}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    daily_activity = await db.user_sessions_history.aggregate(weekly_pipeline).to_list(28)
+    # Aggregate anonymized stats in a single pass over the sessions
+    now = datetime.now(timezone.utc)
+    query_started = time.perf_counter()
+    stats = await company_dashboard(db, employee_ids, now, now - timedelta(days=days) if days else None)
+    query_ms = round((time.perf_counter() - query_started) * 1000, 1)
     
-    # Active employees (used app this week)
-    one_week_ago = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
-    active_employees = await db.user_sessions_history.distinct(
-        "user_id",
-        {
-            "user_id": {"$in": employee_ids},
-            "completed_at": {"$gte": one_week_ago}
-        }
-    )
+    total_sessions = stats["total_sessions"]
+    total_time = stats["total_time"]
+    active_employees = stats["active_employees"]
     
     # Average per employee
     avg_time_per_employee = total_time / len(employee_ids) if employee_ids else 0
@@ -2004,18 +2211,39 @@ async def get_b2b_dashboard(user: dict = Depends(get_current_user)):
     return {
         "company_name": company["name"],
         "employee_count": len(employee_ids),
-        "active_employees_this_week": len(active_employees),
-        "engagement_rate": round(len(active_employees) / len(employee_ids) * 100, 1) if employee_ids else 0,
+        "active_employees_this_week": active_employees,
+        "engagement_rate": round(active_employees / len(employee_ids) * 100, 1) if employee_ids else 0,
         "total_sessions": total_sessions,
         "total_time_minutes": total_time,
         "avg_time_per_employee": round(avg_time_per_employee, 1),
         "avg_sessions_per_employee": round(avg_sessions_per_employee, 1),
         "category_distribution": {
             stat["_id"]: {"sessions": stat["count"], "time": stat["time"]}
-            for stat in category_stats
+            for stat in stats["category_stats"]
         },
-        "daily_activity": daily_activity,
-        "qvt_score": min(100, round(len(active_employees) / len(employee_ids) * 100 + (total_time / len(employee_ids) / 10) if employee_ids else 0, 1))
+        "daily_activity": stats["daily_activity"],
+        "qvt_score": min(100, round(active_employees / len(employee_ids) * 100 + (total_time / len(employee_ids) / 10) if employee_ids else 0, 1)),
+        "period_days": days,
+        "query_ms": query_ms
+    }
+
+@api_router.get("/b2b/range")
+async def get_b2b_range(
+    from_day: Optional[str] = Query(None, alias="from"),
+    to_day: Optional[str] = Query(None, alias="to"),
+    user: dict = Depends(get_current_user)
+):
+    """Total minutes and sessions of the company's employees between two days"""
+    company_id = user.get("company_id")
+    
+    if not company_id or not user.get("is_company_admin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    start, end = parse_day_range(from_day, to_day)
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        **await range_totals(db, company_owner(company_id), start, end)
     }
 
 @api_router.post("/b2b/invite")
@@ -2050,7 +2278,7 @@ async def invite_employee(
         "email": invite.email,
         "status": "pending",
         "created_at": datetime.now(timezone.utc).isoformat(),
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+        "expires_at": datetime.now(timezone.utc) + timedelta(days=7)
     }
     
     await db.company_invites.insert_one(invite_doc)
@@ -2058,38 +2286,29 @@ async def invite_employee(
     return {"invite_id": invite_id, "email": invite.email, "status": "pending"}
 
 @api_router.get("/b2b/employees")
-async def get_employees(user: dict = Depends(get_current_user)):
-    """Get list of company employees (anonymized for privacy)"""
+async def get_employees(
+    sort: str = "total_time",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """Get list of company employees (anonymized for privacy), best first, one page at a time"""
     company_id = user.get("company_id")
     
     if not company_id or not user.get("is_company_admin"):
         raise HTTPException(status_code=403, detail="Admin access required")
+    if sort not in EMPLOYEE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(EMPLOYEE_SORTS)}")
     
-    company = await db.companies.find_one(
-        {"company_id": company_id},
-        {"_id": 0}
-    )
-    
-    employee_ids = company.get("employees", [])
-    
-    # Get anonymized employee stats
-    employees = []
-    for i, emp_id in enumerate(employee_ids):
-        emp = await db.users.find_one({"user_id": emp_id}, {"_id": 0})
-        if emp:
-            sessions = await db.user_sessions_history.count_documents(
-                {"user_id": emp_id, "completed": True}
-            )
-            employees.append({
-                "employee_number": i + 1,
-                "name": emp.get("name", "Collaborateur"),
-                "total_time": emp.get("total_time_invested", 0),
-                "streak_days": emp.get("streak_days", 0),
-                "total_sessions": sessions,
-                "is_admin": emp_id == user["user_id"]
-            })
+    try:
+        page, total = await asyncio.gather(
+            employee_page(db, company_id, user["user_id"], sort, max(1, min(limit, MAX_PAGE_SIZE)), cursor),
+            db.users.count_documents({"company_id": company_id})
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    return {"employees": employees, "total": len(employees)}
+    return {**page, "total": total}
 
 # ============== REFLECTIONS / JOURNAL ==============
 
@@ -2177,13 +2396,21 @@ async def delete_reflection(
     
     return {"message": "Reflection deleted"}
 
-@api_router.get("/reflections/summary")
-async def get_reflections_summary(user: dict = Depends(get_current_user)):
-    """Generate AI-powered weekly summary of reflections"""
-    from emergentintegrations.llm.chat import LlmChat, UserMessage
+SUMMARY_SYSTEM_MESSAGE = """Tu es le compagnon cognitif InFinea. Ton rôle est d'analyser les réflexions 
+de l'utilisateur et de fournir un résumé personnalisé, bienveillant et perspicace.
+Tu dois identifier les patterns, les progrès et suggérer des axes d'amélioration.
+Réponds toujours en français, de manière empathique et constructive."""
+
+async def start_reflections_summary(user: dict):
+    """
+    Shared first half of /reflections/summary and its streaming variant.
     
-    api_key = os.environ.get('EMERGENT_LLM_KEY')
-    if not api_key:
+    Returns (immediate, provisional, llm_call): `immediate` is a finished
+    response when there is nothing to summarize; otherwise `provisional` is
+    a summary computed locally from moods and sessions and `llm_call` the
+    in-flight LLM summary.
+    """
+    if not llm_gateway.configured:
         raise HTTPException(status_code=500, detail="AI service not configured")
     
     # Get reflections from the last 4 weeks
@@ -2199,7 +2426,7 @@ async def get_reflections_summary(user: dict = Depends(get_current_user)):
             "summary": None,
             "message": "Pas encore assez de réflexions pour générer un résumé. Commencez à noter vos pensées!",
             "reflection_count": 0
-        }
+        }, None, None
     
     # Get sessions data for context
     sessions = await db.user_sessions_history.find(
@@ -2221,17 +2448,8 @@ async def get_reflections_summary(user: dict = Depends(get_current_user)):
         category_counts[cat] = category_counts.get(cat, 0) + 1
         total_time += s.get("actual_duration", 0)
     
-    chat = LlmChat(
-        api_key=api_key,
-        session_id=f"summary_{user['user_id']}_{datetime.now().timestamp()}",
-        system_message="""Tu es le compagnon cognitif InFinea. Ton rôle est d'analyser les réflexions 
-de l'utilisateur et de fournir un résumé personnalisé, bienveillant et perspicace.
-Tu dois identifier les patterns, les progrès et suggérer des axes d'amélioration.
-Réponds toujours en français, de manière empathique et constructive."""
-    )
-    chat.with_model("openai", "gpt-5.2")
-    
-    prompt = f"""Analyse les réflexions suivantes de l'utilisateur sur les 4 dernières semaines:
+    async def generate():
+        prompt = f"""Analyse les réflexions suivantes de l'utilisateur sur les 4 dernières semaines:
 
 {reflections_text}
 
@@ -2248,11 +2466,8 @@ Génère un résumé structuré en JSON avec:
 - "personalized_tip": Un conseil personnalisé basé sur les réflexions
 - "mood_trend": Tendance générale de l'humeur (positive, stable, en progression, à surveiller)"""
 
-    try:
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        response = await llm_gateway.complete(SUMMARY_SYSTEM_MESSAGE, prompt, kind="reflections_summary")
         
-        import json
         try:
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
@@ -2295,11 +2510,97 @@ Génère un résumé structuré en JSON avec:
             "session_count": len(sessions),
             "total_time": total_time
         }
-        
+
+    # A double-click generates (and stores) one summary, not two
+    llm_call = asyncio.ensure_future(
+        llm_flights.do(("reflections_summary", user["user_id"]), generate, timeout=LLM_SUMMARY_TIMEOUT_SECONDS)
+    )
+    llm_call.add_done_callback(lambda t: t.cancelled() or t.exception())
+    provisional = {
+        "summary": local_reflection_summary(reflections, len(sessions), category_counts, total_time),
+        "reflection_count": len(reflections),
+        "session_count": len(sessions),
+        "total_time": total_time
+    }
+    return None, provisional, llm_call
+
+def local_reflection_summary(
+    reflections: List[dict],
+    session_count: int,
+    category_counts: Dict[str, int],
+    total_time: int
+) -> dict:
+    """Summary with the LLM's shape, built from mood and session counts only"""
+    moods = [r.get("mood") or "neutral" for r in reflections]
+    half = len(moods) // 2
+    
+    def positive_share(items):
+        return sum(1 for m in items if m == "positive") / len(items) if items else 0
+    
+    recent = moods[half:]
+    if sum(1 for m in recent if m == "negative") > len(recent) / 2:
+        mood_trend = "à surveiller"
+    elif half and positive_share(recent) > positive_share(moods[:half]):
+        mood_trend = "en progression"
+    elif positive_share(moods) > 0.5:
+        mood_trend = "positive"
+    else:
+        mood_trend = "stable"
+    
+    patterns = []
+    if category_counts:
+        top_category, top_count = max(category_counts.items(), key=lambda item: item[1])
+        patterns.append(f"Catégorie la plus pratiquée : {top_category} ({top_count} sessions)")
+    
+    return {
+        "weekly_insight": f"{len(reflections)} réflexions et {session_count} sessions ({total_time} min) sur les 4 dernières semaines.",
+        "patterns_identified": patterns,
+        "strengths": [],
+        "areas_for_growth": [],
+        "personalized_tip": "",
+        "mood_trend": mood_trend
+    }
+
+@api_router.get("/reflections/summary")
+async def get_reflections_summary(user: dict = Depends(get_current_user)):
+    """Generate AI-powered weekly summary of reflections"""
+    immediate, _, llm_call = await start_reflections_summary(user)
+    if immediate is not None:
+        return immediate
+    
+    try:
+        return await llm_call
     except Exception as e:
-        logger.error(f"Summary generation error: {e}")
+        logger.error(f"Summary generation error: {e!r}")
         raise HTTPException(status_code=500, detail="Erreur lors de la génération du résumé")
 
+@api_router.get("/reflections/summary/stream")
+async def stream_reflections_summary(user: dict = Depends(get_current_user)):
+    """Server-Sent Events variant of /reflections/summary: provisional, delta and final events"""
+    immediate, provisional, llm_call = await start_reflections_summary(user)
+    
+    async def events():
+        if immediate is not None:
+            yield sse_event("final", immediate)
+            return
+        
+        yield sse_event("provisional", provisional)
+        async for keep_alive in sse_wait(llm_call):
+            yield keep_alive
+        
+        try:
+            result = llm_call.result()
+        except Exception as e:
+            logger.error(f"Summary generation error: {e!r}")
+            yield sse_event("error", {"detail": "Erreur lors de la génération du résumé"})
+            return
+        
+        for field, value in result["summary"].items():
+            yield sse_event("delta", {"field": field, "value": value})
+        yield sse_event("final", result)
+    
+    return sse_response(events())
+
 @api_router.get("/reflections/summaries")
 async def get_past_summaries(
     user: dict = Depends(get_current_user),
@@ -2313,6 +2614,29 @@ async def get_past_summaries(
     
     return {"summaries": summaries}
 
+# ============== CACHE METRICS ==============
+
+@api_router.get("/admin/cache-stats", dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    """Hit/miss counters of the in-process caches"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "action_catalog": {"version": action_catalog.version, "size": len(action_catalog)},
+        "suggestion_table": action_catalog.suggestion_table.stats() if action_catalog.suggestion_table else None,
+        "encoded_responses": encoded_responses.stats(),
+        "suggestion_cache": suggestion_cache.stats(),
+        "stats_cache": stats_cache.stats(),
+        "llm_single_flight": llm_flights.stats(),
+        "llm_gateway": llm_gateway.stats(),
+        "event_loop_lag": loop_monitor.stats(),
+        "suggestion_sources": suggestion_sources,
+    }
+
+@api_router.get("/admin/metrics", dependencies=[Depends(require_admin)])
+async def get_metrics():
+    """Cache counters in the Prometheus text format"""
+    return Response(content=stats_cache.prometheus(), media_type="text/plain; version=0.0.4")
+
 # ============== ROOT ROUTE ==============
 
 @api_router.get("/")
@@ -2334,13 +2658,35 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    """Auto-seed the database if empty"""
+    """Ensure indexes, migrate, then auto-seed the database if empty"""
+    global migration_task
+    await ensure_indexes(db, strict=DB_INDEXES_STRICT)
+    await run_migrations(db, background=False)
+    if MIGRATIONS_IN_BACKGROUND:
+        migration_task = asyncio.create_task(run_background_migrations(db))
+    
     count = await db.micro_actions.count_documents({})
     if count == 0:
         logger.info("Database empty, seeding micro-actions...")
         await seed_micro_actions()
         logger.info("Database seeded successfully!")
+    else:
+        await action_catalog.load(db)
+    action_catalog.start_polling(db, CATALOG_POLL_SECONDS)
+    
+    if not llm_gateway.configured:
+        llm_gateway.set_provider(
+            create_llm_provider(LLM_PROVIDER, os.environ.get('EMERGENT_LLM_KEY'), **LLM_FAKE_OPTIONS)
+        )
+    loop_monitor.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if migration_task:
+        migration_task.cancel()
+        await asyncio.gather(migration_task, return_exceptions=True)
+    action_catalog.stop_polling()
+    loop_monitor.stop()
+    await llm_gateway.close()
     client.close()
+    password_hasher.shutdown()
@@ -14,11 +14,14 @@ from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
 import json
 import re
 import urllib.parse
 
+from services.password_hasher import PasswordHasher, HasherBusyError
+from services.suggestion_ranking import rule_based_suggestion, suggestion_response
+from services.scoring_engine import build_scoring_engine
+
 ROOT_DIR = Path(__file__).parent
 
 # MongoDB en memoire (mongomock)
@@ -30,6 +33,13 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'infinea-local-secret-key-2024')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 168  # 7 days
 
+# bcrypt runs on a bounded worker pool, off the event loop
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+    max_workers=int(os.environ.get('BCRYPT_MAX_WORKERS', '2')),
+    max_pending=int(os.environ.get('BCRYPT_MAX_PENDING', '32')),
+)
+
 # Create the main app
 app = FastAPI(title="InFinea API - Local")
 api_router = APIRouter(prefix="/api")
@@ -178,11 +188,17 @@ def get_current_user_sync(request: Request) -> dict:
 
     return user
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+async def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
 # ============== AUTH ROUTES ==============
 
@@ -197,7 +213,7 @@ async def register(user_data: UserCreate, response: Response):
         "user_id": user_id,
         "email": user_data.email,
         "name": user_data.name,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password(user_data.password),
         "picture": None,
         "subscription_tier": "free",
         "total_time_invested": 0,
@@ -249,9 +265,16 @@ async def login(user_data: UserLogin, response: Response):
     if "password_hash" not in user:
         raise HTTPException(status_code=401, detail="Please login with Google")
 
-    if not verify_password(user_data.password, user["password_hash"]):
+    if not await verify_password(user_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # Transparently upgrade hashes made with a different cost factor
+    if password_hasher.needs_rehash(user["password_hash"]):
+        db.users.update_one(
+            {"user_id": user["user_id"]},
+            {"$set": {"password_hash": await hash_password(user_data.password)}}
+        )
+
     token = create_token(user["user_id"])
     response.set_cookie(
         key="session_token",
@@ -483,11 +506,29 @@ async def get_action(action_id: str):
 
 # ============== AI SUGGESTIONS ROUTE ==============
 
+# Vectorized ranking of the catalog (None without numpy), rebuilt by the seed
+scoring_engine = None
+
+def refresh_scoring_engine():
+    global scoring_engine
+    scoring_engine = build_scoring_engine(list(db.micro_actions.find({}, {"_id": 0})))
+
 @api_router.post("/suggestions")
 async def get_ai_suggestions(ai_request: AIRequest, request: Request):
     """Get AI-powered micro-action suggestions - local fallback version"""
     user = get_current_user_sync(request)
 
+    if scoring_engine is not None:
+        # Same eligibility as the first query below, ranked in one vectorized pass
+        top = scoring_engine.top_k(
+            ai_request.available_time, ai_request.energy_level, ai_request.preferred_category, k=3,
+            include_premium=user.get("subscription_tier") != "free",
+            require_category=True, require_energy=True
+        )
+        if top:
+            return {**suggestion_response(top, ai_request.energy_level), "source": "rules"}
+
+    # Broadened searches include actions longer than available_time, which the engine never ranks
     query = {"duration_min": {"$lte": ai_request.available_time}}
     if ai_request.preferred_category:
         query["category"] = ai_request.preferred_category
@@ -519,41 +560,10 @@ async def get_ai_suggestions(ai_request: AIRequest, request: Request):
         }
 
     # Smart rule-based suggestions (no AI needed)
-    energy_map = {"low": 1, "medium": 2, "high": 3}
-    user_energy = energy_map.get(ai_request.energy_level, 2)
-
-    def score_action(action):
-        s = 0
-        # Time fit
-        if action["duration_min"] <= ai_request.available_time <= action["duration_max"]:
-            s += 10
-        elif action["duration_min"] <= ai_request.available_time:
-            s += 5
-        # Energy match
-        action_energy = energy_map.get(action["energy_level"], 2)
-        if action_energy == user_energy:
-            s += 8
-        elif abs(action_energy - user_energy) == 1:
-            s += 4
-        # Category preference
-        if ai_request.preferred_category and action["category"] == ai_request.preferred_category:
-            s += 6
-        return s
-
-    scored = sorted(available_actions, key=score_action, reverse=True)
-    top = scored[:3]
-
-    reasoning_map = {
-        "low": "Parfait pour un moment de calme. Cette action demande peu d'effort.",
-        "medium": "Un bon equilibre entre effort et detente pour ce moment.",
-        "high": "Vous avez l'energie, profitons-en pour une action dynamique !"
-    }
-
-    return {
-        "suggestion": top[0]["title"] if top else "Respiration profonde",
-        "reasoning": reasoning_map.get(ai_request.energy_level, "Basee sur vos preferences et le temps disponible."),
-        "recommended_actions": top
-    }
+    suggestion = rule_based_suggestion(
+        available_actions, ai_request.available_time, ai_request.energy_level, ai_request.preferred_category
+    )
+    return {**suggestion, "source": "rules"}
 
 # ============== SESSION TRACKING ROUTES ==============
 
@@ -1086,6 +1096,7 @@ async def seed_micro_actions():
     db.micro_actions.delete_many({})
     for action in actions:
         db.micro_actions.insert_one(action)
+    refresh_scoring_engine()
 
     return {"message": f"Seeded {len(actions)} micro-actions"}
 
@@ -0,0 +1,195 @@
+"""
+Micro-Action Catalog Service for InFinea.
+Process-local, indexed copy of the micro_actions collection so catalog reads need no DB round-trip.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+from pymongo import ReturnDocument
+
+from .duration_index import DurationIndex
+from .scoring_engine import build_scoring_engine
+from .suggestion_table import SuggestionTable
+
+logger = logging.getLogger(__name__)
+
+CATALOG_META_ID = "micro_actions"
+
+
+class ActionCatalog:
+    """
+    In-memory micro-action catalog with secondary indexes.
+
+    The catalog is loaded at startup and reloaded whenever the version in
+    `catalog_meta` changes (bumped by the seed endpoint). Returned action
+    dicts are shared: callers must treat them as read-only.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._actions: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_category: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_energy: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_premium: Dict[bool, List[Dict[str, Any]]] = {}
+        self.duration_index = DurationIndex([])
+        self.scoring_engine = build_scoring_engine([])
+        self.suggestion_table: Optional[SuggestionTable] = None
+        self._digest = ""
+        self._poll_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._actions)
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag for catalog responses: version plus content digest."""
+        return f'"catalog-v{self.version}-{self._digest}"'
+
+    # ---------- loading ----------
+
+    async def load(self, db):
+        """Load every action and the current catalog version from the database."""
+        meta = await db.catalog_meta.find_one({"_id": CATALOG_META_ID}) or {}
+        actions = await db.micro_actions.find({}, {"_id": 0}).to_list(None)
+        self._build(actions)
+        self.version = meta.get("version", 0)
+        logger.info(f"Action catalog v{self.version} loaded ({len(actions)} actions)")
+
+    async def refresh_if_changed(self, db) -> bool:
+        """Reload when another process bumped the catalog version."""
+        meta = await db.catalog_meta.find_one({"_id": CATALOG_META_ID}) or {}
+        if meta.get("version", 0) == self.version:
+            return False
+        await self.load(db)
+        return True
+
+    async def bump_version(self, db):
+        """Record a catalog change and reload this process's copy."""
+        await db.catalog_meta.update_one(
+            {"_id": CATALOG_META_ID},
+            {"$inc": {"version": 1}},
+            upsert=True
+        )
+        await self.load(db)
+
+    async def upsert_action(self, db, action: Dict[str, Any]):
+        """
+        Apply one added or edited action (already written to micro_actions)
+        without a full reload; only the affected suggestion table cells are
+        re-ranked. Other processes pick the change up through the version.
+        """
+        meta = await db.catalog_meta.find_one_and_update(
+            {"_id": CATALOG_META_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        old = self._by_id.get(action["action_id"])
+        actions = list(self._actions)
+        if old is None:
+            actions.append(action)
+        else:
+            actions[next(i for i, a in enumerate(actions) if a is old)] = action
+        self._build(actions, changed=[a for a in (old, action) if a is not None])
+        self.version = meta["version"]
+
+    def start_polling(self, db, interval_seconds: float):
+        """Poll the catalog version in the background so all workers converge."""
+        if interval_seconds <= 0 or self._poll_task:
+            return
+
+        async def poll():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                try:
+                    await self.refresh_if_changed(db)
+                except Exception as e:
+                    logger.warning(f"Action catalog refresh failed: {e}")
+
+        self._poll_task = asyncio.create_task(poll())
+
+    def stop_polling(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+    def _build(self, actions: List[Dict[str, Any]], changed: Optional[List[Dict[str, Any]]] = None):
+        by_id, by_category, by_energy, by_premium = {}, {}, {}, {}
+        for action in actions:
+            by_id[action["action_id"]] = action
+            by_category.setdefault(action.get("category"), []).append(action)
+            by_energy.setdefault(action.get("energy_level"), []).append(action)
+            by_premium.setdefault(bool(action.get("is_premium", False)), []).append(action)
+
+        duration_index = DurationIndex(actions)
+        scoring_engine = build_scoring_engine(actions)
+        suggestion_table = None
+        if scoring_engine is not None:
+            if changed and self.suggestion_table is not None:
+                suggestion_table = self.suggestion_table
+                suggestion_table.update(scoring_engine, changed)
+            else:
+                suggestion_table = SuggestionTable(scoring_engine)
+        digest = hashlib.sha256(json.dumps(actions, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+        # Swap in one step so concurrent readers never see a half-built index
+        self._actions, self._by_id = actions, by_id
+        self._by_category, self._by_energy, self._by_premium = by_category, by_energy, by_premium
+        self.duration_index = duration_index
+        self.scoring_engine = scoring_engine
+        self.suggestion_table = suggestion_table
+        self._digest = digest
+
+    # ---------- reads ----------
+
+    def get(self, action_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(action_id)
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._actions
+
+    def find(
+        self,
+        category: Optional[str] = None,
+        energy_level: Optional[str] = None,
+        is_premium: Optional[bool] = None,
+        max_duration_min: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter the catalog, in load order.
+
+        Args:
+            category: Exact category match
+            energy_level: Exact energy level match
+            is_premium: Premium flag match
+            max_duration_min: Keep actions with duration_min <= this value
+
+        Returns:
+            Matching actions
+        """
+        candidates = [self._actions]
+        if category:
+            candidates.append(self._by_category.get(category, []))
+        if energy_level:
+            candidates.append(self._by_energy.get(energy_level, []))
+        if is_premium is not None:
+            candidates.append(self._by_premium.get(is_premium, []))
+
+        # Scan the most selective index, check the other predicates per item
+        base = min(candidates, key=len)
+        results = []
+        for action in base:
+            if category and action.get("category") != category:
+                continue
+            if energy_level and action.get("energy_level") != energy_level:
+                continue
+            if is_premium is not None and bool(action.get("is_premium", False)) != is_premium:
+                continue
+            if max_duration_min is not None and action["duration_min"] > max_duration_min:
+                continue
+            results.append(action)
+        return results
@@ -0,0 +1,315 @@
+"""
+Activity Prefix Sums for InFinea.
+Cumulative per-day minutes and session counts per user and per company, for O(1) range totals.
+"""
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+
+def user_owner(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def company_owner(company_id: str) -> str:
+    return f"company:{company_id}"
+
+
+class PrefixSeries:
+    """
+    Read side of an activity_prefix_sums document.
+
+    closed_minutes[i] / closed_sessions[i] are running totals up to and
+    including day start_day + i, for every day before open_day; the
+    open_* fields are the running totals up to open_day, the last day
+    with activity. Any range total is two lookups and a subtraction.
+    The closed_* lists may also be {index: total} dicts holding only the
+    entries a range needs (see range_totals).
+    """
+
+    def __init__(self, doc: Dict[str, Any]):
+        self.start = date.fromisoformat(doc["start_day"])
+        self.open_day = date.fromisoformat(doc["open_day"])
+        self.closed_minutes: List[int] = doc.get("closed_minutes", [])
+        self.closed_sessions: List[int] = doc.get("closed_sessions", [])
+        self.open_minutes = doc.get("open_minutes", 0)
+        self.open_sessions = doc.get("open_sessions", 0)
+
+    def cumulative(self, day: date) -> Tuple[int, int]:
+        """(minutes, sessions) from the first recorded day through `day`."""
+        if day < self.start:
+            return 0, 0
+        if day >= self.open_day:
+            return self.open_minutes, self.open_sessions
+        index = (day - self.start).days
+        return self.closed_minutes[index], self.closed_sessions[index]
+
+    def range_total(self, start: date, end: date) -> Dict[str, int]:
+        """Minutes and sessions between two days, both included."""
+        end_minutes, end_sessions = self.cumulative(end)
+        before_minutes, before_sessions = self.cumulative(start - timedelta(days=1))
+        return {"minutes": end_minutes - before_minutes, "sessions": end_sessions - before_sessions}
+
+
+async def record_prefix_activity(db, owner: str, day: str, minutes: int, sessions: int = 1):
+    """
+    Add a completion to the owner's running totals for `day` (YYYY-MM-DD).
+
+    The common case, another session on the current open day, is a single
+    $inc. The first session of a new day closes the previous days
+    (carrying their running total over any gap) under an open_day guard,
+    retried if a concurrent completion got there first. A day older than
+    open_day (clock skew between workers) is counted on open_day.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        result = await db.activity_prefix_sums.update_one(
+            {"owner": owner, "open_day": {"$gte": day}},
+            {"$inc": {"open_minutes": minutes, "open_sessions": sessions}}
+        )
+        if result.matched_count:
+            return
+
+        doc = await db.activity_prefix_sums.find_one(
+            {"owner": owner}, {"_id": 0, "open_day": 1, "open_minutes": 1, "open_sessions": 1}
+        )
+        if doc is None:
+            try:
+                await db.activity_prefix_sums.insert_one({
+                    "owner": owner,
+                    "start_day": day,
+                    "closed_minutes": [],
+                    "closed_sessions": [],
+                    "open_day": day,
+                    "open_minutes": minutes,
+                    "open_sessions": sessions,
+                })
+                return
+            except DuplicateKeyError:
+                continue
+        if doc["open_day"] >= day:
+            continue
+
+        gap = (date.fromisoformat(day) - date.fromisoformat(doc["open_day"])).days
+        result = await db.activity_prefix_sums.update_one(
+            {"owner": owner, "open_day": doc["open_day"]},
+            {
+                "$push": {
+                    "closed_minutes": {"$each": [doc["open_minutes"]] * gap},
+                    "closed_sessions": {"$each": [doc["open_sessions"]] * gap},
+                },
+                "$set": {"open_day": day},
+                "$inc": {"open_minutes": minutes, "open_sessions": sessions},
+            }
+        )
+        if result.matched_count:
+            return
+    logger.warning(f"Prefix sums of {owner} not updated for {day} after {MAX_ATTEMPTS} attempts")
+
+
+async def load_prefix_series(db, owner: str) -> Optional[PrefixSeries]:
+    """The owner's whole series, closed arrays included."""
+    doc = await db.activity_prefix_sums.find_one({"owner": owner}, {"_id": 0})
+    return PrefixSeries(doc) if doc else None
+
+
+async def range_totals(db, owner: str, start: date, end: date) -> Dict[str, int]:
+    """
+    Minutes and sessions of an owner between two days, without touching raw history.
+
+    Reads the open totals first, then only the (at most two) closed
+    entries the range needs, so the cost does not grow with the length
+    of the series. Closed entries never change once pushed; a backfill
+    rewriting the series in between (new start_day) is retried, then the
+    whole series is read.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        header = await db.activity_prefix_sums.find_one(
+            {"owner": owner}, {"_id": 0, "start_day": 1, "open_day": 1, "open_minutes": 1, "open_sessions": 1}
+        )
+        if header is None:
+            return {"minutes": 0, "sessions": 0}
+        series = PrefixSeries(header)
+        indexes = {
+            (day - series.start).days for day in (start - timedelta(days=1), end)
+            if series.start <= day < series.open_day
+        }
+        if not indexes:
+            return series.range_total(start, end)
+
+        rows = await db.activity_prefix_sums.aggregate([
+            {"$match": {"owner": owner, "start_day": header["start_day"]}},
+            {"$project": {"_id": 0, **{
+                f"{field}_{index}": {"$arrayElemAt": [f"$closed_{field}", index]}
+                for index in indexes for field in ("minutes", "sessions")
+            }}},
+        ]).to_list(1)
+        if rows:
+            series.closed_minutes = {index: rows[0][f"minutes_{index}"] for index in indexes}
+            series.closed_sessions = {index: rows[0][f"sessions_{index}"] for index in indexes}
+            return series.range_total(start, end)
+    series = await load_prefix_series(db, owner)
+    return series.range_total(start, end) if series else {"minutes": 0, "sessions": 0}
+
+
+def build_prefix_doc(owner: str, days: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """activity_prefix_sums document from daily rows (day, minutes, sessions) sorted by day."""
+    if not days:
+        return None
+    start = date.fromisoformat(days[0]["day"])
+    last = date.fromisoformat(days[-1]["day"])
+    daily_minutes = [0] * ((last - start).days + 1)
+    daily_sessions = [0] * len(daily_minutes)
+    for row in days:
+        index = (date.fromisoformat(row["day"]) - start).days
+        daily_minutes[index] += row.get("minutes", 0)
+        daily_sessions[index] += row.get("sessions", 0)
+
+    closed_minutes, closed_sessions = [], []
+    total_minutes = total_sessions = 0
+    for minutes, sessions in zip(daily_minutes, daily_sessions):
+        total_minutes += minutes
+        total_sessions += sessions
+        closed_minutes.append(total_minutes)
+        closed_sessions.append(total_sessions)
+
+    return {
+        "owner": owner,
+        "start_day": start.isoformat(),
+        "closed_minutes": closed_minutes[:-1],
+        "closed_sessions": closed_sessions[:-1],
+        "open_day": last.isoformat(),
+        "open_minutes": total_minutes,
+        "open_sessions": total_sessions,
+    }
+
+
+def prepend_history(history: Dict[str, Any], live: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One series from a rebuilt history that ends before the live series starts.
+
+    The live running totals are shifted by the history's total and the
+    days in between carry it over.
+    """
+    gap = (date.fromisoformat(live["start_day"]) - date.fromisoformat(history["open_day"])).days
+    minutes, sessions = history["open_minutes"], history["open_sessions"]
+    return {
+        **history,
+        "closed_minutes": history["closed_minutes"] + [minutes] * gap
+        + [total + minutes for total in live.get("closed_minutes", [])],
+        "closed_sessions": history["closed_sessions"] + [sessions] * gap
+        + [total + sessions for total in live.get("closed_sessions", [])],
+        "open_day": live["open_day"],
+        "open_minutes": live.get("open_minutes", 0) + minutes,
+        "open_sessions": live.get("open_sessions", 0) + sessions,
+    }
+
+
+async def backfill_activity_prefix(db, before: Optional[str] = None) -> int:
+    """
+    Rebuild every user and company series from the user_daily_activity rollup.
+
+    Company series follow the live rule: sessions of the users whose
+    company_id is the company, from the day they joined (company_joined_at,
+    or the company's creation day for users that predate that field).
+
+    record_prefix_activity owns every day from the start of the series it
+    has written and from `before` on: only earlier days are rebuilt, and
+    they are put in front of the live series under a guard on its open
+    totals (retried if a completion lands meanwhile). Running the job
+    again finds nothing left to add.
+
+    Args:
+        db: Database
+        before: First day left to the live path (YYYY-MM-DD, today in UTC if None)
+
+    Returns:
+        Number of series written
+    """
+    before = before or datetime.now(timezone.utc).date().isoformat()
+    written = 0
+
+    async def write(owner: str, days: List[Dict[str, Any]]):
+        nonlocal written
+        for _ in range(MAX_ATTEMPTS):
+            live = await db.activity_prefix_sums.find_one({"owner": owner}, {"_id": 0})
+            cutoff = min(before, live["start_day"]) if live else before
+            history = build_prefix_doc(owner, [row for row in days if row["day"] < cutoff])
+            if history is None:
+                return
+            if live is None:
+                try:
+                    await db.activity_prefix_sums.insert_one(history)
+                except DuplicateKeyError:
+                    continue
+            else:
+                guard = {field: live[field] for field in ("start_day", "open_day", "open_minutes", "open_sessions")}
+                result = await db.activity_prefix_sums.replace_one(
+                    {"owner": owner, **guard}, prepend_history(history, live)
+                )
+                if not result.matched_count:
+                    continue
+            written += 1
+            return
+        logger.warning(f"Prefix sums of {owner} not backfilled after {MAX_ATTEMPTS} attempts")
+
+    current, days = None, []
+    async for row in db.user_daily_activity.find({}, {"_id": 0, "user_id": 1, "day": 1, "minutes": 1, "sessions": 1}).sort(
+        [("user_id", 1), ("day", 1)]
+    ):
+        if row["user_id"] != current:
+            if current is not None:
+                await write(user_owner(current), days)
+            current, days = row["user_id"], []
+        days.append(row)
+    if current is not None:
+        await write(user_owner(current), days)
+
+    async for company in db.companies.find({}, {"_id": 0, "company_id": 1, "created_at": 1}):
+        founded = (company.get("created_at") or "")[:10]
+        members_since: Dict[str, List[str]] = {}
+        async for member in db.users.find(
+            {"company_id": company["company_id"]}, {"_id": 0, "user_id": 1, "company_joined_at": 1}
+        ):
+            since = max(founded, (member.get("company_joined_at") or "")[:10])
+            members_since.setdefault(since, []).append(member["user_id"])
+        if not members_since:
+            continue
+        days = await db.user_daily_activity.aggregate([
+            {"$match": {"$or": [
+                {"user_id": {"$in": user_ids}, "day": {"$gte": since}}
+                for since, user_ids in members_since.items()
+            ]}},
+            {"$group": {"_id": "$day", "minutes": {"$sum": "$minutes"}, "sessions": {"$sum": "$sessions"}}},
+            {"$sort": {"_id": 1}},
+        ]).to_list(None)
+        await write(company_owner(company["company_id"]), [{"day": d["_id"], **d} for d in days])
+
+    return written
+
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL') or os.environ.get('MONGODB_URI', ''), tz_aware=True)
+    db = client[os.environ.get('DB_NAME', 'infinea')]
+    try:
+        print(f"Wrote {await backfill_activity_prefix(db)} activity_prefix_sums documents")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # Run from backend/ after services.activity_rollup:  python -m services.activity_prefix
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
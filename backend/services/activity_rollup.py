@@ -0,0 +1,173 @@
+"""
+Activity Rollup Service for InFinea.
+One user_daily_activity document per user and day (sessions, minutes, minutes per category).
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from pymongo import UpdateOne
+
+from .user_stats import UNCATEGORIZED
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+GRANULARITIES = ("day", "week", "month")
+# Longest range /stats/history serves, in days
+MAX_RANGE_DAYS = 3 * 366
+
+
+async def record_daily_activity(db, user_id: str, day: str, category: Optional[str], minutes: int):
+    """
+    Count one completed session in the user's bucket for `day` (YYYY-MM-DD).
+    """
+    category = category or UNCATEGORIZED
+    await db.user_daily_activity.update_one(
+        {"user_id": user_id, "day": day},
+        {"$inc": {"sessions": 1, "minutes": minutes, f"minutes_by_category.{category}": minutes}},
+        upsert=True
+    )
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the day/week (Monday)/month containing `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+async def activity_history(db, user_id: str, start: date, end: date, granularity: str = "day") -> List[Dict[str, Any]]:
+    """
+    Activity per period between two days (both included), zero-filled.
+
+    Reads at most one rollup document per day of the range, whatever the
+    number of sessions behind it.
+
+    Args:
+        db: Database
+        user_id: User
+        start: First day
+        end: Last day
+        granularity: day, week or month
+
+    Returns:
+        One point per period, oldest first; the first and last periods
+        only count the days inside the range
+    """
+    rows = await db.user_daily_activity.find(
+        {"user_id": user_id, "day": {"$gte": start.isoformat(), "$lte": end.isoformat()}},
+        {"_id": 0, "day": 1, "sessions": 1, "minutes": 1, "minutes_by_category": 1}
+    ).to_list((end - start).days + 1)
+
+    points: Dict[str, Dict[str, Any]] = {}
+    period = period_start(start, granularity)
+    while period <= end:
+        points[period.isoformat()] = {"period": period.isoformat(), "sessions": 0, "minutes": 0, "minutes_by_category": {}}
+        period = next_period(period, granularity)
+
+    for row in rows:
+        point = points[period_start(date.fromisoformat(row["day"]), granularity).isoformat()]
+        point["sessions"] += row.get("sessions", 0)
+        point["minutes"] += row.get("minutes", 0)
+        for category, minutes in row.get("minutes_by_category", {}).items():
+            point["minutes_by_category"][category] = point["minutes_by_category"].get(category, 0) + minutes
+    return list(points.values())
+
+
+async def backfill_daily_activity(db, user_id: Optional[str] = None) -> int:
+    """
+    Rebuild rollup documents from user_sessions_history.
+
+    Counters are merged with $max, not incremented, so the job can be
+    re-run, and a completion that record_daily_activity counts while the
+    history is being read is not undone.
+
+    Args:
+        db: Database
+        user_id: Only this user (every user if None)
+
+    Returns:
+        Number of (user, day) documents written
+    """
+    match = {"completed": True, "completed_at": {"$type": "string"}}
+    if user_id:
+        match["user_id"] = user_id
+    cursor = db.user_sessions_history.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "day": {"$substr": ["$completed_at", 0, 10]}, "category": "$category"},
+            "sessions": {"$sum": 1},
+            "minutes": {"$sum": "$actual_duration"},
+        }},
+        {"$sort": {"_id.user_id": 1, "_id.day": 1}},
+    ], allowDiskUse=True)
+
+    written = 0
+    ops = []
+    current = None
+
+    def flush(doc):
+        counters = {"sessions": doc["sessions"], "minutes": doc["minutes"]}
+        for category, minutes in doc["minutes_by_category"].items():
+            counters[f"minutes_by_category.{category}"] = minutes
+        ops.append(UpdateOne({"user_id": doc["user_id"], "day": doc["day"]}, {"$max": counters}, upsert=True))
+
+    async for row in cursor:
+        key = (row["_id"]["user_id"], row["_id"]["day"])
+        if current is None or (current["user_id"], current["day"]) != key:
+            if current is not None:
+                flush(current)
+            current = {"user_id": key[0], "day": key[1], "sessions": 0, "minutes": 0, "minutes_by_category": {}}
+        category = row["_id"].get("category") or UNCATEGORIZED
+        minutes = row["minutes"] or 0
+        current["sessions"] += row["sessions"]
+        current["minutes"] += minutes
+        current["minutes_by_category"][category] = current["minutes_by_category"].get(category, 0) + minutes
+
+        if len(ops) >= BATCH_SIZE:
+            await db.user_daily_activity.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+
+    if current is not None:
+        flush(current)
+    if ops:
+        await db.user_daily_activity.bulk_write(ops, ordered=False)
+        written += len(ops)
+    return written
+
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL') or os.environ.get('MONGODB_URI', ''), tz_aware=True)
+    db = client[os.environ.get('DB_NAME', 'infinea')]
+    try:
+        print(f"Wrote {await backfill_daily_activity(db, args.user)} user_daily_activity documents")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m services.activity_rollup [--user USER_ID]
+    parser = argparse.ArgumentParser(description="Rebuild user_daily_activity from user_sessions_history")
+    parser.add_argument("--user", help="rebuild a single user")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,253 @@
+"""
+Badge Engine for InFinea.
+Badge conditions compiled into threshold rules indexed by the stat they read.
+"""
+import logging
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Iterable
+
+from .user_stats import get_user_stats_doc
+
+logger = logging.getLogger(__name__)
+
+BADGES = [
+    {
+        "badge_id": "first_action",
+        "name": "Premier Pas",
+        "description": "Complétez votre première micro-action",
+        "icon": "rocket",
+        "condition": {"type": "sessions_completed", "value": 1}
+    },
+    {
+        "badge_id": "streak_3",
+        "name": "Régularité",
+        "description": "Maintenez un streak de 3 jours",
+        "icon": "flame",
+        "condition": {"type": "streak_days", "value": 3}
+    },
+    {
+        "badge_id": "streak_7",
+        "name": "Semaine Parfaite",
+        "description": "Maintenez un streak de 7 jours",
+        "icon": "star",
+        "condition": {"type": "streak_days", "value": 7}
+    },
+    {
+        "badge_id": "streak_30",
+        "name": "Mois d'Or",
+        "description": "Maintenez un streak de 30 jours",
+        "icon": "crown",
+        "condition": {"type": "streak_days", "value": 30}
+    },
+    {
+        "badge_id": "time_60",
+        "name": "Première Heure",
+        "description": "Accumulez 60 minutes de micro-actions",
+        "icon": "clock",
+        "condition": {"type": "total_time", "value": 60}
+    },
+    {
+        "badge_id": "time_300",
+        "name": "5 Heures",
+        "description": "Accumulez 5 heures de micro-actions",
+        "icon": "timer",
+        "condition": {"type": "total_time", "value": 300}
+    },
+    {
+        "badge_id": "time_600",
+        "name": "10 Heures",
+        "description": "Accumulez 10 heures de micro-actions",
+        "icon": "trophy",
+        "condition": {"type": "total_time", "value": 600}
+    },
+    {
+        "badge_id": "category_learning",
+        "name": "Apprenant",
+        "description": "Complétez 10 actions d'apprentissage",
+        "icon": "book-open",
+        "condition": {"type": "category_sessions", "category": "learning", "value": 10}
+    },
+    {
+        "badge_id": "category_productivity",
+        "name": "Productif",
+        "description": "Complétez 10 actions de productivité",
+        "icon": "target",
+        "condition": {"type": "category_sessions", "category": "productivity", "value": 10}
+    },
+    {
+        "badge_id": "category_wellbeing",
+        "name": "Zen Master",
+        "description": "Complétez 10 actions de bien-être",
+        "icon": "heart",
+        "condition": {"type": "category_sessions", "category": "well_being", "value": 10}
+    },
+    {
+        "badge_id": "all_categories",
+        "name": "Équilibre",
+        "description": "Complétez au moins 5 actions dans chaque catégorie",
+        "icon": "sparkles",
+        "condition": {"type": "all_categories", "value": 5}
+    },
+    {
+        "badge_id": "premium",
+        "name": "Investisseur",
+        "description": "Passez à Premium",
+        "icon": "gem",
+        "condition": {"type": "subscription", "value": "premium"}
+    }
+]
+
+# Categories an all_categories badge requires
+BADGE_CATEGORIES = ["learning", "productivity", "well_being"]
+
+
+def badge_inputs(user: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rule inputs of a user, read from the user document and the user_stats counters.
+
+    Keys are the condition types, with one "category_sessions:<category>"
+    key per category.
+    """
+    category_counts = stats.get("sessions_by_category", {})
+    inputs = {
+        "sessions_completed": stats.get("total_sessions", 0),
+        "streak_days": user.get("streak_days", 0),
+        "total_time": user.get("total_time_invested", 0),
+        "all_categories": min(category_counts.get(c, 0) for c in BADGE_CATEGORIES),
+        "subscription": user.get("subscription_tier"),
+    }
+    for category, count in category_counts.items():
+        inputs[f"category_sessions:{category}"] = count
+    return inputs
+
+
+def completion_inputs(category: Optional[str]) -> List[str]:
+    """Inputs a completed session can change."""
+    changed = ["sessions_completed", "streak_days", "total_time", "all_categories"]
+    if category:
+        changed.append(f"category_sessions:{category}")
+    return changed
+
+
+class BadgeRuleIndex:
+    """
+    Badge conditions compiled once into per-input rule lists.
+
+    Numeric conditions become (threshold, badge) pairs sorted by
+    threshold, so the badges an input value satisfies are a prefix found
+    by bisection; the subscription condition is an equality lookup.
+    Evaluating after an event only visits the inputs it changed.
+    """
+
+    def __init__(self, badges: List[Dict[str, Any]]):
+        self._thresholds: Dict[str, List[int]] = {}
+        self._ranked: Dict[str, List[Dict[str, Any]]] = {}
+        self._equals: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
+
+        rules: Dict[str, List[tuple]] = {}
+        for badge in badges:
+            condition = badge["condition"]
+            kind = condition["type"]
+            if kind in ("sessions_completed", "streak_days", "total_time", "all_categories"):
+                rules.setdefault(kind, []).append((condition["value"], badge))
+            elif kind == "category_sessions":
+                rules.setdefault(f"category_sessions:{condition['category']}", []).append((condition["value"], badge))
+            elif kind == "subscription":
+                self._equals.setdefault(kind, {}).setdefault(condition["value"], []).append(badge)
+            else:
+                raise ValueError(f"Unknown badge condition type '{kind}' ({badge['badge_id']})")
+
+        for key, pairs in rules.items():
+            pairs.sort(key=lambda pair: pair[0])
+            self._thresholds[key] = [threshold for threshold, _ in pairs]
+            self._ranked[key] = [badge for _, badge in pairs]
+
+    @property
+    def inputs(self) -> List[str]:
+        return list(self._thresholds) + list(self._equals)
+
+    def evaluate(
+        self,
+        inputs: Dict[str, Any],
+        earned_ids: Iterable[str],
+        changed: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Badges newly satisfied by `inputs`.
+
+        Args:
+            inputs: Values from badge_inputs
+            earned_ids: Badges the user already has
+            changed: Inputs to evaluate (all of them if None)
+
+        Returns:
+            Badge definitions not yet earned whose condition now holds
+        """
+        earned = set(earned_ids)
+        found = []
+        for key in (self.inputs if changed is None else changed):
+            value = inputs.get(key)
+            if key in self._thresholds:
+                if value is None:
+                    continue
+                met = self._ranked[key][:bisect_right(self._thresholds[key], value)]
+            else:
+                met = self._equals.get(key, {}).get(value, [])
+            for badge in met:
+                if badge["badge_id"] not in earned:
+                    earned.add(badge["badge_id"])
+                    found.append(badge)
+        return found
+
+
+def badge_award(badge: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry pushed to users.badges."""
+    return {
+        "badge_id": badge["badge_id"],
+        "name": badge["name"],
+        "icon": badge["icon"],
+        "earned_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+async def push_badges(db, user_id: str, awards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Push each award unless the user already holds that badge.
+
+    One conditional update per badge, so a badge awarded meanwhile by a
+    concurrent call only drops itself, not the rest of the batch.
+
+    Returns:
+        The awards actually pushed
+    """
+    pushed = []
+    for award in awards:
+        result = await db.users.update_one(
+            {"user_id": user_id, "badges.badge_id": {"$ne": award["badge_id"]}},
+            {"$push": {"badges": award}}
+        )
+        if result.modified_count:
+            pushed.append(award)
+    return pushed
+
+
+BADGE_INDEX = BadgeRuleIndex(BADGES)
+
+
+async def award_missing_badges(db) -> int:
+    """
+    Migration entry point: evaluate every rule once for every user.
+
+    Badges used to be awarded lazily by GET /badges/user; this catches up
+    users whose conditions were met but never evaluated. No notifications
+    are sent.
+    """
+    awarded = 0
+    async for user in db.users.find({}, {"_id": 0, "password_hash": 0}):
+        stats = await get_user_stats_doc(db, user["user_id"])
+        earned_ids = [b["badge_id"] for b in user.get("badges", [])]
+        new_badges = BADGE_INDEX.evaluate(badge_inputs(user, stats), earned_ids)
+        if new_badges:
+            awarded += len(await push_badges(db, user["user_id"], [badge_award(b) for b in new_badges]))
+    return awarded
@@ -0,0 +1,222 @@
+"""
+Company Stats Service for InFinea.
+Anonymized employee listing and dashboard aggregates for B2B admins.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+logger = logging.getLogger(__name__)
+
+# Sort key of /b2b/employees -> user counter (always descending)
+EMPLOYEE_SORTS = {
+    "total_time": "total_time_invested",
+    "streak": "streak_days",
+    "sessions": "total_sessions",
+}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DAILY_ACTIVITY_DAYS = 28
+ACTIVE_EMPLOYEE_DAYS = 7
+
+
+async def company_member_ids(db, company_id: str) -> List[str]:
+    """
+    Users of a company. users.company_id is the membership record every
+    B2B read and write goes by (companies.employees is not consulted).
+    """
+    return await db.users.distinct("user_id", {"company_id": company_id})
+
+
+def encode_cursor(value: int, object_id: ObjectId) -> str:
+    return f"{value}.{object_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, ObjectId]:
+    """Raises ValueError on a malformed cursor."""
+    value, _, object_id = cursor.partition(".")
+    try:
+        return int(value), ObjectId(object_id)
+    except (InvalidId, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def employee_page_pipeline(
+    company_id: str,
+    admin_user_id: str,
+    sort: str,
+    limit: int,
+    after: Optional[Tuple[int, ObjectId]] = None
+) -> List[Dict[str, Any]]:
+    """
+    One page of employees, best first, as a single aggregation.
+
+    Resolved by the users (company_id, <counter>, _id) index: the $match
+    and $sort walk it from the keyset cursor and stop after `limit` + 1
+    documents, whatever the company size. Only anonymized fields leave
+    the server.
+    """
+    field = EMPLOYEE_SORTS[sort]
+    match: Dict[str, Any] = {"company_id": company_id}
+    if after is not None:
+        value, object_id = after
+        match["$or"] = [
+            {field: {"$lt": value}},
+            {field: value, "_id": {"$gt": object_id}},
+        ]
+    return [
+        {"$match": match},
+        {"$sort": {field: -1, "_id": 1}},
+        {"$limit": limit + 1},
+        {"$project": {
+            "_id": 1,
+            "sort_value": {"$ifNull": [f"${field}", 0]},
+            "name": {"$ifNull": ["$name", "Collaborateur"]},
+            "total_time": {"$ifNull": ["$total_time_invested", 0]},
+            "streak_days": {"$ifNull": ["$streak_days", 0]},
+            "total_sessions": {"$ifNull": ["$total_sessions", 0]},
+            "is_admin": {"$eq": ["$user_id", admin_user_id]},
+        }},
+    ]
+
+
+async def employee_page(
+    db,
+    company_id: str,
+    admin_user_id: str,
+    sort: str = "total_time",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Args:
+        db: Database
+        company_id: Company
+        admin_user_id: Requesting admin, flagged in the list
+        sort: total_time, streak or sessions
+        limit: Page size
+        cursor: next_cursor of the previous page
+
+    Returns:
+        employees and the next_cursor (None on the last page)
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows = await db.users.aggregate(
+        employee_page_pipeline(company_id, admin_user_id, sort, limit, after)
+    ).to_list(limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["sort_value"], rows[-1]["_id"])
+    for row in rows:
+        del row["_id"], row["sort_value"]
+    return {"employees": rows, "next_cursor": next_cursor}
+
+
+def dashboard_pipeline(employee_ids: List[str], now: datetime, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Every B2B dashboard aggregate in a single read of the employees'
+    sessions.
+
+    The first $match carries the employee list once and admits the
+    completed sessions of the time window plus any session of the last
+    ACTIVE_EMPLOYEE_DAYS; each $or branch is resolved by the
+    user_completed_dashboard index, and the $project keeps only indexed
+    fields, so the scan is covered and never fetches session documents.
+    Each $facet then works on that stream in memory: the session facets
+    keep the completed sessions of the window, while "active" counts
+    every employee with a session completed_at in the last
+    ACTIVE_EMPLOYEE_DAYS, whatever its completed flag and the window.
+    """
+    sessions: Dict[str, Any] = {"completed": True}
+    if since is not None:
+        sessions["completed_at"] = {"$gte": since.isoformat()}
+    daily_since = (now - timedelta(days=DAILY_ACTIVITY_DAYS)).isoformat()
+    active_since = (now - timedelta(days=ACTIVE_EMPLOYEE_DAYS)).isoformat()
+    return [
+        {"$match": {
+            "user_id": {"$in": employee_ids},
+            "$or": [sessions, {"completed_at": {"$gte": active_since}}],
+        }},
+        {"$project": {
+            "_id": 0, "user_id": 1, "completed": 1, "completed_at": 1, "category": 1, "actual_duration": 1,
+        }},
+        {"$facet": {
+            "totals": [
+                {"$match": sessions},
+                {"$group": {"_id": None, "sessions": {"$sum": 1}, "time": {"$sum": "$actual_duration"}}},
+            ],
+            "categories": [
+                {"$match": sessions},
+                {"$group": {"_id": "$category", "count": {"$sum": 1}, "time": {"$sum": "$actual_duration"}}},
+            ],
+            "daily": [
+                {"$match": sessions},
+                {"$match": {"completed_at": {"$gte": daily_since}}},
+                {"$group": {
+                    "_id": {"$substr": ["$completed_at", 0, 10]},
+                    "sessions": {"$sum": 1},
+                    "time": {"$sum": "$actual_duration"}
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "active": [
+                {"$match": {"completed_at": {"$gte": active_since}}},
+                {"$group": {"_id": "$user_id"}},
+                {"$count": "employees"},
+            ],
+        }},
+    ]
+
+
+async def company_dashboard(
+    db, employee_ids: List[str], now: datetime, since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Args:
+        db: Database
+        employee_ids: Company employees
+        now: Reference time of the daily and active windows
+        since: Only count sessions completed from then on (all time if None)
+
+    Returns:
+        total_sessions, total_time, category_stats, daily_activity and
+        active_employees
+    """
+    result = await db.user_sessions_history.aggregate(dashboard_pipeline(employee_ids, now, since)).to_list(1)
+    facets = result[0] if result else {}
+    totals = (facets.get("totals") or [{}])[0]
+    active = (facets.get("active") or [{}])[0]
+    return {
+        "total_sessions": totals.get("sessions", 0),
+        "total_time": totals.get("time", 0),
+        "category_stats": facets.get("categories", []),
+        "daily_activity": facets.get("daily", []),
+        "active_employees": active.get("employees", 0),
+    }
+
+
+async def backfill_user_counters(db) -> int:
+    """
+    Copy user_stats.total_sessions onto user documents and default the
+    counters /b2b/employees sorts on, so keyset pages never skip a user.
+    The copy goes through $max, so sessions the completion pipeline
+    counted meanwhile are kept.
+
+    Returns:
+        Number of user documents updated
+    """
+    updated = 0
+    async for stats in db.user_stats.find({}, {"_id": 0, "user_id": 1, "total_sessions": 1}):
+        result = await db.users.update_one(
+            {"user_id": stats["user_id"]}, {"$max": {"total_sessions": stats.get("total_sessions", 0)}}
+        )
+        updated += result.modified_count
+    for field in EMPLOYEE_SORTS.values():
+        result = await db.users.update_many({field: {"$exists": False}}, {"$set": {field: 0}})
+        updated += result.modified_count
+    return updated
@@ -0,0 +1,263 @@
+"""
+Database Index Bootstrap for InFinea.
+Declares the indexes every collection needs and creates them idempotently at startup.
+"""
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+class MissingIndexError(RuntimeError):
+    """Raised in strict mode when a required index could not be ensured."""
+
+
+def index(keys: List[tuple], name: str, unique: bool = False, required: bool = True, **options) -> Dict[str, Any]:
+    """Build an index declaration."""
+    return {"keys": keys, "name": name, "unique": unique, "required": required, "options": options}
+
+
+# Bump a collection's version whenever its index list changes.
+INDEX_SPECS: Dict[str, Dict[str, Any]] = {
+    "users": {
+        "version": 3,
+        "indexes": [
+            index([("user_id", ASCENDING)], "user_id_unique", unique=True),
+            index([("email", ASCENDING)], "email_unique", unique=True),
+            # Company membership (covered distinct of user_id)
+            index([("company_id", ASCENDING), ("user_id", ASCENDING)], "company_user"),
+            # Keyset pages of /b2b/employees, one per sort key
+            index([("company_id", ASCENDING), ("total_time_invested", DESCENDING), ("_id", ASCENDING)], "company_total_time"),
+            index([("company_id", ASCENDING), ("streak_days", DESCENDING), ("_id", ASCENDING)], "company_streak"),
+            index([("company_id", ASCENDING), ("total_sessions", DESCENDING), ("_id", ASCENDING)], "company_sessions"),
+        ],
+    },
+    "user_sessions": {
+        "version": 2,
+        "indexes": [
+            index([("session_token", ASCENDING)], "session_token_unique", unique=True),
+            index([("expires_at", ASCENDING)], "expires_at_ttl", expireAfterSeconds=0),
+        ],
+    },
+    "user_sessions_history": {
+        "version": 2,
+        "indexes": [
+            index([("session_id", ASCENDING)], "session_id_unique", unique=True),
+            # Replaces user_completed_completed_at (same prefix, dropped by the
+            # version 2 bump); category and actual_duration let the B2B
+            # dashboard $facet run as a covered scan
+            index(
+                [
+                    ("user_id", ASCENDING), ("completed", ASCENDING), ("completed_at", DESCENDING),
+                    ("category", ASCENDING), ("actual_duration", ASCENDING),
+                ],
+                "user_completed_dashboard",
+            ),
+            index([("user_id", ASCENDING), ("started_at", DESCENDING)], "user_started_at"),
+        ],
+    },
+    "user_stats": {
+        "version": 1,
+        "indexes": [
+            index([("user_id", ASCENDING)], "user_id_unique", unique=True),
+        ],
+    },
+    "user_daily_activity": {
+        "version": 1,
+        "indexes": [
+            index([("user_id", ASCENDING), ("day", ASCENDING)], "user_day_unique", unique=True),
+        ],
+    },
+    "activity_prefix_sums": {
+        "version": 1,
+        "indexes": [
+            index([("owner", ASCENDING)], "owner_unique", unique=True),
+        ],
+    },
+    "micro_actions": {
+        "version": 1,
+        "indexes": [
+            index([("action_id", ASCENDING)], "action_id_unique", unique=True),
+        ],
+    },
+    "notifications": {
+        "version": 1,
+        "indexes": [
+            index([("notification_id", ASCENDING)], "notification_id_unique", unique=True),
+            index([("user_id", ASCENDING), ("created_at", DESCENDING)], "user_created_at"),
+            index([("user_id", ASCENDING), ("slot_id", ASCENDING)], "user_slot", required=False),
+        ],
+    },
+    "detected_free_slots": {
+        "version": 2,
+        "indexes": [
+            index([("slot_id", ASCENDING)], "slot_id_unique", unique=True),
+            index([("user_id", ASCENDING), ("start_time", ASCENDING)], "user_start_time"),
+            # expires_at mirrors end_time; past slots are dropped by the TTL monitor
+            index([("expires_at", ASCENDING)], "expires_at_ttl", expireAfterSeconds=0),
+        ],
+    },
+    "reflections": {
+        "version": 1,
+        "indexes": [
+            index([("reflection_id", ASCENDING)], "reflection_id_unique", unique=True),
+            index([("user_id", ASCENDING), ("created_at", DESCENDING)], "user_created_at"),
+        ],
+    },
+    "reflection_summaries": {
+        "version": 1,
+        "indexes": [
+            index([("user_id", ASCENDING), ("created_at", DESCENDING)], "user_created_at", required=False),
+        ],
+    },
+    "oauth_states": {
+        "version": 2,
+        "indexes": [
+            index([("state", ASCENDING)], "state_unique", unique=True),
+            index([("expires_at", ASCENDING)], "expires_at_ttl", expireAfterSeconds=0),
+        ],
+    },
+    "companies": {
+        "version": 1,
+        "indexes": [
+            index([("company_id", ASCENDING)], "company_id_unique", unique=True),
+            index([("admin_user_id", ASCENDING)], "admin_user_id"),
+        ],
+    },
+    "company_invites": {
+        "version": 2,
+        "indexes": [
+            index([("invite_id", ASCENDING)], "invite_id_unique", unique=True),
+            index([("expires_at", ASCENDING)], "expires_at_ttl", expireAfterSeconds=0),
+        ],
+    },
+    "user_integrations": {
+        "version": 1,
+        "indexes": [
+            index([("integration_id", ASCENDING)], "integration_id_unique", unique=True),
+            index([("user_id", ASCENDING), ("provider", ASCENDING)], "user_provider"),
+        ],
+    },
+    "notification_preferences": {
+        "version": 1,
+        "indexes": [
+            index([("user_id", ASCENDING)], "user_id_unique", unique=True),
+        ],
+    },
+    "push_subscriptions": {
+        "version": 1,
+        "indexes": [
+            index([("user_id", ASCENDING)], "user_id_unique", unique=True),
+        ],
+    },
+    "payment_transactions": {
+        "version": 1,
+        "indexes": [
+            index([("session_id", ASCENDING)], "session_id_unique", unique=True),
+        ],
+    },
+}
+
+
+async def ensure_indexes(db, strict: bool = False, specs: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Create every declared index. Safe to run on each startup: createIndex
+    is a no-op when an identical index already exists.
+
+    When a collection's declared version differs from the one recorded in
+    schema_versions, indexes that are no longer declared are dropped once
+    the declared ones are built. Collections with no recorded version are
+    left alone, so indexes added by hand before versioning survive.
+
+    Args:
+        db: MongoDB database instance
+        strict: Raise MissingIndexError if a required index is absent
+            afterwards instead of logging and carrying on
+        specs: Index declarations, defaults to INDEX_SPECS
+
+    Returns:
+        Report with the build time of each index, the dropped ones and any failures
+    """
+    specs = specs or INDEX_SPECS
+    report = {"built": [], "dropped": [], "failed": []}
+
+    for collection_name, spec in specs.items():
+        collection = db[collection_name]
+        recorded = await db.schema_versions.find_one({"_id": f"indexes:{collection_name}"}, {"version": 1})
+        failures = len(report["failed"])
+
+        for idx in spec["indexes"]:
+            started = time.perf_counter()
+            try:
+                await collection.create_index(
+                    idx["keys"], name=idx["name"], unique=idx["unique"], **idx["options"]
+                )
+            except Exception as e:
+                logger.error(f"Index {collection_name}.{idx['name']} failed: {e}")
+                report["failed"].append({"collection": collection_name, "name": idx["name"], "error": str(e)})
+                continue
+
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"Index {collection_name}.{idx['name']} ready in {elapsed_ms} ms")
+            report["built"].append({"collection": collection_name, "name": idx["name"], "ms": elapsed_ms})
+
+        if len(report["failed"]) > failures:
+            # Keep the previous indexes and version until the declared ones exist
+            continue
+        if recorded and recorded.get("version") != spec["version"]:
+            await drop_undeclared_indexes(collection, spec, report)
+
+        await db.schema_versions.update_one(
+            {"_id": f"indexes:{collection_name}"},
+            {"$set": {
+                "version": spec["version"],
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+
+    missing = await find_missing_indexes(db, specs)
+    report["missing"] = missing
+
+    if missing:
+        names = ", ".join(f"{m['collection']}.{m['name']}" for m in missing)
+        if strict:
+            raise MissingIndexError(f"Required indexes missing: {names}")
+        logger.warning(f"Required indexes missing: {names}")
+
+    return report
+
+
+async def drop_undeclared_indexes(collection, spec: Dict[str, Any], report: Dict[str, Any]):
+    """Drop the indexes of a collection that its spec no longer declares."""
+    declared = {idx["name"] for idx in spec["indexes"]} | {"_id_"}
+    for name in await collection.index_information():
+        if name in declared:
+            continue
+        try:
+            await collection.drop_index(name)
+        except OperationFailure as e:
+            # Usually a concurrent worker dropped it first
+            logger.warning(f"Dropping index {collection.name}.{name} failed: {e}")
+            continue
+        logger.info(f"Index {collection.name}.{name} dropped (no longer declared)")
+        report["dropped"].append({"collection": collection.name, "name": name})
+
+
+async def find_missing_indexes(db, specs: Dict[str, Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """List required indexes that do not exist in the database."""
+    specs = specs or INDEX_SPECS
+    missing = []
+
+    for collection_name, spec in specs.items():
+        existing = await db[collection_name].index_information()
+        for idx in spec["indexes"]:
+            if idx["required"] and idx["name"] not in existing:
+                missing.append({"collection": collection_name, "name": idx["name"]})
+
+    return missing
@@ -0,0 +1,190 @@
+"""
+Data Migrations for InFinea.
+One-off document rewrites, each recorded in schema_versions so it runs once.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from .user_stats import merge_user_stats_history
+from .badge_engine import award_missing_badges
+from .activity_rollup import backfill_daily_activity
+from .activity_prefix import backfill_activity_prefix
+from .company_stats import backfill_user_counters
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# (collection, ISO-string source field, native datetime target field)
+EXPIRY_FIELDS = [
+    ("user_sessions", "expires_at", "expires_at"),
+    ("oauth_states", "expires_at", "expires_at"),
+    ("company_invites", "expires_at", "expires_at"),
+    ("detected_free_slots", "end_time", "expires_at"),
+]
+
+
+def parse_iso_datetime(value: str) -> Optional[datetime]:
+    """Parse an ISO-8601 string into an aware UTC datetime."""
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+async def convert_expiry_fields(db) -> int:
+    """
+    Give every expiring document a native datetime expiry field so TTL
+    indexes can remove it.
+
+    Returns:
+        Number of documents rewritten
+    """
+    converted = 0
+
+    for collection_name, source, target in EXPIRY_FIELDS:
+        collection = db[collection_name]
+        if source == target:
+            query = {source: {"$type": "string"}}
+        else:
+            query = {source: {"$type": "string"}, target: {"$exists": False}}
+
+        ops = []
+        async for doc in collection.find(query, {"_id": 1, source: 1}):
+            expires_at = parse_iso_datetime(doc[source])
+            if expires_at is None:
+                continue
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {target: expires_at}}))
+
+            if len(ops) >= BATCH_SIZE:
+                await collection.bulk_write(ops, ordered=False)
+                converted += len(ops)
+                ops = []
+
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+            converted += len(ops)
+
+    return converted
+
+
+# (name, migration, background): background migrations are full-history
+# backfills, left to a task at startup so the app serves meanwhile. Order
+# matters: a migration may build on the ones listed before it.
+MIGRATIONS = [
+    ("expiry_datetimes_v1", convert_expiry_fields, False),
+    # v1 skipped users that already had a stats document
+    ("user_stats_v2", merge_user_stats_history, True),
+    ("badges_catch_up_v1", award_missing_badges, True),
+    ("daily_activity_v1", backfill_daily_activity, True),
+    ("activity_prefix_v1", backfill_activity_prefix, True),
+    # v1 copied counts from the user_stats documents v1 left short
+    ("user_total_sessions_v2", backfill_user_counters, True),
+]
+
+
+async def claim_migration(db, name: str) -> Optional[str]:
+    """
+    Claim a migration by inserting its schema_versions marker.
+
+    Returns:
+        None if claimed, otherwise the status of the existing marker
+        ("running" or "applied"; markers written before claims existed
+        have no status and count as applied)
+    """
+    try:
+        await db.schema_versions.insert_one({
+            "_id": f"migration:{name}",
+            "status": "running",
+            "claimed_at": datetime.now(timezone.utc).isoformat(),
+            "claimed_by": f"{socket.gethostname()}:{os.getpid()}",
+        })
+        return None
+    except DuplicateKeyError:
+        marker = await db.schema_versions.find_one({"_id": f"migration:{name}"}, {"status": 1})
+        return (marker or {}).get("status", "applied")
+
+
+async def run_migrations(db, background: Optional[bool] = None):
+    """
+    Apply every migration that has not been recorded yet.
+
+    Each one is claimed first, so concurrent workers never run the same
+    migration. A worker that finds one still running elsewhere stops
+    there: the claimant goes on with the rest of the list in order. A
+    failed or cancelled migration releases its claim; one left running
+    by a killed process is released with --release.
+
+    Args:
+        db: Database
+        background: Only the background (True) or foreground (False)
+            migrations; all of them if None
+    """
+    for name, migration, in_background in MIGRATIONS:
+        if background is not None and in_background != background:
+            continue
+        status = await claim_migration(db, name)
+        if status == "running":
+            logger.info(f"Migration {name} is running in another process")
+            return
+        if status is not None:
+            continue
+
+        marker = {"_id": f"migration:{name}"}
+        try:
+            count = await migration(db)
+        except BaseException:
+            await db.schema_versions.delete_one({**marker, "status": "running"})
+            raise
+        await db.schema_versions.update_one(
+            marker,
+            {"$set": {"status": "applied", "applied_at": datetime.now(timezone.utc).isoformat(), "documents": count}}
+        )
+        logger.info(f"Migration {name} applied to {count} documents")
+
+
+async def run_background_migrations(db):
+    """Startup task for the backfills; failures are logged and retried on the next start."""
+    try:
+        await run_migrations(db, background=True)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Background migrations failed")
+
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL') or os.environ.get('MONGODB_URI', ''), tz_aware=True)
+    db = client[os.environ.get('DB_NAME', 'infinea')]
+    try:
+        if args.release:
+            result = await db.schema_versions.delete_one({"_id": f"migration:{args.release}", "status": "running"})
+            print(f"Released {result.deleted_count} claim(s) on {args.release}")
+        else:
+            await run_migrations(db)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m services.db_migrations [--release NAME]
+    parser = argparse.ArgumentParser(description="Apply pending data migrations")
+    parser.add_argument("--release", metavar="NAME", help="drop the claim a killed process left on a migration")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
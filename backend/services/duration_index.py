@@ -0,0 +1,132 @@
+"""
+Duration Interval Index for InFinea.
+Answers "which micro-actions fit N minutes, closest fit first" in logarithmic time.
+"""
+import heapq
+from bisect import bisect_right
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+NEG_INF = float("-inf")
+
+
+class _Partition:
+    """
+    Actions of one (category, energy_level, is_premium) cell, sorted by
+    duration_min. A max segment tree over duration_max lets stabbing
+    queries (duration_min <= d <= duration_max) skip non-matching actions
+    in O(log n) per result.
+    """
+
+    def __init__(self, entries: List[Tuple[int, Dict[str, Any]]]):
+        # Ties on duration_min keep catalog order once iterated backwards
+        entries.sort(key=lambda e: (e[1]["duration_min"], -e[0]))
+        self.seqs = [seq for seq, _ in entries]
+        self.actions = [action for _, action in entries]
+        self.mins = [action["duration_min"] for action in self.actions]
+
+        size = 1
+        while size < len(self.actions):
+            size *= 2
+        self._size = size
+        self._tree = [NEG_INF] * (2 * size)
+        for i, action in enumerate(self.actions):
+            self._tree[size + i] = action["duration_max"]
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def _rightmost_at_least(self, node: int, lo: int, hi: int, i: int, value: int) -> int:
+        """Largest index j <= i whose duration_max >= value, or -1."""
+        if lo > i or self._tree[node] < value:
+            return -1
+        if lo == hi:
+            return lo
+        mid = (lo + hi) // 2
+        j = self._rightmost_at_least(2 * node + 1, mid + 1, hi, i, value)
+        if j != -1:
+            return j
+        return self._rightmost_at_least(2 * node, lo, mid, i, value)
+
+    def iter_fits(self, duration: int, within_max: bool) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+        """Yield (gap, seq, action) for fitting actions, smallest gap first."""
+        i = bisect_right(self.mins, duration) - 1
+        while i >= 0:
+            if within_max:
+                i = self._rightmost_at_least(1, 0, self._size - 1, i, duration)
+                if i < 0:
+                    return
+            yield duration - self.mins[i], self.seqs[i], self.actions[i]
+            i -= 1
+
+
+class DurationIndex:
+    """
+    Duration index over a micro-action catalog, partitioned by category,
+    energy level and premium flag.
+
+    Results are ranked by closeness of fit (duration - duration_min), then
+    by catalog order, which matches the ordering match_action_to_slot used
+    with its linear scan and stable sort.
+    """
+
+    def __init__(self, actions: List[Dict[str, Any]]):
+        cells: Dict[tuple, List[Tuple[int, Dict[str, Any]]]] = {}
+        for seq, action in enumerate(actions):
+            key = (action.get("category"), action.get("energy_level"), bool(action.get("is_premium", False)))
+            cells.setdefault(key, []).append((seq, action))
+        self._partitions = {key: _Partition(entries) for key, entries in cells.items()}
+        self._boundaries = sorted({action["duration_min"] for action in actions})
+
+    def fitting(
+        self,
+        duration: int,
+        category: Optional[str] = None,
+        energy_level: Optional[str] = None,
+        include_premium: bool = True,
+        within_max: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Actions that fit `duration` minutes, closest fit first.
+
+        Args:
+            duration: Available minutes
+            category: Restrict to one category
+            energy_level: Restrict to one energy level
+            include_premium: False to drop premium actions
+            within_max: Also require duration <= duration_max
+            limit: Maximum number of actions to return
+
+        Returns:
+            Matching actions
+        """
+        streams = [
+            partition.iter_fits(duration, within_max)
+            for (cat, energy, premium), partition in self._partitions.items()
+            if (not category or cat == category)
+            and (not energy_level or energy == energy_level)
+            and (include_premium or not premium)
+        ]
+        merged = heapq.merge(*streams, key=lambda item: (item[0], item[1]))
+        return [action for _, _, action in islice(merged, limit)]
+
+    def duration_bucket(self, duration: int) -> Optional[int]:
+        """
+        Largest duration_min <= `duration`, or None when nothing fits.
+
+        Every duration in the same bucket gets the same `fitting` results
+        (without within_max), so the bucket can stand in for the duration
+        in cache keys.
+        """
+        i = bisect_right(self._boundaries, duration) - 1
+        return self._boundaries[i] if i >= 0 else None
+
+    def best_fit(
+        self,
+        duration: int,
+        category: Optional[str] = None,
+        include_premium: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Closest-fitting action, or None."""
+        matches = self.fitting(duration, category=category, include_premium=include_premium, limit=1)
+        return matches[0] if matches else None
@@ -0,0 +1,80 @@
+"""
+Encoded Response Cache for InFinea.
+Keeps ready-to-send JSON bytes for payloads that only change with the catalog.
+"""
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode to compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class EncodedResponseCache:
+    """
+    LRU of encoded response bodies, all tied to one source version.
+
+    A lookup with a different version than the cached one drops every
+    entry first, so bodies are regenerated only after a catalog change.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, version: str, key: Hashable, build: Callable[[], Any]) -> bytes:
+        """
+        Return the encoded body for `key`, building it on a miss.
+
+        Args:
+            version: Version of the data the body is derived from
+            key: Distinct request shape (e.g. the filter combination)
+            build: Produces the JSON-serializable payload on a miss
+
+        Returns:
+            Encoded JSON bytes
+        """
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+        self.misses += 1
+        body = dumps(build())
+        self._entries[key] = body
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "encoder": "orjson" if orjson is not None else "json",
+        }
@@ -0,0 +1,197 @@
+"""
+LLM Gateway Service for InFinea.
+One application-scoped entry point for LLM calls: bounded concurrency, timeouts, retries and latency metrics.
+"""
+import asyncio
+import logging
+import random
+import time
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional
+
+from .llm_providers import LlmProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_CALL_TIMEOUT = 15.0
+DEFAULT_MAX_RETRIES = 1
+DEFAULT_RETRY_BASE_DELAY = 0.5
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 45]
+
+
+class LlmUnavailableError(Exception):
+    """Raised when no LLM provider is configured; callers should answer 500."""
+
+
+class LatencyHistogram:
+    """Per-bucket latency counts (seconds), plus count and sum."""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or open bucket)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "avg_seconds": round(self.total / self.count, 3) if self.count else None,
+            "p50_le": self.quantile(0.5),
+            "p95_le": self.quantile(0.95),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class LlmGateway:
+    """
+    Shared, bounded access to the LLM provider.
+
+    At most `max_concurrency` calls run at once; further calls wait for
+    a slot. The semaphore replaces a client pool: an LlmChat session
+    cannot serve more than one prompt, so no client object is kept, and
+    connections are reused by the provider library's HTTP client. Each
+    attempt has its own timeout, and failed attempts are retried with
+    exponential backoff and full jitter so that retries of concurrent
+    failures do not arrive together. Latency is recorded per call kind
+    (suggestions, summaries, ...) for the whole call, queueing
+    and retries included.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[LlmProvider] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        call_timeout: float = DEFAULT_CALL_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_base_delay: float = DEFAULT_RETRY_BASE_DELAY
+    ):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    @property
+    def configured(self) -> bool:
+        return self.provider is not None
+
+    def set_provider(self, provider: Optional[LlmProvider]):
+        """Install (or replace, e.g. with a fake in tests) the provider."""
+        self.provider = provider
+        if provider is not None:
+            logger.info(f"LLM gateway using provider '{provider.name}' (max concurrency {self.max_concurrency})")
+
+    async def complete(
+        self,
+        system_message: str,
+        prompt: str,
+        kind: str = "default",
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        Send one prompt through the provider.
+
+        Args:
+            system_message: System prompt
+            prompt: User prompt
+            kind: Label for the latency histogram
+            timeout: Seconds per attempt (call_timeout if None)
+
+        Returns:
+            The model's text answer
+        """
+        if self.provider is None:
+            raise LlmUnavailableError("No LLM provider configured")
+
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            return await self._complete(system_message, prompt, timeout or self.call_timeout)
+        finally:
+            histogram = self._histograms.get(kind)
+            if histogram is None:
+                histogram = self._histograms[kind] = LatencyHistogram()
+            histogram.observe(time.perf_counter() - started)
+
+    async def _complete(self, system_message: str, prompt: str, timeout: float) -> str:
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(system_message, prompt, timeout)
+            except Exception as exc:
+                if isinstance(exc, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if attempt >= self.max_retries:
+                    self.errors += 1
+                    raise
+                delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                logger.warning(f"LLM call failed ({exc!r}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, system_message: str, prompt: str, timeout: float) -> str:
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.attempts += 1
+        try:
+            return await asyncio.wait_for(self.provider.complete(system_message, prompt), timeout)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def close(self):
+        if self.provider is not None:
+            await self.provider.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider.name if self.provider else None,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_in_flight": self.peak_in_flight,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "latency": {kind: h.stats() for kind, h in self._histograms.items()},
+        }
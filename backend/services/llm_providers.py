@@ -0,0 +1,167 @@
+"""
+LLM Providers for InFinea.
+Backends behind the LLM gateway: the hosted model, and a deterministic local fake for tests and benchmarks.
+"""
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_NAMES = ("emergent", "fake")
+
+
+class LlmProvider:
+    """
+    Backend behind the gateway.
+
+    A provider turns one (system message, prompt) pair into the model's
+    text answer. It is created once at startup and shared by every
+    request, so anything expensive (imports, clients, keys) belongs in
+    __init__.
+    """
+
+    name = "base"
+
+    async def complete(self, system_message: str, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def close(self):
+        """Release provider resources at shutdown."""
+
+
+class EmergentLlmProvider(LlmProvider):
+    """
+    emergentintegrations LlmChat.
+
+    LlmChat keeps the conversation history of its session, so a chat
+    object is only reused for one prompt; the module import and
+    configuration happen once, and HTTP connections are pooled by the
+    library's shared client.
+    """
+
+    name = "emergent"
+
+    def __init__(self, api_key: str, provider: str = "openai", model: str = "gpt-5.2"):
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+        self._chat_class = LlmChat
+        self._message_class = UserMessage
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model
+
+    async def complete(self, system_message: str, prompt: str) -> str:
+        chat = self._chat_class(
+            api_key=self.api_key,
+            session_id=f"infinea_{time.time_ns()}_{random.getrandbits(32):08x}",
+            system_message=system_message
+        )
+        chat.with_model(self.provider, self.model)
+        return await chat.send_message(self._message_class(text=prompt))
+
+
+class FakeLlmError(RuntimeError):
+    """Injected provider failure."""
+
+
+class FakeLlmProvider(LlmProvider):
+    """
+    Local stand-in with a configurable latency distribution, error rate
+    and response size.
+
+    Latency is log-normal around `latency_ms` (the median) with shape
+    `latency_sigma`; 0 gives a constant latency. Answers are valid JSON
+    in the shape the endpoint asks for: a suggestion picks titles from
+    the actions listed in the prompt, a summary fills every field. Draws
+    come from one generator seeded with `seed`, so a run with the same
+    call order replays the same latencies, errors and answers.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        response_chars: int = 400,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    async def complete(self, system_message: str, prompt: str) -> str:
+        self.calls += 1
+        # Draw everything up front so concurrent calls don't interleave draws
+        latency = self.latency_ms * math.exp(self.latency_sigma * self._rng.gauss(0, 1)) / 1000
+        fails = self._rng.random() < self.error_rate
+        pick = self._rng.random()
+
+        await asyncio.sleep(latency)
+        if fails:
+            self.errors += 1
+            raise FakeLlmError(f"Injected failure after {latency * 1000:.0f} ms")
+        if '"weekly_insight"' in prompt:
+            return self._summary()
+        return self._suggestion(prompt, pick)
+
+    def _filler(self, used: int) -> str:
+        size = max(self.response_chars - used, 0)
+        return ("Lorem ipsum dolor sit amet. " * (size // 28 + 1))[:size]
+
+    def _suggestion(self, prompt: str, pick: float) -> str:
+        # Action lines look like "- Title (category, 2-5min, énergie: low): ..."
+        titles = [
+            line[2:line.index(" (")] for line in prompt.splitlines()
+            if line.startswith("- ") and " (" in line
+        ]
+        start = int(pick * len(titles)) if titles else 0
+        chosen = titles[start:] + titles[:start]
+        answer = {
+            "top_pick": chosen[0] if chosen else "Respiration profonde",
+            "reasoning": "",
+            "alternatives": chosen[1:3],
+        }
+        answer["reasoning"] = self._filler(len(json.dumps(answer, ensure_ascii=False)))
+        return json.dumps(answer, ensure_ascii=False)
+
+    def _summary(self) -> str:
+        answer = {
+            "weekly_insight": "",
+            "patterns_identified": ["Sessions courtes régulières"],
+            "strengths": ["Constance"],
+            "areas_for_growth": ["Varier les catégories"],
+            "personalized_tip": "Gardez un créneau fixe chaque jour.",
+            "mood_trend": "stable",
+        }
+        answer["weekly_insight"] = self._filler(len(json.dumps(answer, ensure_ascii=False)))
+        return json.dumps(answer, ensure_ascii=False)
+
+
+def create_llm_provider(name: str, api_key: Optional[str] = None, **fake_options) -> Optional[LlmProvider]:
+    """
+    Provider by name.
+
+    Args:
+        name: "emergent" (needs api_key) or "fake"
+        api_key: EMERGENT_LLM_KEY
+        fake_options: FakeLlmProvider keyword arguments
+
+    Returns:
+        The provider, or None when "emergent" has no key
+    """
+    if name == "fake":
+        return FakeLlmProvider(**fake_options)
+    if name == "emergent":
+        return EmergentLlmProvider(api_key) if api_key else None
+    raise ValueError(f"Unknown LLM provider '{name}', expected one of {PROVIDER_NAMES}")
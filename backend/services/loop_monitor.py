@@ -0,0 +1,53 @@
+"""
+Event Loop Monitor for InFinea.
+Measures how late the event loop runs scheduled callbacks (blocking code, CPU saturation).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional
+
+from .llm_gateway import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.1
+# Lag bucket upper bounds (seconds)
+LAG_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1]
+
+
+class EventLoopLagMonitor:
+    """
+    Background task that sleeps `interval` seconds in a loop and records
+    how much later than requested it wakes up. Anything that holds the
+    loop (sync I/O, heavy CPU in a handler) shows up as lag.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.histogram = LatencyHistogram(LAG_BUCKETS)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - expected, 0.0)
+            self.histogram.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.histogram.stats()
+        stats["max_seconds"] = round(self.max_lag, 4)
+        stats["interval_seconds"] = self.interval
+        return stats
@@ -0,0 +1,91 @@
+"""
+Password Hasher Service for InFinea.
+Runs bcrypt on a bounded worker pool so hashing never blocks the event loop.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUNDS = 12
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+
+
+class HasherBusyError(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+def get_hash_rounds(hashed: str) -> Optional[int]:
+    """Extract the cost factor from a modular-crypt bcrypt hash ($2b$12$...)."""
+    parts = hashed.split('$')
+    if len(parts) < 4:
+        return None
+    try:
+        return int(parts[2])
+    except ValueError:
+        return None
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing on a dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so a small pool keeps the event
+    loop responsive. At most `max_pending` calls may be queued or running;
+    beyond that HasherBusyError is raised immediately instead of letting
+    login latency grow without bound.
+    """
+
+    def __init__(
+        self,
+        rounds: int = DEFAULT_ROUNDS,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.rejected = 0
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusyError("Password hashing queue is full")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost factor."""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = await self._run(bcrypt.hashpw, password.encode(), salt)
+        return hashed.decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash."""
+        return await self._run(bcrypt.checkpw, password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when the stored hash was made with a different cost factor."""
+        return get_hash_rounds(hashed) != self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
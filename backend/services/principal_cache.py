@@ -0,0 +1,137 @@
+"""
+Principal Cache Service for InFinea.
+Bounded TTL/LRU cache of authenticated user documents, keyed by token hash.
+"""
+import copy
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def hash_token(token: str) -> str:
+    """Hash a session token so raw credentials never sit in memory as keys."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """
+    In-process cache of resolved principals for get_current_user.
+
+    Entries expire after `ttl_seconds` (or earlier if the underlying session
+    or JWT expires first) and the least recently used entry is evicted once
+    `max_entries` is reached. The cache is per-process: the TTL bounds how
+    stale another worker's view can get after a write elsewhere.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached user for `token`, or None on miss."""
+        key = hash_token(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Handlers mutate nested fields (e.g. onboarding profile) in place
+        return copy.deepcopy(user)
+
+    def put(self, token: str, user: Dict[str, Any], expires_at: Optional[float] = None):
+        """
+        Cache a resolved user.
+
+        Args:
+            token: Raw session token or JWT
+            user: User document (without _id)
+            expires_at: Optional absolute expiry as a unix timestamp; the
+                entry never outlives the credential it was resolved from
+        """
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+            if ttl <= 0:
+                return
+
+        key = hash_token(token)
+        if key in self._entries:
+            self._remove(key)
+
+        user_id = user.get("user_id")
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(user))
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate_token(self, token: str):
+        """Drop the entry for a single token (e.g. on logout)."""
+        key = hash_token(token)
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached token of a user after their document changed."""
+        keys = self._keys_by_user.pop(user_id, None)
+        if not keys:
+            return
+        for key in keys:
+            self._entries.pop(key, None)
+        self.invalidations += len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring; every hit is one or two avoided DB reads."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[1].get("user_id")
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
@@ -0,0 +1,244 @@
+"""
+Vectorized Scoring Engine for InFinea.
+Scores a batch of request contexts against the whole micro-action catalog with NumPy.
+"""
+import logging
+from typing import List, Dict, Any, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from .suggestion_ranking import ENERGY_SCALE
+
+logger = logging.getLogger(__name__)
+
+# Same points as suggestion_ranking.score_action
+SUGGESTION_WEIGHTS = {"within_max": 10, "fits": 5, "energy_exact": 8, "energy_near": 4, "category": 6}
+# match_action_to_slot: the slot's category first, then the closest fit
+SLOT_WEIGHTS = {"category": 1}
+
+# Cells scored per chunk (rows x actions), keeps each temporary array around 4 MB
+CHUNK_CELLS = 1 << 20
+# Up to this k, top-k is k argmax passes; argpartition degrades on the many
+# equal keys of ineligible actions and only pays off for larger k
+ARGMAX_MAX_K = 8
+
+# Ranking key layout: score | position in closeness order, larger is better
+_POSITION_BITS = 21
+_POSITION_MAX = (1 << _POSITION_BITS) - 1
+_INELIGIBLE = -(1 << 20)
+
+NO_CATEGORY = -1
+UNKNOWN_CATEGORY = -2
+
+
+class ScoringEngine:
+    """
+    Column-array copy of the catalog for batch ranking.
+
+    Every action gets a score from the weights (time fit, energy match,
+    category match); ties are broken by closeness of fit
+    (available_time - duration_min), then by catalog order, which is the
+    order the scalar rankers produce with their stable sorts. Only actions
+    with duration_min <= available_time are eligible.
+
+    Columns are stored in closeness order (duration_min descending, then
+    catalog order), so the tie-breakers collapse into the column position
+    and the fitting actions of a context are a suffix of the columns.
+    Energy, category and premium only matter through their combination,
+    so they are scored once per combination and gathered per action.
+    """
+
+    def __init__(self, actions: List[Dict[str, Any]]):
+        if np is None:
+            raise RuntimeError("ScoringEngine requires numpy")
+        if len(actions) > _POSITION_MAX:
+            raise ValueError(f"ScoringEngine supports at most {_POSITION_MAX} actions")
+
+        self.actions = actions
+        self.category_codes: Dict[str, int] = {}
+        for action in actions:
+            self.category_codes.setdefault(action.get("category"), len(self.category_codes))
+
+        order = sorted(range(len(actions)), key=lambda i: (-actions[i]["duration_min"], i))
+        ordered = [actions[i] for i in order]
+        self._positions = np.array(order, dtype=np.int64)
+        self._duration_min = np.array([a["duration_min"] for a in ordered], dtype=np.int32)
+        self._neg_duration_min = -self._duration_min
+        self._duration_max = np.array([a["duration_max"] for a in ordered], dtype=np.int32)
+        self._rank = (_POSITION_MAX - np.arange(len(ordered))).astype(np.int32)
+
+        # Class = (category, energy ordinal, premium flag)
+        n_categories = max(len(self.category_codes), 1)
+        self._class = np.array([
+            (self.category_codes[a.get("category")] * 4 + ENERGY_SCALE.get(a.get("energy_level"), 2)) * 2
+            + bool(a.get("is_premium", False))
+            for a in ordered
+        ], dtype=np.intp)
+        classes = np.arange(n_categories * 8)
+        self._class_premium = (classes % 2).astype(bool)
+        self._class_energy = ((classes // 2) % 4).astype(np.int16)
+        self._class_category = (classes // 8).astype(np.int16)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def encode_category(self, category: Optional[str]) -> int:
+        if not category:
+            return NO_CATEGORY
+        return self.category_codes.get(category, UNKNOWN_CATEGORY)
+
+    def top_k_batch(
+        self,
+        available_times: Sequence[int],
+        energy_levels: Optional[Sequence[Optional[str]]] = None,
+        categories: Optional[Sequence[Optional[str]]] = None,
+        k: int = 3,
+        include_premium: bool = True,
+        require_category: bool = False,
+        require_energy: bool = False,
+        weights: Dict[str, int] = SUGGESTION_WEIGHTS
+    ) -> "np.ndarray":
+        """
+        Rank the catalog for many contexts in vectorized chunks.
+
+        Args:
+            available_times: Available minutes per context
+            energy_levels: Energy level per context (None entries score no energy points)
+            categories: Preferred category per context (None entries score no category points)
+            k: Number of actions to return per context
+            include_premium: False to drop premium actions
+            require_category: Keep only the context's category, when it has one
+            require_energy: Keep only the context's energy level, when it has one
+            weights: Points per criterion, see SUGGESTION_WEIGHTS
+
+        Returns:
+            (len(available_times), k) array of catalog positions, best first,
+            padded with -1 when fewer than k actions are eligible
+        """
+        times = np.asarray(available_times, dtype=np.int32)
+        m, n = len(times), len(self.actions)
+        energies = np.array(
+            [ENERGY_SCALE.get(e, 2) if e else 0 for e in energy_levels] if energy_levels is not None else [0] * m,
+            dtype=np.int16
+        ).reshape(m)
+        cats = np.array(
+            [self.encode_category(c) for c in categories] if categories is not None else [NO_CATEGORY] * m,
+            dtype=np.int16
+        ).reshape(m)
+
+        if m == 0 or n == 0 or k <= 0:
+            return np.full((m, max(k, 0)), -1, dtype=np.int64)
+
+        if m == 1:
+            u_times, u_energies, u_cats, inverse = times, energies, cats, np.zeros(1, dtype=np.intp)
+        else:
+            # Identical contexts are ranked once; np.unique sorts them by time,
+            # which keeps each chunk's fitting suffix (the columns it touches) short
+            radix = len(self.category_codes) + 2
+            codes = (times.astype(np.int64) * 4 + energies) * radix + (cats + 2)
+            unique, inverse = np.unique(codes, return_inverse=True)
+            u_times = (unique // (4 * radix)).astype(np.int32)
+            u_energies = ((unique // radix) % 4).astype(np.int16)
+            u_cats = (unique % radix - 2).astype(np.int16)
+
+        ranked = np.full((len(u_times), k), -1, dtype=np.int64)
+        rows_per_chunk = max(1, CHUNK_CELLS // n)
+        for start in range(0, len(u_times), rows_per_chunk):
+            stop = min(start + rows_per_chunk, len(u_times))
+            lut = self._class_points(
+                u_energies[start:stop], u_cats[start:stop],
+                include_premium, require_category, require_energy, weights
+            )
+            ranked[start:stop] = self._rank_chunk(u_times[start:stop], lut, k, weights)
+
+        result = ranked[inverse.reshape(-1)]
+        found = result >= 0
+        result[found] = self._positions[result[found]]
+        return result
+
+    def top_k(
+        self,
+        available_time: int,
+        energy_level: Optional[str] = None,
+        category: Optional[str] = None,
+        k: int = 3,
+        **options
+    ) -> List[Dict[str, Any]]:
+        """Ranked actions for a single context; options as in top_k_batch."""
+        positions = self.top_k_batch([available_time], [energy_level], [category], k=k, **options)[0]
+        return [self.actions[i] for i in positions if i >= 0]
+
+    def _class_points(self, energies, cats, include_premium, require_category, require_energy, weights):
+        """(rows, classes) energy + category points, _INELIGIBLE for filtered-out classes."""
+        has_energy = (energies > 0)[:, None]
+        diff = np.abs(self._class_energy[None, :] - energies[:, None])
+        exact = has_energy & (diff == 0)
+        cat_match = self._class_category[None, :] == cats[:, None]
+
+        points = (
+            exact * weights.get("energy_exact", 0)
+            + (has_energy & (diff == 1)) * weights.get("energy_near", 0)
+            + cat_match * weights.get("category", 0)
+        ).astype(np.int32)
+
+        eligible = np.ones(points.shape, dtype=bool)
+        if not include_premium:
+            eligible &= ~self._class_premium[None, :]
+        if require_category:
+            eligible &= cat_match | (cats == NO_CATEGORY)[:, None]
+        if require_energy:
+            eligible &= exact | ~has_energy
+        return np.where(eligible, points, _INELIGIBLE)
+
+    def _rank_chunk(self, times, lut, k, weights):
+        """Top-k column positions per row of the chunk, -1 padded."""
+        rows = len(times)
+        # Columns are in duration_min descending order: fitting actions start at `first`
+        firsts = np.searchsorted(self._neg_duration_min, -times, side="left")
+        first = int(firsts.min())
+        within_points = np.int32(weights.get("within_max", 0))
+        fits_points = np.int32(weights.get("fits", 0))
+
+        duration_max = self._duration_max[first:]
+        static = lut[:, self._class[first:]]
+        score = static + np.where(duration_max[None, :] >= times[:, None], within_points, fits_points)
+        eligible = (static >= 0) & (np.arange(first, first + len(duration_max))[None, :] >= firsts[:, None])
+        keys = np.where(eligible, (score << _POSITION_BITS) | self._rank[None, first:], -1)
+
+        positions = _top_k(keys, k)
+        return np.where(positions >= 0, positions + first, -1)
+
+
+def _top_k(keys: "np.ndarray", k: int) -> "np.ndarray":
+    """Column positions of the k largest non-negative keys per row, best first."""
+    rows, n = keys.shape
+    result = np.full((rows, k), -1, dtype=np.int64)
+    width = min(k, n)
+    row_index = np.arange(rows)
+
+    if k <= ARGMAX_MAX_K:
+        keys = keys.copy()
+        for j in range(width):
+            best = np.argmax(keys, axis=1)
+            found = keys[row_index, best] >= 0
+            result[:, j] = np.where(found, best, -1)
+            keys[row_index, best] = -1
+        return result
+
+    candidates = np.argpartition(keys, n - width, axis=1)[:, n - width:]
+    candidate_keys = np.take_along_axis(keys, candidates, axis=1)
+    order = np.argsort(-candidate_keys, axis=1)
+    ranked = np.take_along_axis(candidates, order, axis=1)
+    ranked_keys = np.take_along_axis(candidate_keys, order, axis=1)
+    result[:, :width] = np.where(ranked_keys >= 0, ranked, -1)
+    return result
+
+
+def build_scoring_engine(actions: List[Dict[str, Any]]) -> Optional[ScoringEngine]:
+    """ScoringEngine over `actions`, or None when numpy is not installed."""
+    if np is None:
+        return None
+    return ScoringEngine(actions)
@@ -0,0 +1,87 @@
+"""
+Single-Flight Service for InFinea.
+Coalesces concurrent identical async calls (e.g. LLM requests) into one execution.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Hashable, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    The first caller for a key starts the call; callers arriving while it
+    is in flight await the same result. The result, or the exception,
+    including a timeout, is delivered to every waiter. Nothing is kept
+    once the call finishes: caching results is the caller's business.
+    """
+
+    def __init__(self, default_timeout: Optional[float] = None):
+        self.default_timeout = default_timeout
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.peak_in_flight = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Await `fn()`, sharing one execution with concurrent callers of `key`.
+
+        Args:
+            key: Identity of the call; equal keys must mean equal results
+            fn: Coroutine function to run when no call for `key` is in flight
+            timeout: Seconds before the shared call fails with TimeoutError,
+                set by the caller that starts it (default_timeout if None)
+
+        Returns:
+            Result of the shared call
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(self._run(key, fn, timeout if timeout is not None else self.default_timeout))
+            # Keep "exception was never retrieved" quiet when every waiter went away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._in_flight[key] = task
+            self.peak_in_flight = max(self.peak_in_flight, len(self._in_flight))
+
+        # A disconnecting waiter must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float]) -> Any:
+        try:
+            if timeout:
+                return await asyncio.wait_for(fn(), timeout)
+            return await fn()
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Single-flight call {key!r} timed out after {timeout}s")
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring; calls - executions is the number of coalesced calls."""
+        return {
+            "in_flight": len(self._in_flight),
+            "peak_in_flight": self.peak_in_flight,
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+        }
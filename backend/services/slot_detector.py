@@ -7,6 +7,9 @@ from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
 import uuid
 
+from .duration_index import DurationIndex
+from .scoring_engine import ScoringEngine, SLOT_WEIGHTS
+
 logger = logging.getLogger(__name__)
 
 # Default slot detection settings
@@ -202,7 +205,8 @@ async def detect_free_slots(
 async def match_action_to_slot(
     slot: Dict,
     available_actions: List[Dict],
-    user_subscription: str = 'free'
+    user_subscription: str = 'free',
+    duration_index: Optional[DurationIndex] = None
 ) -> Optional[Dict]:
     """
     Find the best micro-action for a given slot.
@@ -211,32 +215,66 @@ async def match_action_to_slot(
         slot: The free slot details
         available_actions: List of available micro-actions
         user_subscription: User's subscription tier
+        duration_index: Prebuilt index over available_actions; pass it when
+            matching many slots against the same catalog
     
     Returns:
         Best matching action or None
     """
     duration = slot['duration_minutes']
     category = slot['suggested_category']
+    include_premium = user_subscription != 'free'
     
-    # Filter actions by subscription
-    if user_subscription == 'free':
-        available_actions = [a for a in available_actions if not a.get('is_premium', False)]
+    if duration_index is None:
+        duration_index = DurationIndex(available_actions)
     
-    # Find actions that fit the duration and match category
-    matching_actions = []
-    for action in available_actions:
-        if action['duration_min'] <= duration and action.get('category') == category:
-            matching_actions.append(action)
+    # Prefer actions of the slot's category, closest to the slot duration
+    best = duration_index.best_fit(duration, category=category, include_premium=include_premium)
     
     # If no category match, find any action that fits
-    if not matching_actions:
-        for action in available_actions:
-            if action['duration_min'] <= duration:
-                matching_actions.append(action)
+    if best is None:
+        best = duration_index.best_fit(duration, include_premium=include_premium)
+    
+    return best
+
+
+async def match_actions_to_slots(
+    slots: List[Dict],
+    available_actions: List[Dict],
+    user_subscription: str = 'free',
+    duration_index: Optional[DurationIndex] = None,
+    scoring_engine: Optional[ScoringEngine] = None
+) -> List[Optional[Dict]]:
+    """
+    Find the best micro-action for each slot, same rules as match_action_to_slot.
+    
+    Args:
+        slots: Free slots to match
+        available_actions: List of available micro-actions
+        user_subscription: User's subscription tier
+        duration_index: Prebuilt index over available_actions
+        scoring_engine: Prebuilt ScoringEngine over available_actions; when
+            given, every slot is ranked in one vectorized pass
     
-    # Return the best match (prefer actions closer to slot duration)
-    if matching_actions:
-        matching_actions.sort(key=lambda a: abs(a['duration_min'] - duration))
-        return matching_actions[0]
+    Returns:
+        Best matching action (or None) per slot, in slot order
+    """
+    if scoring_engine is None:
+        if duration_index is None:
+            duration_index = DurationIndex(available_actions)
+        return [
+            await match_action_to_slot(slot, available_actions, user_subscription, duration_index)
+            for slot in slots
+        ]
+    
+    if not slots:
+        return []
     
-    return None
+    positions = scoring_engine.top_k_batch(
+        [slot['duration_minutes'] for slot in slots],
+        categories=[slot['suggested_category'] for slot in slots],
+        k=1,
+        include_premium=user_subscription != 'free',
+        weights=SLOT_WEIGHTS
+    )[:, 0]
+    return [scoring_engine.actions[i] if i >= 0 else None for i in positions]
@@ -121,7 +121,9 @@ async def schedule_slot_notifications(
     user_id: str,
     slots: list,
     actions: list,
-    user_subscription: str = 'free'
+    user_subscription: str = 'free',
+    duration_index=None,
+    scoring_engine=None
 ):
     """
     Schedule notifications for detected free slots.
@@ -132,10 +134,17 @@ async def schedule_slot_notifications(
         slots: List of detected free slots
         actions: List of available micro-actions
         user_subscription: User's subscription tier
+        duration_index: Optional prebuilt DurationIndex over actions
+        scoring_engine: Optional prebuilt ScoringEngine over actions
     """
-    from .slot_detector import match_action_to_slot
+    from .slot_detector import match_actions_to_slots
     
-    for slot in slots:
+    # Match every slot up front (one vectorized pass with a scoring engine)
+    suggested_actions = await match_actions_to_slots(
+        slots, actions, user_subscription, duration_index, scoring_engine
+    )
+    
+    for slot, suggested_action in zip(slots, suggested_actions):
         # Check if notification already exists for this slot
         existing = await db.notifications.find_one({
             "user_id": user_id,
@@ -145,11 +154,6 @@ async def schedule_slot_notifications(
         if existing:
             continue
         
-        # Find matching action
-        suggested_action = await match_action_to_slot(
-            slot, actions, user_subscription
-        )
-        
         # Create notification
         await create_slot_notification(
             db, user_id, slot, suggested_action
@@ -159,16 +163,22 @@ async def schedule_slot_notifications(
         if suggested_action:
             slot['suggested_action_id'] = suggested_action['action_id']
         
-        # Save slot to database
+        # Save slot to database; expires_at lets the TTL index drop past slots
+        slot_end = datetime.fromisoformat(slot['end_time'].replace('Z', '+00:00'))
         await db.detected_free_slots.update_one(
             {"slot_id": slot['slot_id']},
-            {"$set": {**slot, "user_id": user_id}},
+            {"$set": {**slot, "user_id": user_id, "expires_at": slot_end}},
             upsert=True
         )
 
 
 async def cleanup_old_slots(db, user_id: str):
-    """Remove old/expired slots from the database."""
+    """
+    Remove old/expired slots from the database.
+    
+    Not needed on the sync path anymore: the expires_at TTL index on
+    detected_free_slots removes past slots. Kept for manual sweeps.
+    """
     now = datetime.now(timezone.utc)
     
     await db.detected_free_slots.delete_many({
@@ -0,0 +1,174 @@
+"""
+Stats Cache Service for InFinea.
+Bounded read-through cache of /stats payloads, patched in place on session completion.
+"""
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 10000
+RECENT_SESSIONS = 10
+
+# Counters exported in Prometheus text format: (attribute, metric suffix, help)
+COUNTERS = [
+    ("hits", "hits_total", "Lookups answered from the cache"),
+    ("misses", "misses_total", "Lookups that went to the database"),
+    ("patches", "patches_total", "Entries updated in place by a session completion"),
+    ("invalidations", "invalidations_total", "Entries dropped by a write"),
+    ("evictions", "evictions_total", "Entries evicted to stay under max_entries"),
+    ("expirations", "expirations_total", "Entries found past their TTL"),
+]
+
+
+class StatsCache:
+    """
+    Per-user cache of the database part of GET /stats: user_stats
+    counters and the most recent completed sessions.
+
+    complete_session patches a cached entry with the counters it just
+    wrote and the session it closed, so the next view is still served
+    from memory. The TTL is only a safety net for writes made by other
+    processes; the least recently used entry goes once `max_entries` is
+    reached.
+
+    A payload read before a completion must not be cached after it:
+    callers take a read_marker() before reading, and put() drops the
+    payload if the user was written since.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Sequence number of each user's last write (bounded like the entries);
+        # _forgotten is the newest write whose record was evicted
+        self._writes: "OrderedDict[str, int]" = OrderedDict()
+        self._sequence = 0
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.patches = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached payload, or None on miss."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return copy.deepcopy(payload)
+
+    def read_marker(self) -> int:
+        """Marker to pass to put() for a payload read from now on."""
+        return self._sequence
+
+    def put(
+        self,
+        user_id: str,
+        stats: Dict[str, Any],
+        recent_sessions: List[Dict[str, Any]],
+        read_marker: int
+    ):
+        """
+        Cache a freshly read payload.
+
+        Args:
+            user_id: Owner
+            stats: user_stats document
+            recent_sessions: Most recent completed sessions, newest first
+            read_marker: read_marker() taken before the reads
+        """
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        if self._writes.get(user_id, self._forgotten) > read_marker:
+            # Written while we were reading (or can't tell): the payload may predate the write
+            return
+        self._entries.pop(user_id, None)
+        self._entries[user_id] = (
+            time.monotonic() + self.ttl_seconds,
+            copy.deepcopy({"stats": stats, "recent_sessions": recent_sessions[:RECENT_SESSIONS]})
+        )
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def patch(self, user_id: str, stats: Dict[str, Any], session: Dict[str, Any]) -> bool:
+        """
+        Apply a session completion to a cached entry, if there is one.
+
+        Args:
+            user_id: Owner
+            stats: user_stats document after the completion
+            session: The completed session document
+
+        Returns:
+            True if an entry was patched
+        """
+        self._record_write(user_id)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+        _, payload = entry
+        payload["stats"] = copy.deepcopy(stats)
+        payload["recent_sessions"] = [copy.deepcopy(session)] + payload["recent_sessions"][:RECENT_SESSIONS - 1]
+        self.patches += 1
+        return True
+
+    def invalidate(self, user_id: str):
+        self._record_write(user_id)
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def _record_write(self, user_id: str):
+        self._sequence += 1
+        self._writes.pop(user_id, None)
+        self._writes[user_id] = self._sequence
+        while len(self._writes) > max(self.max_entries, 1):
+            _, self._forgotten = self._writes.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring; every hit is two avoided DB reads."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            **{attribute: getattr(self, attribute) for attribute, _, _ in COUNTERS},
+        }
+
+    def prometheus(self, prefix: str = "infinea_stats_cache") -> str:
+        """Counters and size in the Prometheus text exposition format."""
+        lines = []
+        for attribute, suffix, description in COUNTERS:
+            lines += [
+                f"# HELP {prefix}_{suffix} {description}",
+                f"# TYPE {prefix}_{suffix} counter",
+                f"{prefix}_{suffix} {getattr(self, attribute)}",
+            ]
+        lines += [
+            f"# HELP {prefix}_entries Cached users",
+            f"# TYPE {prefix}_entries gauge",
+            f"{prefix}_entries {len(self._entries)}",
+        ]
+        return "\n".join(lines) + "\n"
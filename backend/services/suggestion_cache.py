@@ -0,0 +1,145 @@
+"""
+Suggestion Cache Service for InFinea.
+TTL/LRU cache of /suggestions responses keyed on a normalized request context.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+
+from .encoded_responses import dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def suggestion_context_key(
+    catalog_version: int,
+    duration_bucket: Optional[int],
+    energy_level: str,
+    preferred_category: Optional[str],
+    include_premium: bool,
+    recent_categories: Iterable[str]
+) -> tuple:
+    """
+    Normalize a suggestion request into a cache key.
+
+    Args:
+        catalog_version: Version of the action catalog the answer was built from
+        duration_bucket: Available time snapped to the catalog's duration
+            boundaries (DurationIndex.duration_bucket)
+        energy_level: Requested energy level
+        preferred_category: Requested category, if any
+        include_premium: Whether premium actions were offered
+        recent_categories: Categories of the user's last sessions; order is
+            ignored so the same mix of recent activity shares an entry
+
+    Returns:
+        Hashable key
+    """
+    recent_signature = tuple(sorted(c for c in recent_categories if c))
+    return (
+        catalog_version, duration_bucket, energy_level,
+        preferred_category or None, include_premium, recent_signature
+    )
+
+
+class SuggestionCache:
+    """
+    In-process cache of LLM suggestion responses.
+
+    Entries expire after `ttl_seconds`; the least recently used entries
+    are evicted once either `max_entries` or `max_bytes` (measured on the
+    JSON-encoded response) is exceeded. Each entry remembers how long the
+    LLM took to produce it, so hits can report the latency they saved.
+    Cached responses are shared: callers must treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_llm_seconds = 0.0
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        """Return the cached response for `key`, or None on miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, response, size, llm_seconds = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_llm_seconds += llm_seconds
+        return response
+
+    def put(self, key: tuple, response: Dict[str, Any], llm_seconds: float = 0.0):
+        """
+        Cache a response.
+
+        Args:
+            key: Key from suggestion_context_key
+            response: JSON-serializable /suggestions response
+            llm_seconds: Time the LLM call took, credited on every later hit
+        """
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        size = len(dumps(response))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response, size, llm_seconds)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring; every hit is one avoided LLM round-trip."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "saved_llm_seconds": round(self.saved_llm_seconds, 3),
+        }
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
@@ -0,0 +1,80 @@
+"""
+Rule-Based Suggestion Ranking for InFinea.
+Scores micro-actions against a suggestion request without calling the LLM.
+"""
+from typing import List, Dict, Any, Optional
+
+ENERGY_SCALE = {"low": 1, "medium": 2, "high": 3}
+
+REASONING_BY_ENERGY = {
+    "low": "Parfait pour un moment de calme. Cette action demande peu d'effort.",
+    "medium": "Un bon équilibre entre effort et détente pour ce moment.",
+    "high": "Vous avez l'énergie, profitons-en pour une action dynamique !"
+}
+DEFAULT_REASONING = "Basé sur vos préférences et le temps disponible."
+
+
+def score_action(
+    action: Dict[str, Any],
+    available_time: int,
+    energy_level: str,
+    preferred_category: Optional[str] = None
+) -> int:
+    """
+    Score one action for a request: time fit, then energy, then category.
+
+    Args:
+        action: Micro-action document
+        available_time: Available minutes
+        energy_level: low, medium or high
+        preferred_category: Category the user asked for, if any
+
+    Returns:
+        Score, higher is better
+    """
+    score = 0
+    # Time fit
+    if action["duration_min"] <= available_time <= action["duration_max"]:
+        score += 10
+    elif action["duration_min"] <= available_time:
+        score += 5
+    # Energy match
+    user_energy = ENERGY_SCALE.get(energy_level, 2)
+    action_energy = ENERGY_SCALE.get(action["energy_level"], 2)
+    if action_energy == user_energy:
+        score += 8
+    elif abs(action_energy - user_energy) == 1:
+        score += 4
+    # Category preference
+    if preferred_category and action["category"] == preferred_category:
+        score += 6
+    return score
+
+
+def rule_based_suggestion(
+    actions: List[Dict[str, Any]],
+    available_time: int,
+    energy_level: str,
+    preferred_category: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build a /suggestions response from the top 3 scored actions.
+
+    Ties keep the input order, so actions already ranked by closeness of
+    fit stay in that order among equal scores.
+    """
+    scored = sorted(
+        actions,
+        key=lambda a: score_action(a, available_time, energy_level, preferred_category),
+        reverse=True
+    )
+    return suggestion_response(scored[:3], energy_level)
+
+
+def suggestion_response(top: List[Dict[str, Any]], energy_level: str) -> Dict[str, Any]:
+    """Wrap already ranked actions into a /suggestions response."""
+    return {
+        "suggestion": top[0]["title"] if top else "Respiration profonde",
+        "reasoning": REASONING_BY_ENERGY.get(energy_level, DEFAULT_REASONING),
+        "recommended_actions": top
+    }
@@ -0,0 +1,170 @@
+"""
+Suggestion Table Service for InFinea.
+Precomputed rule-based top-N actions for every (duration, energy, category, tier) cell.
+"""
+import logging
+import time
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from .scoring_engine import ScoringEngine
+from .suggestion_ranking import ENERGY_SCALE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 3
+
+# Energy axis: no preference, then the ENERGY_SCALE ordinals
+ENERGY_AXIS = [None, "low", "medium", "high"]
+
+
+class SuggestionTable:
+    """
+    Lookup table of ScoringEngine rankings (same filters as /suggestions).
+
+    The ranking only changes where an action starts fitting
+    (duration_min) or stops fitting within its range (duration_max + 1),
+    so minutes are grouped into buckets between those boundaries and each
+    bucket is ranked once. Reads are a few array lookups.
+
+    Cells hold catalog positions; the table must be rebuilt or updated
+    whenever the engine's action list changes.
+    """
+
+    def __init__(self, engine: ScoringEngine, top_n: int = DEFAULT_TOP_N):
+        self.top_n = top_n
+        self.build_ms = 0.0
+        self.updated_cells = 0
+        self._build(engine)
+
+    def lookup(
+        self,
+        available_time: int,
+        energy_level: Optional[str],
+        category: Optional[str],
+        include_premium: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranked actions for a request, best first.
+
+        Args:
+            available_time: Available minutes
+            energy_level: Requested energy level, keeps only that level
+            category: Requested category, keeps only that category
+            include_premium: False for free users
+
+        Returns:
+            Up to top_n actions
+        """
+        bucket = self._bucket(available_time)
+        if bucket < 0:
+            return []
+        if category and category not in self._category_index:
+            return []
+        e = ENERGY_SCALE.get(energy_level, 2) if energy_level else 0
+        c = self._category_index.get(category, 0) if category else 0
+        positions = self._cells[bucket, e, c, int(include_premium)]
+        return [self._engine.actions[i] for i in positions if i >= 0]
+
+    def update(self, engine: ScoringEngine, changed: List[Dict[str, Any]]) -> int:
+        """
+        Re-rank only the cells that the changed actions can appear in.
+
+        Args:
+            engine: Engine over the new action list (positions of unchanged
+                actions must be the same as before)
+            changed: Old and new versions of every added or edited action
+
+        Returns:
+            Number of cells recomputed
+        """
+        boundaries, categories = self._axes(engine)
+        if boundaries != self._boundaries or categories != self._categories:
+            # New duration boundaries or categories reshape the table
+            self._build(engine)
+            return int(self._cells[..., 0].size)
+
+        started = time.perf_counter()
+        self._engine = engine
+        first_bucket = min(self._bucket(a["duration_min"]) for a in changed)
+        energies = {0} | {ENERGY_SCALE.get(a.get("energy_level"), 2) for a in changed}
+        cats = {0} | {self._category_index.get(a.get("category"), 0) for a in changed}
+        tiers = {1} | ({0} if not all(a.get("is_premium", False) for a in changed) else set())
+
+        buckets = range(max(first_bucket, 0), len(self._boundaries))
+        cells = [(b, e, c) for b in buckets for e in sorted(energies) for c in sorted(cats)]
+        for tier in sorted(tiers):
+            ranked = self._rank(cells, bool(tier))
+            for (b, e, c), positions in zip(cells, ranked):
+                self._cells[b, e, c, tier] = positions
+
+        count = len(cells) * len(tiers)
+        self.updated_cells += count
+        logger.info(f"Suggestion table: {count} cells updated in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buckets": len(self._boundaries),
+            "cells": int(self._cells[..., 0].size),
+            "bytes": int(self._cells.nbytes),
+            "top_n": self.top_n,
+            "build_ms": round(self.build_ms, 1),
+            "updated_cells": self.updated_cells,
+        }
+
+    def _build(self, engine: ScoringEngine):
+        started = time.perf_counter()
+        self._engine = engine
+        self._boundaries, self._categories = self._axes(engine)
+        self._category_index = {category: i + 1 for i, category in enumerate(self._categories)}
+
+        # Direct minute -> bucket map up to the last boundary
+        last = self._boundaries[-1] if self._boundaries else 0
+        self._bucket_of_minute = np.array(
+            [bisect_right(self._boundaries, t) - 1 for t in range(last + 1)], dtype=np.int32
+        )
+
+        shape = (len(self._boundaries), len(ENERGY_AXIS), len(self._categories) + 1, 2, self.top_n)
+        self._cells = np.full(shape, -1, dtype=np.int32)
+        cells = [
+            (b, e, c)
+            for b in range(shape[0]) for e in range(shape[1]) for c in range(shape[2])
+        ]
+        for tier in (0, 1):
+            ranked = self._rank(cells, bool(tier))
+            if len(cells):
+                self._cells[:, :, :, tier] = ranked.reshape(shape[0], shape[1], shape[2], self.top_n)
+
+        self.build_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Suggestion table built: {len(cells) * 2} cells in {self.build_ms:.1f} ms")
+
+    def _rank(self, cells: List[tuple], include_premium: bool) -> "np.ndarray":
+        categories = [None] + self._categories
+        return self._engine.top_k_batch(
+            [self._boundaries[b] for b, _, _ in cells],
+            [ENERGY_AXIS[e] for _, e, _ in cells],
+            [categories[c] for _, _, c in cells],
+            k=self.top_n,
+            include_premium=include_premium,
+            require_category=True,
+            require_energy=True
+        )
+
+    def _bucket(self, minutes: int) -> int:
+        if not self._boundaries or minutes < self._boundaries[0]:
+            return -1
+        return int(self._bucket_of_minute[min(minutes, len(self._bucket_of_minute) - 1)])
+
+    @staticmethod
+    def _axes(engine: ScoringEngine):
+        boundaries = sorted(
+            {a["duration_min"] for a in engine.actions} | {a["duration_max"] + 1 for a in engine.actions}
+        )
+        categories = sorted(c for c in engine.category_codes if c)
+        return boundaries, categories
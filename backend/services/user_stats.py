@@ -0,0 +1,197 @@
+"""
+User Stats Service for InFinea.
+Per-user counters (sessions, minutes, per-category totals, longest streak) kept up to date on session completion.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone, date, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Bucket for sessions without a category (same label as the reflections summary)
+UNCATEGORIZED = "autre"
+
+
+def empty_stats(user_id: str) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "total_sessions": 0,
+        "total_time": 0,
+        "sessions_by_category": {},
+        "time_by_category": {},
+        "longest_streak": 0,
+    }
+
+
+def longest_run(days: List[str]) -> int:
+    """Longest run of consecutive calendar days in a list of ISO dates."""
+    longest = current = 0
+    previous: Optional[date] = None
+    for day in sorted(set(days)):
+        try:
+            parsed = date.fromisoformat(day)
+        except (TypeError, ValueError):
+            continue
+        current = current + 1 if previous and parsed - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = parsed
+    return longest
+
+
+async def record_completion(db, user_id: str, category: Optional[str], minutes: int, streak: int) -> Dict[str, Any]:
+    """
+    Count one completed session in a single upsert.
+
+    Args:
+        db: Database
+        user_id: Owner of the session
+        category: Session category
+        minutes: Session duration
+        streak: User's streak after this session
+
+    Returns:
+        The updated stats document
+    """
+    category = category or UNCATEGORIZED
+    return await db.user_stats.find_one_and_update(
+        {"user_id": user_id},
+        {
+            "$inc": {
+                "total_sessions": 1,
+                "total_time": minutes,
+                f"sessions_by_category.{category}": 1,
+                f"time_by_category.{category}": minutes,
+            },
+            "$max": {"longest_streak": streak},
+            "$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
+        },
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def get_user_stats_doc(db, user_id: str) -> Dict[str, Any]:
+    """Stats document of a user, rebuilt from history the first time it is missing."""
+    stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if stats is None:
+        stats = await rebuild_user_stats(db, user_id, overwrite=False)
+    return stats
+
+
+async def rebuild_user_stats(db, user_id: str, overwrite: bool = True) -> Dict[str, Any]:
+    """
+    Recompute a user's stats document from user_sessions_history.
+
+    With overwrite=False the history is merged into an existing document
+    counter by counter with $max: a document created by live completions
+    only counts sessions that are also in the history, so the history
+    totals win, and a completion recorded while the history was being
+    read is not undone.
+    """
+    match = {"$match": {"user_id": user_id, "completed": True}}
+    by_category = await db.user_sessions_history.aggregate([
+        match,
+        {"$group": {"_id": "$category", "count": {"$sum": 1}, "total_time": {"$sum": "$actual_duration"}}}
+    ]).to_list(None)
+    by_day = await db.user_sessions_history.aggregate([
+        match,
+        {"$group": {"_id": {"$substr": ["$completed_at", 0, 10]}}}
+    ]).to_list(None)
+    user = await db.users.find_one({"user_id": user_id}, {"_id": 0, "streak_days": 1})
+
+    stats = empty_stats(user_id)
+    for row in by_category:
+        category = row["_id"] or UNCATEGORIZED
+        stats["sessions_by_category"][category] = stats["sessions_by_category"].get(category, 0) + row["count"]
+        stats["time_by_category"][category] = stats["time_by_category"].get(category, 0) + (row["total_time"] or 0)
+        stats["total_sessions"] += row["count"]
+        stats["total_time"] += row["total_time"] or 0
+    stats["longest_streak"] = max(
+        longest_run([row["_id"] for row in by_day]),
+        (user or {}).get("streak_days", 0)
+    )
+    stats["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+    if overwrite:
+        await db.user_stats.replace_one({"user_id": user_id}, stats, upsert=True)
+        stats.pop("_id", None)
+        return stats
+
+    counters = {"total_sessions": stats["total_sessions"], "total_time": stats["total_time"],
+                "longest_streak": stats["longest_streak"]}
+    on_insert = {"updated_at": stats["updated_at"]}
+    for field in ("sessions_by_category", "time_by_category"):
+        for category, value in stats[field].items():
+            counters[f"{field}.{category}"] = value
+        if not stats[field]:
+            on_insert[field] = {}
+    return await db.user_stats.find_one_and_update(
+        {"user_id": user_id},
+        {"$max": counters, "$setOnInsert": on_insert},
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def backfill_user_stats(db, merge: bool = False) -> int:
+    """
+    Rebuild the stats document of every user.
+
+    Args:
+        db: Database
+        merge: Merge the history into existing documents with $max
+            (rebuild_user_stats overwrite=False) instead of replacing them
+
+    Returns:
+        Number of documents rebuilt
+    """
+    rebuilt = 0
+    async for user in db.users.find({}, {"_id": 0, "user_id": 1}):
+        await rebuild_user_stats(db, user["user_id"], overwrite=not merge)
+        rebuilt += 1
+        if rebuilt % 1000 == 0:
+            logger.info(f"User stats: {rebuilt} users rebuilt")
+    return rebuilt
+
+
+async def merge_user_stats_history(db) -> int:
+    """
+    Migration entry point: history merged into every user's stats.
+
+    Users who completed a session before the migration ran already have
+    a document that only counts the live completions, so none is skipped.
+    """
+    return await backfill_user_stats(db, merge=True)
+
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL') or os.environ.get('MONGODB_URI', ''), tz_aware=True)
+    db = client[os.environ.get('DB_NAME', 'infinea')]
+    try:
+        if args.user:
+            print(await rebuild_user_stats(db, args.user))
+        else:
+            print(f"Rebuilt {await backfill_user_stats(db, merge=args.merge)} user stats documents")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m services.user_stats [--user USER_ID] [--merge]
+    parser = argparse.ArgumentParser(description="Rebuild user_stats from user_sessions_history")
+    parser.add_argument("--user", help="rebuild a single user")
+    parser.add_argument("--merge", action="store_true", help="merge into existing documents instead of replacing them")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -4,6 +4,7 @@ InFinea Backend API Testing Suite
 Tests all endpoints including auth, actions, AI suggestions, sessions, and payments
 """
 
+import os
 import requests
 import json
 import sys
@@ -146,7 +147,7 @@ class InFineaAPITester:
 
     def test_seed_actions(self):
         """Test seeding micro-actions"""
-        response = self.make_request('POST', 'admin/seed')
+        response = self.make_request('POST', 'admin/seed', headers={'X-Admin-Key': os.environ.get('ADMIN_API_KEY', '')})
         if response and response.status_code == 200:
             data = response.json()
             self.log_test("Seed Actions", True, data.get('message', ''))
@@ -10,7 +10,9 @@ const STATIC_ASSETS = [
   '/offline.html'
 ];
 
-// API routes to cache with network-first strategy
+// Catalog API routes, served stale-while-revalidate. The backend sends
+// ETag + Cache-Control, so the background refresh is a conditional GET
+// that usually comes back 304.
 const API_ROUTES = [
   '/api/actions',
   '/api/badges'
@@ -61,6 +63,17 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
+  // Skip Server-Sent Events streams (never cached)
+  if (request.headers.get('accept')?.includes('text/event-stream')) {
+    return;
+  }
+
+  // Catalog requests - Cache first, revalidated in the background
+  if (isCatalogRoute(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(request, event));
+    return;
+  }
+
   // API requests - Network first, fallback to cache
   if (url.pathname.startsWith('/api/')) {
     event.respondWith(networkFirst(request));
@@ -83,6 +96,11 @@ self.addEventListener('fetch', (event) => {
   event.respondWith(networkFirst(request));
 });
 
+// Check if request is for the shared catalog (not per-user routes like /api/badges/user)
+function isCatalogRoute(pathname) {
+  return API_ROUTES.includes(pathname) || pathname.startsWith('/api/actions/');
+}
+
 // Check if request is for a static asset
 function isStaticAsset(pathname) {
   return pathname.match(/\.(js|css|png|jpg|jpeg|svg|gif|ico|woff|woff2|ttf|eot)$/);
@@ -130,6 +148,35 @@ async function networkFirst(request) {
   }
 }
 
+// Stale-while-revalidate strategy
+async function staleWhileRevalidate(request, event) {
+  const cache = await caches.open(DYNAMIC_CACHE);
+  const cached = await cache.match(request);
+
+  // fetch() goes through the HTTP cache, which adds If-None-Match itself
+  const refresh = fetch(request)
+    .then((response) => {
+      if (response.ok) {
+        cache.put(request, response.clone());
+      }
+      return response;
+    });
+
+  if (cached) {
+    event.waitUntil(refresh.catch(() => undefined));
+    return cached;
+  }
+
+  try {
+    return await refresh;
+  } catch (error) {
+    return new Response(JSON.stringify({ error: 'Offline' }), {
+      status: 503,
+      headers: { 'Content-Type': 'application/json' }
+    });
+  }
+}
+
 // Network first with offline page fallback
 async function networkFirstWithOffline(request) {
   try {
@@ -53,6 +53,40 @@ export const authFetch = (url, options = {}) => {
   });
 };
 
+// Read a Server-Sent Events response (fetch-based, so it works with POST and auth headers)
+// and call onEvent(event, data) for each JSON event as it arrives
+export const streamEvents = async (url, options, onEvent) => {
+  const response = await authFetch(url, {
+    ...options,
+    headers: { Accept: "text/event-stream", ...options?.headers },
+  });
+  if (!response.ok) throw new Error(await getApiErrorMessage(response));
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      // Lines starting with ":" are keep-alives and carry no data
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+};
+
 // Register Service Worker for PWA
 const registerServiceWorker = async () => {
   if ("serviceWorker" in navigator) {
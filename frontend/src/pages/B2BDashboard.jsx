@@ -87,12 +87,18 @@ const categoryIcons = {
   well_being: Heart,
 };
 
+// Employees per /b2b/employees page
+const EMPLOYEES_PAGE_SIZE = 50;
+
 export default function B2BDashboard() {
   const { user, logout } = useAuth();
   const navigate = useNavigate();
   const [company, setCompany] = useState(null);
   const [dashboard, setDashboard] = useState(null);
   const [employees, setEmployees] = useState([]);
+  const [employeesCursor, setEmployeesCursor] = useState(null);
+  const [employeesError, setEmployeesError] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
   const [showCreateCompany, setShowCreateCompany] = useState(false);
@@ -115,17 +121,13 @@ export default function B2BDashboard() {
         const companyData = await companyRes.json();
         setCompany(companyData);
 
-        // Fetch dashboard and employees
-        const [dashRes, empRes] = await Promise.all([
+        // Fetch dashboard and the first page of employees
+        const [dashRes] = await Promise.all([
           authFetch(`${API}/b2b/dashboard`),
-          authFetch(`${API}/b2b/employees`),
+          loadEmployees(),
         ]);
 
         if (dashRes.ok) setDashboard(await dashRes.json());
-        if (empRes.ok) {
-          const empData = await empRes.json();
-          setEmployees(empData.employees || []);
-        }
       } else {
         setShowCreateCompany(true);
       }
@@ -136,6 +138,28 @@ export default function B2BDashboard() {
     }
   };
 
+  // /b2b/employees is paginated: load one page, then the next one from next_cursor on demand
+  const loadEmployees = async (cursor = null) => {
+    setEmployeesError(null);
+    try {
+      const params = new URLSearchParams({ sort: "total_time", limit: String(EMPLOYEES_PAGE_SIZE) });
+      if (cursor) params.set("cursor", cursor);
+      const res = await authFetch(`${API}/b2b/employees?${params}`);
+      if (!res.ok) throw new Error("Impossible de charger les collaborateurs");
+      const page = await res.json();
+      setEmployees((list) => (cursor ? [...list, ...(page.employees || [])] : page.employees || []));
+      setEmployeesCursor(page.next_cursor);
+    } catch (error) {
+      setEmployeesError(error.message);
+    }
+  };
+
+  const handleLoadMoreEmployees = async () => {
+    setIsLoadingMore(true);
+    await loadEmployees(employeesCursor);
+    setIsLoadingMore(false);
+  };
+
   const handleCreateCompany = async (e) => {
     e.preventDefault();
     try {
@@ -746,7 +770,37 @@ export default function B2BDashboard() {
                 </Card>
               )}
 
-              {employees.length === 0 && (
+              {employeesError && (
+                <Card className="border-destructive/50">
+                  <CardContent className="flex items-center justify-between p-4">
+                    <p className="text-sm text-destructive">{employeesError}</p>
+                    <Button
+                      variant="outline"
+                      size="sm"
+                      onClick={handleLoadMoreEmployees}
+                      disabled={isLoadingMore}
+                    >
+                      Réessayer
+                    </Button>
+                  </CardContent>
+                </Card>
+              )}
+
+              {employeesCursor && !employeesError && (
+                <div className="flex justify-center">
+                  <Button
+                    variant="outline"
+                    onClick={handleLoadMoreEmployees}
+                    disabled={isLoadingMore}
+                    data-testid="load-more-employees-btn"
+                  >
+                    {isLoadingMore && <Loader2 className="w-4 h-4 mr-2 animate-spin" />}
+                    Afficher plus de collaborateurs
+                  </Button>
+                </div>
+              )}
+
+              {employees.length === 0 && !employeesError && (
                 <Card className="py-12">
                   <div className="text-center">
                     <Users className="w-12 h-12 mx-auto mb-4 text-muted-foreground opacity-50" />
@@ -32,7 +32,7 @@ import {
   Brain,
 } from "lucide-react";
 import { toast } from "sonner";
-import { API, useAuth, authFetch, getApiErrorMessage } from "@/App";
+import { API, useAuth, authFetch, streamEvents } from "@/App";
 import {
   DropdownMenu,
   DropdownMenuContent,
@@ -69,6 +69,7 @@ export default function Dashboard() {
   const [selectedCategory, setSelectedCategory] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [suggestions, setSuggestions] = useState(null);
+  const [isRefining, setIsRefining] = useState(false);
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
   const [nextSlot, setNextSlot] = useState(null);
 
@@ -105,27 +106,36 @@ export default function Dashboard() {
     const category = overrides.preferred_category ?? selectedCategory;
 
     setIsLoading(true);
+    setIsRefining(true);
     try {
-      const response = await authFetch(`${API}/suggestions`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
+      // Rule-based picks arrive at once, the AI refinement replaces them as it streams in
+      await streamEvents(
+        `${API}/suggestions/stream`,
+        {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({
+            available_time: time,
+            energy_level: energy,
+            preferred_category: category,
+          }),
         },
-        body: JSON.stringify({
-          available_time: time,
-          energy_level: energy,
-          preferred_category: category,
-        }),
-      });
-
-      if (!response.ok) throw new Error(await getApiErrorMessage(response, "Erreur de suggestion"));
-
-      const data = await response.json();
-      setSuggestions(data);
+        (event, data) => {
+          if (event === "provisional" || event === "final") {
+            setSuggestions(data);
+            setIsLoading(false);
+          } else if (event === "delta") {
+            setSuggestions((prev) => ({ ...prev, [data.field]: data.value }));
+          }
+        }
+      );
     } catch (error) {
       toast.error(error.message || "Impossible de charger les suggestions");
     } finally {
       setIsLoading(false);
+      setIsRefining(false);
     }
   };
 
@@ -481,7 +491,10 @@ export default function Dashboard() {
           {suggestions && (
             <div className="space-y-4 animate-fade-in" data-testid="suggestions-container">
               <div className="flex items-center justify-between">
-                <h2 className="font-heading text-xl font-semibold">Suggestions pour vous</h2>
+                <h2 className="font-heading text-xl font-semibold flex items-center gap-2">
+                  Suggestions pour vous
+                  {isRefining && <Loader2 className="w-4 h-4 animate-spin text-muted-foreground" />}
+                </h2>
                 <span className="text-sm text-muted-foreground">{availableTime} min • Énergie {energyLevel}</span>
               </div>
 
@@ -33,7 +33,7 @@ import {
   Zap,
 } from "lucide-react";
 import { toast } from "sonner";
-import { API, useAuth, authFetch } from "@/App";
+import { API, useAuth, authFetch, streamEvents } from "@/App";
 import { Sheet, SheetContent, SheetTrigger } from "@/components/ui/sheet";
 import {
   Dialog,
@@ -156,17 +156,23 @@ export default function JournalPage() {
   const handleGenerateSummary = async () => {
     setIsGeneratingSummary(true);
     try {
-      const response = await authFetch(`${API}/reflections/summary`);
-
-      if (!response.ok) throw new Error("Erreur");
-
-      const data = await response.json();
-      if (data.summary) {
-        setSummary({ summary: data.summary, created_at: new Date().toISOString() });
-        toast.success("Résumé généré!");
-      } else {
-        toast.info(data.message);
-      }
+      // Local mood statistics first, then the AI sections as they arrive
+      await streamEvents(`${API}/reflections/summary/stream`, {}, (event, data) => {
+        if (event === "provisional") {
+          setSummary({ summary: data.summary, created_at: new Date().toISOString() });
+        } else if (event === "delta") {
+          setSummary((prev) => ({ ...prev, summary: { ...prev?.summary, [data.field]: data.value } }));
+        } else if (event === "final") {
+          if (data.summary) {
+            setSummary({ summary: data.summary, created_at: new Date().toISOString() });
+            toast.success("Résumé généré!");
+          } else {
+            toast.info(data.message);
+          }
+        } else if (event === "error") {
+          throw new Error(data.detail);
+        }
+      });
     } catch (error) {
       toast.error("Erreur lors de la génération");
     } finally {
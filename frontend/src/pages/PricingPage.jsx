@@ -45,6 +45,10 @@ export default function PricingPage() {
       const data = await response.json();
 
       if (data.payment_status === "paid") {
+        // Upgraded token carries the new subscription tier
+        if (data.token) {
+          localStorage.setItem("infinea_token", data.token);
+        }
         setPaymentStatus("success");
         toast.success("Paiement réussi ! Bienvenue dans Premium !");
         // Refresh user data
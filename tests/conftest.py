@@ -0,0 +1,62 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture(scope="session")
+def server():
+    """The app module on an in-memory database, started once for the session."""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    os.environ.setdefault("LLM_FAKE_LATENCY_MS", "1")
+    from mongomock_motor import AsyncMongoMockClient
+    import server
+
+    server.db = AsyncMongoMockClient()["infinea_test"]
+    return server
+
+
+@pytest.fixture(scope="session")
+def api(server):
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Fresh in-memory database; bulk_write replays its operations one by one."""
+    from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+
+    # mongomock's bulk_write rejects the operations of recent pymongo (they carry a sort option)
+    async def bulk_write(self, requests, ordered=True):
+        for op in requests:
+            await self.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    monkeypatch.setattr(AsyncMongoMockCollection, "bulk_write", bulk_write)
+    return AsyncMongoMockClient()["infinea_test"]
+
+
+@pytest.fixture(params=[0, 1, 2, 3])
+def catalog(request):
+    """Small random catalog with many equal durations, so tie-breaking is exercised."""
+    from benchmarks.bench_duration_index import make_catalog
+
+    return make_catalog(40, seed=request.param, max_duration=15)
+
+
+def register(api, **fields):
+    """Register a fresh user; returns the response body and auth headers."""
+    body = {"email": f"user_{uuid.uuid4().hex[:12]}@example.com", "password": "password123", "name": "Test"}
+    response = api.post("/api/auth/register", json={**body, **fields})
+    assert response.status_code == 200, response.text
+    api.cookies.clear()
+    user = response.json()
+    return user, {"Authorization": f"Bearer {user['token']}"}
@@ -0,0 +1,123 @@
+"""Prefix-sum range totals against summing the daily rows."""
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+
+from services.activity_prefix import (
+    PrefixSeries, backfill_activity_prefix, build_prefix_doc, load_prefix_series, range_totals,
+    record_prefix_activity,
+)
+
+START = date(2026, 3, 1)
+
+
+def random_days(rng, span=40):
+    """Daily rows (day, minutes, sessions) with gaps, sorted by day."""
+    rows = []
+    for offset in sorted(rng.sample(range(span), rng.randint(1, span // 2))):
+        sessions = rng.randint(1, 4)
+        rows.append({"day": (START + timedelta(days=offset)).isoformat(),
+                     "minutes": sessions * rng.randint(1, 15), "sessions": sessions})
+    return rows
+
+
+def brute_force_total(rows, start, end):
+    selected = [r for r in rows if start.isoformat() <= r["day"] <= end.isoformat()]
+    return {"minutes": sum(r["minutes"] for r in selected), "sessions": sum(r["sessions"] for r in selected)}
+
+
+def all_ranges(span=45):
+    days = [START + timedelta(days=offset) for offset in range(-3, span)]
+    return [(a, b) for a in days for b in days if a <= b]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_build_prefix_doc_range_totals(seed):
+    rows = random_days(random.Random(seed))
+    series = PrefixSeries(build_prefix_doc("user:u1", rows))
+    for start, end in all_ranges():
+        assert series.range_total(start, end) == brute_force_total(rows, start, end)
+
+
+def test_build_prefix_doc_merges_rows_of_the_same_day():
+    rows = [
+        {"day": "2026-03-01", "minutes": 5, "sessions": 1},
+        {"day": "2026-03-01", "minutes": 10, "sessions": 2},
+        {"day": "2026-03-04", "minutes": 3, "sessions": 1},
+    ]
+    doc = build_prefix_doc("company:c1", rows)
+    assert doc["closed_minutes"] == [15, 15, 15]
+    assert (doc["open_day"], doc["open_minutes"], doc["open_sessions"]) == ("2026-03-04", 18, 4)
+    assert build_prefix_doc("company:c1", []) is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_record_prefix_activity_matches_rebuild(seed):
+    rng = random.Random(seed)
+    completions = []
+    for row in random_days(rng):
+        completions += [{"day": row["day"], "minutes": rng.randint(1, 15), "sessions": 1}
+                        for _ in range(row["sessions"])]
+
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        for completion in completions:
+            await record_prefix_activity(db, "user:u1", completion["day"], completion["minutes"])
+        # A late completion from a skewed clock is counted on the open day
+        await record_prefix_activity(db, "user:u1", completions[0]["day"], 7)
+        series = await load_prefix_series(db, "user:u1")
+        missing = await range_totals(db, "user:u2", START, START + timedelta(days=60))
+        return series, missing
+
+    series, missing = asyncio.run(run())
+    completions.append({"day": completions[-1]["day"], "minutes": 7, "sessions": 1})
+    assert missing == {"minutes": 0, "sessions": 0}
+    assert vars(series) == vars(PrefixSeries(build_prefix_doc("user:u1", completions)))
+    for start, end in all_ranges():
+        assert series.range_total(start, end) == brute_force_total(completions, start, end)
+
+
+def test_range_totals_reads_only_the_boundaries():
+    rows = random_days(random.Random(7))
+
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.activity_prefix_sums.insert_one(build_prefix_doc("user:u1", rows))
+        return {(start, end): await range_totals(db, "user:u1", start, end) for start, end in all_ranges()}
+
+    for (start, end), total in asyncio.run(run()).items():
+        assert total == brute_force_total(rows, start, end)
+
+
+def test_backfill_is_put_in_front_of_live_series(monkeypatch):
+    history = [{"user_id": "u1", "day": "2026-03-02", "minutes": 10, "sessions": 2},
+               {"user_id": "u1", "day": "2026-03-05", "minutes": 4, "sessions": 1},
+               {"user_id": "u2", "day": "2026-03-03", "minutes": 6, "sessions": 1}]
+    live = [{"day": "2026-03-07", "minutes": 5, "sessions": 1}, {"day": "2026-03-09", "minutes": 3, "sessions": 1}]
+
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        # The rollup already holds the live days: they are left to record_prefix_activity
+        await db.user_daily_activity.insert_many(history + [{"user_id": "u1", **row} for row in live])
+        await record_prefix_activity(db, "user:u1", live[0]["day"], live[0]["minutes"])
+
+        # The second live completion lands between the backfill's read and its write
+        replace_one = AsyncMongoMockCollection.replace_one
+
+        async def racing_replace_one(self, *args, **kwargs):
+            monkeypatch.setattr(AsyncMongoMockCollection, "replace_one", replace_one)
+            await record_prefix_activity(db, "user:u1", live[1]["day"], live[1]["minutes"])
+            return await replace_one(self, *args, **kwargs)
+
+        monkeypatch.setattr(AsyncMongoMockCollection, "replace_one", racing_replace_one)
+        assert await backfill_activity_prefix(db, before="2026-03-08") == 2
+        assert await backfill_activity_prefix(db, before="2026-03-08") == 0
+        return await load_prefix_series(db, "user:u1"), await load_prefix_series(db, "user:u2")
+
+    series, other = asyncio.run(run())
+    expected = [row for row in history if row["user_id"] == "u1"] + live
+    assert vars(series) == vars(PrefixSeries(build_prefix_doc("user:u1", expected)))
+    assert (other.open_day, other.open_minutes) == (date(2026, 3, 3), 6)
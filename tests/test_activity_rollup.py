@@ -0,0 +1,87 @@
+"""Daily activity rollup: zero-filled history periods and the backfill merged with live completions."""
+import asyncio
+from datetime import date
+
+import pytest
+
+from services.activity_rollup import activity_history, backfill_daily_activity, record_daily_activity
+from services.user_stats import UNCATEGORIZED
+
+
+def history(user_id, day, category="learning", minutes=5, count=1):
+    return [
+        {"user_id": user_id, "category": category, "completed": True, "actual_duration": minutes,
+         "completed_at": f"{day}T{8 + n:02d}:00:00+00:00"}
+        for n in range(count)
+    ]
+
+
+def load(mongo, days, granularity):
+    async def run():
+        for day, minutes in days.items():
+            await record_daily_activity(mongo, "u1", day, "learning", minutes)
+        await record_daily_activity(mongo, "u2", "2026-01-30", "learning", 100)
+        return await activity_history(mongo, "u1", date(2026, 1, 28), date(2026, 3, 2), granularity)
+
+    return asyncio.run(run())
+
+
+def test_days_are_zero_filled(mongo):
+    points = load(mongo, {"2026-01-29": 5, "2026-02-01": 3}, "day")
+    assert len(points) == 34
+    assert [p["period"] for p in points[:5]] == ["2026-01-28", "2026-01-29", "2026-01-30", "2026-01-31", "2026-02-01"]
+    assert [p["minutes"] for p in points[:5]] == [0, 5, 0, 0, 3]
+    assert points[-1] == {"period": "2026-03-02", "sessions": 0, "minutes": 0, "minutes_by_category": {}}
+
+
+def test_weeks_start_on_monday_and_keep_partial_ends(mongo):
+    # 2026-01-28 is a Wednesday: the first week starts on Monday the 26th but only counts from the 28th
+    points = load(mongo, {"2026-01-26": 50, "2026-01-28": 1, "2026-02-01": 2, "2026-02-02": 4, "2026-03-03": 60}, "week")
+    assert points[0]["period"] == "2026-01-26" and points[-1]["period"] == "2026-03-02"
+    assert len(points) == 6
+    assert [p["minutes"] for p in points] == [3, 4, 0, 0, 0, 0]
+
+
+@pytest.mark.parametrize("days, expected", [
+    ({"2026-01-31": 1, "2026-02-01": 2, "2026-02-28": 3, "2026-03-01": 4}, [1, 5, 4]),
+    ({}, [0, 0, 0]),
+])
+def test_months_split_on_calendar_boundaries(mongo, days, expected):
+    points = load(mongo, days, "month")
+    assert [p["period"] for p in points] == ["2026-01-01", "2026-02-01", "2026-03-01"]
+    assert [p["minutes"] for p in points] == expected
+
+
+def test_categories_are_summed_per_period(mongo):
+    async def run():
+        await record_daily_activity(mongo, "u1", "2026-02-02", "learning", 5)
+        await record_daily_activity(mongo, "u1", "2026-02-03", "learning", 2)
+        await record_daily_activity(mongo, "u1", "2026-02-03", None, 4)
+        return await activity_history(mongo, "u1", date(2026, 2, 2), date(2026, 2, 8), "week")
+
+    (point,) = asyncio.run(run())
+    assert (point["sessions"], point["minutes"]) == (3, 11)
+    assert point["minutes_by_category"] == {"learning": 7, UNCATEGORIZED: 4}
+
+
+def test_backfill_keeps_live_completions(mongo):
+    async def run():
+        await mongo.user_sessions_history.insert_many(
+            history("u1", "2026-02-02", count=3) + history("u1", "2026-02-03", category=None, minutes=4)
+            + [{"user_id": "u1", "completed": False, "actual_duration": 9, "completed_at": "2026-02-02T12:00:00"}]
+        )
+        # Counted live: the three sessions above, one whose history row the backfill's read did not see yet,
+        # and one on a day the history does not hold
+        for _ in range(4):
+            await record_daily_activity(mongo, "u1", "2026-02-02", "learning", 5)
+        await record_daily_activity(mongo, "u1", "2026-02-04", "productivity", 7)
+
+        assert await backfill_daily_activity(mongo) == 2
+        await backfill_daily_activity(mongo, "u1")
+        return await activity_history(mongo, "u1", date(2026, 2, 2), date(2026, 2, 4))
+
+    points = asyncio.run(run())
+    assert [(p["sessions"], p["minutes"]) for p in points] == [(4, 20), (1, 4), (1, 7)]
+    assert points[0]["minutes_by_category"] == {"learning": 20}
+    assert points[1]["minutes_by_category"] == {UNCATEGORIZED: 4}
+    assert points[2]["minutes_by_category"] == {"productivity": 7}
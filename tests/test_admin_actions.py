@@ -0,0 +1,40 @@
+"""Admin key on the catalog write routes."""
+import pytest
+
+ACTION = {
+    "title": "Étirement express", "description": "Quelques étirements.", "category": "well_being",
+    "duration_min": 2, "duration_max": 4, "energy_level": "low", "instructions": ["Étirez-vous"],
+}
+
+
+@pytest.fixture
+def admin_key(server, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_API_KEY", "secret-key")
+    return "secret-key"
+
+
+def write_routes(api, headers):
+    return [
+        api.post("/api/admin/seed", headers=headers),
+        api.put("/api/admin/actions/action_test_admin", json=ACTION, headers=headers),
+    ]
+
+
+def test_disabled_without_a_configured_key(server, api, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_API_KEY", "")
+    for response in write_routes(api, {"X-Admin-Key": ""}):
+        assert (response.status_code, response.json()["detail"]) == (403, "Admin API disabled")
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Key": "wrong"}, {"X-Admin-Key": "sécret".encode()}])
+def test_rejects_missing_or_wrong_key(api, admin_key, headers):
+    version = api.get("/api/actions").headers.get("ETag")
+    for response in write_routes(api, headers):
+        assert (response.status_code, response.json()["detail"]) == (403, "Admin access required")
+    assert api.get("/api/actions").headers.get("ETag") == version
+
+
+def test_accepts_the_configured_key(server, api, admin_key):
+    seeded, upserted = write_routes(api, {"X-Admin-Key": admin_key})
+    assert seeded.status_code == 200 and upserted.status_code == 200
+    assert server.action_catalog.get("action_test_admin")["title"] == ACTION["title"]
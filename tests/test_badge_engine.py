@@ -0,0 +1,100 @@
+"""BadgeRuleIndex against the if/elif condition chain it replaced."""
+import asyncio
+import random
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from services.badge_engine import (
+    BADGES, BADGE_CATEGORIES, BADGE_INDEX, BadgeRuleIndex, badge_award, badge_inputs, completion_inputs, push_badges,
+)
+
+
+def legacy_earned(user, total_sessions, category_counts):
+    """check_and_award_badges as it was: every badge through the condition chain."""
+    earned = []
+    for badge in BADGES:
+        condition = badge["condition"]
+        if condition["type"] == "sessions_completed":
+            met = total_sessions >= condition["value"]
+        elif condition["type"] == "streak_days":
+            met = user.get("streak_days", 0) >= condition["value"]
+        elif condition["type"] == "total_time":
+            met = user.get("total_time_invested", 0) >= condition["value"]
+        elif condition["type"] == "category_sessions":
+            met = category_counts.get(condition["category"], 0) >= condition["value"]
+        elif condition["type"] == "all_categories":
+            met = all(category_counts.get(cat, 0) >= condition["value"] for cat in BADGE_CATEGORIES)
+        elif condition["type"] == "subscription":
+            met = user.get("subscription_tier") == condition["value"]
+        if met:
+            earned.append(badge["badge_id"])
+    return earned
+
+
+def random_state(rng):
+    counts = {category: rng.choice([0, 1, 4, 5, 9, 10, 12]) for category in BADGE_CATEGORIES + ["autre"]}
+    user = {
+        "streak_days": rng.choice([0, 1, 2, 3, 6, 7, 29, 30, 31]),
+        "total_time_invested": rng.choice([0, 59, 60, 299, 300, 599, 600, 900]),
+        "subscription_tier": rng.choice(["free", "premium"]),
+    }
+    if rng.random() < 0.2:
+        del user["streak_days"]
+    stats = {"total_sessions": sum(counts.values()), "sessions_by_category": {c: n for c, n in counts.items() if n}}
+    return user, stats
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_full_evaluation_matches_condition_chain(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        user, stats = random_state(rng)
+        expected = legacy_earned(user, stats["total_sessions"], stats["sessions_by_category"])
+        earned = rng.sample(expected, rng.randint(0, len(expected))) + rng.sample(
+            [b["badge_id"] for b in BADGES], 2
+        )
+        found = [b["badge_id"] for b in BADGE_INDEX.evaluate(badge_inputs(user, stats), earned)]
+        assert len(found) == len(set(found))
+        assert set(found) == set(expected) - set(earned)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_completion_only_evaluates_what_it_changed(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        user, stats = random_state(rng)
+        earned = legacy_earned(user, stats["total_sessions"], stats["sessions_by_category"])
+
+        category = rng.choice(BADGE_CATEGORIES + [None])
+        minutes = rng.choice([1, 5, 30])
+        user = {**user, "streak_days": user.get("streak_days", 0) + rng.choice([0, 1]),
+                "total_time_invested": user["total_time_invested"] + minutes}
+        counts = dict(stats["sessions_by_category"])
+        counts[category or "autre"] = counts.get(category or "autre", 0) + 1
+        stats = {"total_sessions": stats["total_sessions"] + 1, "sessions_by_category": counts}
+
+        expected = set(legacy_earned(user, stats["total_sessions"], counts)) - set(earned)
+        found = BADGE_INDEX.evaluate(badge_inputs(user, stats), earned, changed=completion_inputs(category))
+        assert {b["badge_id"] for b in found} == expected
+
+
+def test_unknown_condition_is_rejected():
+    with pytest.raises(ValueError):
+        BadgeRuleIndex([{"badge_id": "x", "condition": {"type": "karma", "value": 1}}])
+
+
+def test_push_skips_badges_awarded_meanwhile():
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.users.insert_one({"user_id": "u1", "badges": [badge_award(BADGES[1])]})
+        awards = [badge_award(b) for b in BADGES[:3]]
+        first = await push_badges(db, "u1", awards)
+        second = await push_badges(db, "u1", awards)
+        user = await db.users.find_one({"user_id": "u1"})
+        return first, second, [b["badge_id"] for b in user["badges"]]
+
+    first, second, held = asyncio.run(run())
+    assert [a["badge_id"] for a in first] == [BADGES[0]["badge_id"], BADGES[2]["badge_id"]]
+    assert second == []
+    assert sorted(held) == sorted(b["badge_id"] for b in BADGES[:3])
@@ -0,0 +1,162 @@
+"""Employee keyset pagination and the single-pass aggregates of the B2B dashboard."""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from services.company_stats import company_dashboard, decode_cursor, employee_page, encode_cursor
+
+
+@pytest.mark.parametrize("cursor", [
+    "", ".", "12", "12.", "abc.5f0c1e2b3a4d5e6f7a8b9c0d", "12.nothex", "12.5f0c1e2b3a4d", "1.5.5f0c1e2b3a4d5e6f7a8b9c0d",
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_round_trip():
+    object_id = ObjectId()
+    assert decode_cursor(encode_cursor(42, object_id)) == (42, object_id)
+    assert decode_cursor(encode_cursor(-1, object_id)) == (-1, object_id)
+
+
+def walk(db, sort, limit):
+    async def run():
+        pages, cursor = [], None
+        while True:
+            page = await employee_page(db, "c1", "u0", sort, limit, cursor)
+            pages.append(page["employees"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 40])
+def test_pages_cover_every_employee_once_across_ties(limit):
+    rng = random.Random(limit)
+    # Few distinct values: most page boundaries fall inside a run of equal values
+    users = [{"user_id": f"u{n}", "name": f"E{n}", "company_id": "c1", "total_time_invested": rng.choice([0, 5, 5, 30]),
+              "streak_days": rng.choice([0, 1]), "total_sessions": rng.choice([1, 2])} for n in range(23)]
+    db = AsyncMongoMockClient()["infinea_test"]
+    asyncio.run(db.users.insert_many(users + [{"user_id": "x1", "company_id": "c2", "total_time_invested": 100}]))
+
+    for sort, field in (("total_time", "total_time_invested"), ("streak", "streak_days")):
+        pages = walk(db, sort, limit)
+        assert all(len(page) == limit for page in pages[:-1]) and 0 < len(pages[-1]) <= limit
+        names = [employee["name"] for page in pages for employee in page]
+        # Best first, ties in insertion (_id) order
+        expected = sorted(users, key=lambda user: (-user[field], user["_id"]))
+        assert names == [user["name"] for user in expected]
+
+    first = pages[0][0]
+    assert set(first) == {"name", "total_time", "streak_days", "total_sessions", "is_admin"}
+    assert [e["name"] for page in pages for e in page if e["is_admin"]] == ["E0"]
+
+
+def test_single_page_has_no_cursor():
+    db = AsyncMongoMockClient()["infinea_test"]
+    asyncio.run(db.users.insert_many([{"user_id": "u1", "company_id": "c1", "total_time_invested": 5}]))
+    assert walk(db, "total_time", 1) == [[
+        {"name": "Collaborateur", "total_time": 5, "streak_days": 0, "total_sessions": 0, "is_admin": False}
+    ]]
+    assert walk(db, "sessions", 5)[0][0]["total_sessions"] == 0
+
+
+NOW = datetime(2026, 5, 20, 12, tzinfo=timezone.utc)
+
+
+def session(user_id, days_ago, completed=True, category="learning", minutes=5):
+    row = {"user_id": user_id, "completed": completed, "category": category, "actual_duration": minutes,
+           "started_at": (NOW - timedelta(days=days_ago or 0, minutes=minutes)).isoformat()}
+    if days_ago is not None:
+        row["completed_at"] = (NOW - timedelta(days=days_ago)).isoformat()
+    return row
+
+
+async def separate_queries(db, employee_ids, since=None):
+    """The dashboard as one query per figure, before the $facet pipeline."""
+    match = {"user_id": {"$in": employee_ids}, "completed": True}
+    if since is not None:
+        match["completed_at"] = {"$gte": since.isoformat()}
+    totals = await db.user_sessions_history.aggregate([
+        {"$match": match}, {"$group": {"_id": None, "time": {"$sum": "$actual_duration"}}}
+    ]).to_list(1)
+    daily = await db.user_sessions_history.aggregate([
+        {"$match": {**match, "completed_at": {"$gte": max(
+            (NOW - timedelta(days=28)).isoformat(), match.get("completed_at", {}).get("$gte", ""))}}},
+        {"$group": {"_id": {"$substr": ["$completed_at", 0, 10]}, "sessions": {"$sum": 1},
+                    "time": {"$sum": "$actual_duration"}}},
+        {"$sort": {"_id": 1}},
+    ]).to_list(None)
+    categories = await db.user_sessions_history.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$category", "count": {"$sum": 1}, "time": {"$sum": "$actual_duration"}}},
+    ]).to_list(None)
+    active = await db.user_sessions_history.distinct(
+        "user_id", {"user_id": {"$in": employee_ids}, "completed_at": {"$gte": (NOW - timedelta(days=7)).isoformat()}}
+    )
+    return {
+        "total_sessions": await db.user_sessions_history.count_documents(match),
+        "total_time": totals[0]["time"] if totals else 0,
+        "category_stats": sorted(categories, key=lambda c: str(c["_id"])),
+        "daily_activity": daily,
+        "active_employees": len(active),
+    }
+
+
+def test_dashboard_facets():
+    rows = [
+        session("u1", 0), session("u1", 2, category="productivity", minutes=10), session("u1", 40, minutes=30),
+        # Active this week without a completed session: counted active, not in the totals
+        session("u2", 3, completed=False), session("u2", 20, category="well_being"),
+        session("u3", 8), session("u4", None, completed=False),
+        session("outsider", 1, minutes=99),
+    ]
+
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.user_sessions_history.insert_many(rows)
+        employees = ["u1", "u2", "u3", "u4"]
+        return await company_dashboard(db, employees, NOW), await company_dashboard(
+            db, employees, NOW, NOW - timedelta(days=1)
+        )
+
+    all_time, last_day = asyncio.run(run())
+    assert (all_time["total_sessions"], all_time["total_time"], all_time["active_employees"]) == (5, 55, 2)
+    assert sorted((c["_id"], c["count"], c["time"]) for c in all_time["category_stats"]) == [
+        ("learning", 3, 40), ("productivity", 1, 10), ("well_being", 1, 5),
+    ]
+    assert [(d["_id"], d["sessions"]) for d in all_time["daily_activity"]] == [
+        ("2026-04-30", 1), ("2026-05-12", 1), ("2026-05-18", 1), ("2026-05-20", 1),
+    ]
+    # The window narrows the session figures, not the weekly active count
+    assert (last_day["total_sessions"], last_day["total_time"], last_day["active_employees"]) == (1, 5, 2)
+    assert [d["_id"] for d in last_day["daily_activity"]] == ["2026-05-20"]
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("days", [None, 1, 7, 30])
+def test_dashboard_matches_separate_queries(seed, days):
+    rng = random.Random(seed)
+    rows = [
+        session(f"u{rng.randint(0, 12)}", rng.choice([None, rng.uniform(0, 60)]), completed=rng.random() < 0.7,
+                category=rng.choice(["learning", "productivity", "well_being", None]), minutes=rng.randint(1, 20))
+        for _ in range(200)
+    ]
+    employees = [f"u{n}" for n in range(10)]
+    since = NOW - timedelta(days=days) if days else None
+
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.user_sessions_history.insert_many(rows)
+        return await company_dashboard(db, employees, NOW, since), await separate_queries(db, employees, since)
+
+    dashboard, expected = asyncio.run(run())
+    dashboard["category_stats"] = sorted(dashboard["category_stats"], key=lambda c: str(c["_id"]))
+    assert dashboard == expected
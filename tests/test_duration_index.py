@@ -0,0 +1,65 @@
+"""DurationIndex against the linear scan and stable sort match_action_to_slot used."""
+import asyncio
+import itertools
+
+import pytest
+
+from benchmarks.bench_duration_index import CATEGORIES, ENERGY_LEVELS, linear_match_slot
+from services.duration_index import DurationIndex
+from services.slot_detector import match_action_to_slot
+
+
+def linear_fitting(actions, duration, category=None, energy_level=None,
+                   include_premium=True, within_max=False, limit=None):
+    matches = [
+        a for a in actions
+        if a["duration_min"] <= duration
+        and (not within_max or duration <= a["duration_max"])
+        and (not category or a["category"] == category)
+        and (not energy_level or a["energy_level"] == energy_level)
+        and (include_premium or not a.get("is_premium", False))
+    ]
+    matches.sort(key=lambda a: duration - a["duration_min"])
+    return matches[:limit]
+
+
+@pytest.mark.parametrize("within_max", [False, True])
+def test_fitting_matches_linear_scan(catalog, within_max):
+    index = DurationIndex(catalog)
+    for duration, category, energy, premium, limit in itertools.product(
+        range(0, 23), [None] + CATEGORIES, [None] + ENERGY_LEVELS, [True, False], [None, 1, 3]
+    ):
+        expected = linear_fitting(catalog, duration, category, energy, premium, within_max, limit)
+        assert index.fitting(duration, category, energy, premium, within_max, limit) == expected
+
+
+def test_duration_bucket_stands_in_for_duration(catalog):
+    index = DurationIndex(catalog)
+    for duration in range(0, 23):
+        bucket = index.duration_bucket(duration)
+        fits = [a["duration_min"] for a in catalog if a["duration_min"] <= duration]
+        assert bucket == (max(fits) if fits else None)
+        if bucket is not None:
+            assert index.fitting(bucket) == index.fitting(duration)
+
+
+def test_best_fit(catalog):
+    index = DurationIndex(catalog)
+    for duration, category, premium in itertools.product(range(0, 23), [None] + CATEGORIES, [True, False]):
+        expected = linear_fitting(catalog, duration, category, include_premium=premium, limit=1)
+        assert index.best_fit(duration, category, premium) == (expected[0] if expected else None)
+
+
+def test_match_action_to_slot_matches_linear_scan(catalog):
+    index = DurationIndex(catalog)
+    for duration, category in itertools.product(range(0, 23), CATEGORIES):
+        slot = {"duration_minutes": duration, "suggested_category": category}
+        matched = asyncio.run(match_action_to_slot(slot, catalog, "free", index))
+        assert matched == linear_match_slot(catalog, duration, category)
+
+
+def test_empty_catalog():
+    index = DurationIndex([])
+    assert index.fitting(10) == []
+    assert index.duration_bucket(10) is None
+    assert index.best_fit(10) is None
@@ -0,0 +1,128 @@
+"""LlmGateway retries with jittered backoff, timeouts, concurrency bound and latency histograms."""
+import asyncio
+
+import pytest
+
+from services.llm_gateway import LlmGateway, LlmUnavailableError, LatencyHistogram
+from services.llm_providers import LlmProvider, FakeLlmProvider, FakeLlmError
+
+# The backoff fixture replaces asyncio.sleep; providers keep the real one
+real_sleep = asyncio.sleep
+
+
+class ScriptedProvider(LlmProvider):
+    """Plays one outcome per call: an exception to raise, a delay in seconds, or an answer."""
+
+    name = "scripted"
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def complete(self, system_message, prompt):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, float):
+            await real_sleep(outcome)
+            return "late"
+        return outcome
+
+
+@pytest.fixture
+def backoff(monkeypatch):
+    """Records the jitter range of every retry and skips the actual wait."""
+    ranges = []
+
+    def uniform(low, high):
+        ranges.append((low, high))
+        return high / 2
+
+    monkeypatch.setattr("services.llm_gateway.random.uniform", uniform)
+    monkeypatch.setattr("services.llm_gateway.asyncio.sleep", lambda delay: real_sleep(0))
+    return ranges
+
+
+def complete(gateway, **options):
+    return asyncio.run(gateway.complete("system", "prompt", **options))
+
+
+def test_without_provider():
+    with pytest.raises(LlmUnavailableError):
+        complete(LlmGateway())
+
+
+def test_failed_attempt_is_retried(backoff):
+    provider = ScriptedProvider(RuntimeError("503"), "answer")
+    gateway = LlmGateway(provider, max_retries=1, retry_base_delay=0.5)
+    assert complete(gateway) == "answer"
+    assert provider.calls == 2
+    assert backoff == [(0, 0.5)]
+    stats = gateway.stats()
+    assert (stats["calls"], stats["attempts"], stats["retries"], stats["errors"]) == (1, 2, 1, 0)
+
+
+def test_backoff_doubles_with_full_jitter_then_gives_up(backoff):
+    provider = ScriptedProvider(*[RuntimeError(f"failure {n}") for n in range(4)])
+    gateway = LlmGateway(provider, max_retries=3, retry_base_delay=0.5)
+    with pytest.raises(RuntimeError, match="failure 3"):
+        complete(gateway)
+    assert backoff == [(0, 0.5), (0, 1.0), (0, 2.0)]
+    stats = gateway.stats()
+    assert (stats["attempts"], stats["retries"], stats["errors"]) == (4, 3, 1)
+
+
+def test_each_attempt_has_its_own_timeout(backoff):
+    provider = ScriptedProvider(1.0, 1.0, "answer")
+    gateway = LlmGateway(provider, call_timeout=0.01, max_retries=2)
+    assert complete(gateway) == "answer"
+    assert gateway.stats()["timeouts"] == 2
+
+    provider = ScriptedProvider(1.0)
+    gateway = LlmGateway(provider, call_timeout=10, max_retries=0)
+    with pytest.raises(asyncio.TimeoutError):
+        complete(gateway, timeout=0.01)
+    assert (gateway.stats()["timeouts"], gateway.stats()["errors"]) == (1, 1)
+
+
+def test_concurrency_is_bounded():
+    provider = ScriptedProvider(*[0.01] * 10)
+    gateway = LlmGateway(provider, max_concurrency=3)
+
+    async def burst():
+        return await asyncio.gather(*[gateway.complete("system", "prompt") for _ in range(10)])
+
+    assert asyncio.run(burst()) == ["late"] * 10
+    stats = gateway.stats()
+    assert stats["peak_in_flight"] == 3
+    assert (stats["in_flight"], stats["waiting"]) == (0, 0)
+
+
+def test_latency_is_recorded_per_kind(backoff):
+    gateway = LlmGateway(ScriptedProvider("a", RuntimeError("x"), "b"))
+    complete(gateway, kind="suggestions")
+    complete(gateway, kind="summaries")
+    latency = gateway.stats()["latency"]
+    assert latency["suggestions"]["count"] == 1 and latency["summaries"]["count"] == 1
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram([0.1, 1])
+    for seconds in (0.05, 0.05, 0.5, 5):
+        histogram.observe(seconds)
+    assert histogram.counts == [2, 1, 1]
+    assert (histogram.quantile(0.5), histogram.quantile(0.75), histogram.quantile(1)) == (0.1, 1, None)
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_fake_provider_errors_are_retried(backoff):
+    provider = FakeLlmProvider(latency_ms=0, error_rate=0.5, seed=3)
+    gateway = LlmGateway(provider, max_retries=10)
+    for _ in range(5):
+        assert "top_pick" in complete(gateway)
+    assert provider.errors == gateway.stats()["retries"] > 0
+
+    gateway = LlmGateway(FakeLlmProvider(latency_ms=0, error_rate=1), max_retries=1)
+    with pytest.raises(FakeLlmError):
+        complete(gateway)
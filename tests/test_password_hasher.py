@@ -0,0 +1,87 @@
+"""PasswordHasher queue bound and the 503 the auth routes answer with when it is full."""
+import asyncio
+import threading
+
+import bcrypt
+import pytest
+
+from services.password_hasher import PasswordHasher, HasherBusyError, get_hash_rounds
+
+from .conftest import register
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(rounds=4)
+
+    async def run():
+        hashed = await hasher.hash("secret")
+        return hashed, await hasher.verify("secret", hashed), await hasher.verify("other", hashed)
+
+    hashed, good, bad = asyncio.run(run())
+    assert (get_hash_rounds(hashed), good, bad) == (4, True, False)
+    hasher.shutdown()
+
+
+def test_pending_limit_rejects_immediately():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    def blocked(value):
+        release.wait(5)
+        return value
+
+    async def run():
+        running = [asyncio.create_task(hasher._run(blocked, n)) for n in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.stats()["pending"] == 2
+        with pytest.raises(HasherBusyError):
+            await hasher.verify("secret", bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode())
+        release.set()
+        results = await asyncio.gather(*running)
+        # Slots are released once the queued calls finish
+        assert await hasher.verify("secret", await hasher.hash("secret"))
+        return results
+
+    assert asyncio.run(run()) == [0, 1]
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["pending"] == 0
+    hasher.shutdown()
+
+
+def test_failed_call_releases_its_slot():
+    hasher = PasswordHasher(rounds=4, max_pending=1)
+
+    async def run():
+        with pytest.raises(ValueError):
+            await hasher.verify("secret", "not a bcrypt hash")
+        return hasher.stats()["pending"]
+
+    assert asyncio.run(run()) == 0
+    hasher.shutdown()
+
+
+def test_needs_rehash():
+    hasher = PasswordHasher(rounds=12)
+    assert hasher.needs_rehash(bcrypt.hashpw(b"x", bcrypt.gensalt(4)).decode())
+    assert not hasher.needs_rehash("$2b$12$" + "a" * 53)
+    assert get_hash_rounds("garbage") is None
+    hasher.shutdown()
+
+
+def test_full_queue_answers_503(server, api, monkeypatch):
+    body, _ = register(api)
+    monkeypatch.setattr(server.password_hasher, "max_pending", 0)
+    response = api.post("/api/auth/login", json={"email": body["email"], "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    response = api.post("/api/auth/register", json={"email": "busy@example.com", "password": "x", "name": "B"})
+    assert response.status_code == 503
+    api.cookies.clear()
+
+
+def test_login_rehashes_with_the_configured_rounds(server, api, monkeypatch):
+    body, _ = register(api)
+    monkeypatch.setattr(server.password_hasher, "rounds", 5)
+    assert api.post("/api/auth/login", json={"email": body["email"], "password": "password123"}).status_code == 200
+    api.cookies.clear()
+    user = asyncio.run(server.db.users.find_one({"email": body["email"]}))
+    assert get_hash_rounds(user["password_hash"]) == 5
@@ -0,0 +1,126 @@
+"""PrincipalCache expiry, LRU eviction and invalidation, in isolation and through the auth routes."""
+import sys
+import time
+import types
+
+import pytest
+
+from services.principal_cache import PrincipalCache
+
+from .conftest import register
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("services.principal_cache.time.monotonic", clock)
+    return clock
+
+
+def user(user_id, **fields):
+    return {"user_id": user_id, "name": user_id, **fields}
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = PrincipalCache(ttl_seconds=30)
+    cache.put("token", user("u1"))
+    clock.now += 29.9
+    assert cache.get("token") == user("u1")
+    clock.now += 0.1
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_entry_never_outlives_its_credential(clock):
+    cache = PrincipalCache(ttl_seconds=30)
+    cache.put("token", user("u1"), expires_at=time.time() + 5)
+    clock.now += 6
+    assert cache.get("token") is None
+    cache.put("expired", user("u1"), expires_at=time.time() - 1)
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(max_entries=2)
+    cache.put("a", user("u1"))
+    cache.put("b", user("u2"))
+    cache.get("a")
+    cache.put("c", user("u3"))
+    assert cache.get("b") is None
+    assert cache.get("a") == user("u1") and cache.get("c") == user("u3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_user_is_a_copy():
+    cache = PrincipalCache()
+    cache.put("token", user("u1", onboarding={"profile": {}}))
+    cache.get("token")["onboarding"]["profile"]["goal"] = "focus"
+    assert cache.get("token")["onboarding"] == {"profile": {}}
+
+
+def test_invalidate_user_drops_every_token():
+    cache = PrincipalCache()
+    cache.put("a", user("u1"))
+    cache.put("b", user("u1"))
+    cache.put("c", user("u2"))
+    cache.invalidate_user("u1")
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == user("u2")
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_replaced_token_does_not_leak_into_the_old_users_keys():
+    cache = PrincipalCache()
+    cache.put("token", user("u1"))
+    cache.put("token", user("u2"))
+    cache.invalidate_user("u1")
+    assert cache.get("token") == user("u2")
+
+
+def test_disabled_cache_stores_nothing():
+    for cache in (PrincipalCache(ttl_seconds=0), PrincipalCache(max_entries=0)):
+        cache.put("token", user("u1"))
+        assert cache.get("token") is None
+
+
+def test_logout_invalidates_the_cookie_token(server, api):
+    body, _ = register(api)
+    response = api.post("/api/auth/login", json={"email": body["email"], "password": "password123"})
+    token = response.cookies.get("session_token") or response.json()["token"]
+    api.cookies.set("session_token", token)
+    assert api.get("/api/auth/me").status_code == 200
+    assert server.principal_cache.get(token) is not None
+
+    api.post("/api/auth/logout")
+    api.cookies.clear()
+    assert server.principal_cache.get(token) is None
+
+
+def test_upgrade_webhook_invalidates_cached_principal(server, api, monkeypatch):
+    body, headers = register(api)
+    assert api.get("/api/auth/me", headers=headers).json()["subscription_tier"] == "free"
+
+    class StripeCheckout:
+        def __init__(self, api_key, webhook_url):
+            pass
+
+        async def handle_webhook(self, payload, signature):
+            return types.SimpleNamespace(payment_status="paid", metadata={"user_id": body["user_id"]})
+
+    name = ""
+    for part in "emergentintegrations.payments.stripe.checkout".split("."):
+        name = f"{name}.{part}" if name else part
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    sys.modules[name].StripeCheckout = StripeCheckout
+    monkeypatch.setenv("STRIPE_API_KEY", "sk_test")
+
+    assert api.post("/api/webhook/stripe", content=b"{}").json() == {"status": "ok"}
+    assert api.get("/api/auth/me", headers=headers).json()["subscription_tier"] == "premium"
@@ -0,0 +1,106 @@
+"""ScoringEngine against the scalar score_action ranking."""
+import itertools
+import random
+
+import pytest
+
+from benchmarks.bench_duration_index import CATEGORIES, ENERGY_LEVELS, linear_match_slot, make_catalog
+from benchmarks.bench_scoring_engine import scalar_suggestions
+from services.scoring_engine import ScoringEngine, SLOT_WEIGHTS, build_scoring_engine
+from services.suggestion_ranking import score_action
+
+
+def scalar_score(action, available_time, energy_level, category):
+    if energy_level:
+        return score_action(action, available_time, energy_level, category)
+    # No requested energy scores no energy points: take back what "medium" gave
+    energy_points = 8 if action["energy_level"] == "medium" else 4
+    return score_action(action, available_time, "medium", category) - energy_points
+
+
+def scalar_top_k(actions, available_time, energy_level=None, category=None, k=3, include_premium=True,
+                 require_category=False, require_energy=False):
+    """Linear ranking: score, then closeness of fit, then catalog order."""
+    ranked = []
+    for seq, action in enumerate(actions):
+        if action["duration_min"] > available_time:
+            continue
+        if not include_premium and action.get("is_premium", False):
+            continue
+        if require_category and category and action["category"] != category:
+            continue
+        if require_energy and energy_level and action["energy_level"] != energy_level:
+            continue
+        score = scalar_score(action, available_time, energy_level, category)
+        ranked.append((-score, available_time - action["duration_min"], seq))
+    ranked.sort()
+    return [actions[seq] for *_, seq in ranked[:k]]
+
+
+CONTEXTS = list(itertools.product(range(0, 23), [None] + ENERGY_LEVELS, [None, "unknown"] + CATEGORIES))
+
+
+@pytest.mark.parametrize("require", [(False, False), (True, False), (False, True), (True, True)])
+@pytest.mark.parametrize("include_premium", [True, False])
+def test_top_k_matches_scalar_ranking(catalog, require, include_premium):
+    engine = ScoringEngine(catalog)
+    require_category, require_energy = require
+    for time, energy, category in CONTEXTS:
+        options = dict(include_premium=include_premium, require_category=require_category,
+                       require_energy=require_energy)
+        expected = scalar_top_k(catalog, time, energy, category, k=3, **options)
+        assert engine.top_k(time, energy, category, k=3, **options) == expected
+
+
+@pytest.mark.parametrize("k", [1, 3, 12, 60])
+def test_top_k_batch_matches_single_contexts(catalog, k):
+    engine = ScoringEngine(catalog)
+    rng = random.Random(k)
+    contexts = [rng.choice(CONTEXTS) for _ in range(200)]
+    batch = engine.top_k_batch([c[0] for c in contexts], [c[1] for c in contexts], [c[2] for c in contexts], k=k)
+    assert batch.shape == (len(contexts), k)
+    for (time, energy, category), row in zip(contexts, batch):
+        expected = scalar_top_k(catalog, time, energy, category, k=k)
+        assert [catalog[i] for i in row if i >= 0] == expected
+        assert list(row[len(expected):]) == [-1] * (k - len(expected))
+
+
+def test_suggestion_options_match_the_filtered_scalar_ranking(catalog):
+    engine = ScoringEngine(catalog)
+    for time, energy, category in itertools.product(range(0, 23), ENERGY_LEVELS, CATEGORIES):
+        expected = scalar_suggestions(catalog, time, energy, category)
+        assert engine.top_k(time, energy, category, include_premium=False,
+                            require_category=True, require_energy=True) == expected
+
+
+def test_top_k_batch_in_several_chunks(monkeypatch):
+    catalog = make_catalog(300, seed=7)
+    engine = ScoringEngine(catalog)
+    monkeypatch.setattr("services.scoring_engine.CHUNK_CELLS", len(catalog) * 7)
+    times = list(range(0, 70))
+    batch = engine.top_k_batch(times, ["high"] * len(times), ["learning"] * len(times), k=5)
+    for time, row in zip(times, batch):
+        assert [catalog[i] for i in row if i >= 0] == scalar_top_k(catalog, time, "high", "learning", k=5)
+
+
+def test_slot_weights_match_linear_slot_matching(catalog):
+    """SLOT_WEIGHTS ranks as match_action_to_slot: the slot's category first, then the closest fit."""
+    engine = ScoringEngine(catalog)
+    times = list(range(0, 23))
+    for category in CATEGORIES:
+        best = engine.top_k_batch(times, categories=[category] * len(times), k=1,
+                                  include_premium=False, weights=SLOT_WEIGHTS)[:, 0]
+        for time, i in zip(times, best):
+            assert (catalog[i] if i >= 0 else None) is linear_match_slot(catalog, time, category)
+
+
+def test_no_engine_without_numpy(monkeypatch):
+    assert isinstance(build_scoring_engine([]), ScoringEngine)
+    monkeypatch.setattr("services.scoring_engine.np", None)
+    assert build_scoring_engine([]) is None
+
+
+def test_empty_catalog():
+    engine = ScoringEngine([])
+    assert engine.top_k(10, "low", "learning") == []
+    assert engine.top_k_batch([5, 10], k=2).tolist() == [[-1, -1], [-1, -1]]
@@ -0,0 +1,82 @@
+"""Streak and totals pipeline update of complete_session."""
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from .conftest import register
+
+TODAY = date(2026, 5, 20)
+
+
+def apply_completion(server, user, minutes=5):
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.users.insert_one({"user_id": "u1", **user})
+        await db.users.update_one({"user_id": "u1"}, server.session_completion_update(TODAY, minutes))
+        return await db.users.find_one({"user_id": "u1"}, {"_id": 0, "user_id": 0})
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("last_session_date, streak, expected", [
+    (None, None, 1),
+    ((TODAY - timedelta(days=1)).isoformat(), 4, 5),
+    # Older documents stored a full timestamp
+    (f"{TODAY - timedelta(days=1)}T22:15:00+00:00", 4, 5),
+    (TODAY.isoformat(), 4, 4),
+    ((TODAY - timedelta(days=2)).isoformat(), 4, 1),
+    ((TODAY - timedelta(days=1)).isoformat(), None, 1),
+])
+def test_streak_rules(server, last_session_date, streak, expected):
+    user = {}
+    if last_session_date is not None:
+        user["last_session_date"] = last_session_date
+    if streak is not None:
+        user["streak_days"] = streak
+    after = apply_completion(server, user)
+    assert after["streak_days"] == expected
+    assert after["last_session_date"] == TODAY.isoformat()
+
+
+def test_totals_are_incremented(server):
+    after = apply_completion(server, {"total_time_invested": 30, "total_sessions": 6}, minutes=7)
+    assert (after["total_time_invested"], after["total_sessions"]) == (37, 7)
+    after = apply_completion(server, {}, minutes=7)
+    assert (after["total_time_invested"], after["total_sessions"]) == (7, 1)
+
+
+def start(api, headers):
+    action = next(a for a in api.get("/api/actions").json() if not a.get("is_premium"))
+    return api.post("/api/sessions/start", json={"action_id": action["action_id"]}, headers=headers).json()
+
+
+def test_completion_through_the_route(server, api):
+    body, headers = register(api)
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    asyncio.run(server.db.users.update_one(
+        {"user_id": body["user_id"]}, {"$set": {"streak_days": 3, "last_session_date": yesterday}}
+    ))
+    server.principal_cache.invalidate_user(body["user_id"])
+
+    first = start(api, headers)["session_id"]
+    completed = api.post("/api/sessions/complete", json={"session_id": first, "actual_duration": 4}, headers=headers)
+    assert (completed.json()["new_streak"], completed.json()["total_time"]) == (4, 4)
+
+    second = start(api, headers)["session_id"]
+    completed = api.post("/api/sessions/complete", json={"session_id": second, "actual_duration": 6}, headers=headers)
+    assert (completed.json()["new_streak"], completed.json()["total_time"]) == (4, 10)
+    assert api.get("/api/auth/me", headers=headers).json()["streak_days"] == 4
+
+
+def test_retried_completion_counts_once(server, api):
+    body, headers = register(api)
+    session_id = start(api, headers)["session_id"]
+    request = {"session_id": session_id, "actual_duration": 5}
+    assert api.post("/api/sessions/complete", json=request, headers=headers).status_code == 200
+    assert api.post("/api/sessions/complete", json=request, headers=headers).status_code == 409
+    missing = {"session_id": "session_missing", "actual_duration": 5}
+    assert api.post("/api/sessions/complete", json=missing, headers=headers).status_code == 404
+    user = asyncio.run(server.db.users.find_one({"user_id": body["user_id"]}))
+    assert (user["total_sessions"], user["total_time_invested"]) == (1, 5)
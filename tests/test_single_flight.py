@@ -0,0 +1,118 @@
+"""SingleFlight coalescing, error and timeout propagation, and cancellation of waiters."""
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    started = []
+
+    async def fn():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": 42}
+
+    async def scenario():
+        results = await asyncio.gather(*[flights.do("k", fn) for _ in range(10)])
+        again = await flights.do("k", fn)
+        return results, again
+
+    results, again = run(scenario())
+    assert all(result is results[0] for result in results)
+    assert again == {"answer": 42}
+    # Nothing is kept after the call finishes: the later call runs again
+    assert len(started) == 2
+    assert flights.stats() == {"in_flight": 0, "peak_in_flight": 1, "calls": 11, "executions": 2,
+                               "coalesced": 9, "errors": 0, "timeouts": 0}
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def scenario():
+        async def fn(value):
+            await asyncio.sleep(0.01)
+            return value
+        return await asyncio.gather(flights.do("a", lambda: fn(1)), flights.do("b", lambda: fn(2)))
+
+    assert run(scenario()) == [1, 2]
+    assert flights.stats()["peak_in_flight"] == 2
+
+
+def test_error_reaches_every_waiter_and_clears_the_key():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        results = await asyncio.gather(*[flights.do("k", fail) for _ in range(3)], return_exceptions=True)
+        return results, await flights.do("k", lambda: asyncio.sleep(0, result="recovered"))
+
+    results, recovered = run(scenario())
+    assert [type(r) for r in results] == [RuntimeError] * 3
+    assert recovered == "recovered"
+    assert flights.stats()["errors"] == 1 and flights.stats()["in_flight"] == 0
+
+
+def test_timeout_of_the_starting_caller_applies_to_all():
+    flights = SingleFlight(default_timeout=10)
+
+    async def scenario():
+        first = flights.do("k", lambda: asyncio.sleep(1), timeout=0.01)
+        second = flights.do("k", lambda: asyncio.sleep(0, result="never run"), timeout=5)
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    results = run(scenario())
+    assert [type(r) for r in results] == [asyncio.TimeoutError] * 2
+    assert flights.stats()["timeouts"] == 1 and flights.stats()["executions"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    flights = SingleFlight()
+
+    async def scenario():
+        done = asyncio.Event()
+
+        async def fn():
+            await asyncio.sleep(0.02)
+            done.set()
+            return "shared"
+
+        leaving = asyncio.ensure_future(flights.do("k", fn))
+        staying = asyncio.ensure_future(flights.do("k", fn))
+        await asyncio.sleep(0.005)
+        leaving.cancel()
+        result = await staying
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return result, done.is_set()
+
+    assert run(scenario()) == ("shared", True)
+
+
+def test_call_completes_after_every_waiter_left():
+    flights = SingleFlight()
+    completed = []
+
+    async def scenario():
+        async def fn():
+            await asyncio.sleep(0.01)
+            completed.append(1)
+
+        waiter = asyncio.ensure_future(flights.do("k", fn))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0.03)
+        return flights.stats()["in_flight"]
+
+    assert run(scenario()) == 0
+    assert completed == [1]
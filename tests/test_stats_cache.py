@@ -0,0 +1,112 @@
+"""StatsCache read/write race handling, in-place patches and bounds."""
+import pytest
+
+from services.stats_cache import StatsCache, RECENT_SESSIONS
+
+from .conftest import register
+
+
+def stats(total):
+    return {"user_id": "u1", "total_sessions": total}
+
+
+def session(n):
+    return {"session_id": f"s{n}"}
+
+
+def test_put_then_get_returns_a_copy():
+    cache = StatsCache()
+    cache.put("u1", stats(1), [session(1)], cache.read_marker())
+    payload = cache.get("u1")
+    payload["stats"]["total_sessions"] = 99
+    assert cache.get("u1") == {"stats": stats(1), "recent_sessions": [session(1)]}
+
+
+def test_put_is_dropped_when_the_user_was_written_during_the_read():
+    cache = StatsCache()
+    marker = cache.read_marker()
+    # A completion lands between the reads and the put
+    assert not cache.patch("u1", stats(2), session(2))
+    cache.put("u1", stats(1), [session(1)], marker)
+    assert cache.get("u1") is None
+
+    cache.put("u1", stats(2), [session(2)], cache.read_marker())
+    assert cache.get("u1")["stats"] == stats(2)
+
+
+def test_writes_of_other_users_do_not_block_a_put():
+    cache = StatsCache()
+    marker = cache.read_marker()
+    cache.patch("u2", stats(5), session(5))
+    cache.invalidate("u3")
+    cache.put("u1", stats(1), [], marker)
+    assert cache.get("u1") is not None
+
+
+def test_invalidate_during_the_read_drops_the_put():
+    cache = StatsCache()
+    cache.put("u1", stats(1), [], cache.read_marker())
+    marker = cache.read_marker()
+    cache.invalidate("u1")
+    assert cache.get("u1") is None
+    cache.put("u1", stats(1), [], marker)
+    assert cache.get("u1") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_put_with_an_old_marker_is_dropped_once_the_write_record_is_evicted():
+    cache = StatsCache(max_entries=2)
+    marker = cache.read_marker()
+    cache.patch("u1", stats(2), session(2))
+    for user_id in ("u2", "u3", "u4"):
+        cache.patch(user_id, stats(1), session(1))
+    cache.put("u1", stats(1), [session(1)], marker)
+    assert cache.get("u1") is None
+    cache.put("u1", stats(2), [session(2)], cache.read_marker())
+    assert cache.get("u1")["stats"] == stats(2)
+
+
+def test_patch_updates_counters_and_recent_sessions():
+    cache = StatsCache()
+    recent = [session(n) for n in range(RECENT_SESSIONS, 0, -1)]
+    cache.put("u1", stats(RECENT_SESSIONS), recent, cache.read_marker())
+    assert cache.patch("u1", stats(RECENT_SESSIONS + 1), session(RECENT_SESSIONS + 1))
+    payload = cache.get("u1")
+    assert payload["stats"] == stats(RECENT_SESSIONS + 1)
+    assert payload["recent_sessions"] == [session(RECENT_SESSIONS + 1)] + recent[:-1]
+    assert cache.stats()["patches"] == 1
+
+
+def test_expiry_and_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.stats_cache.time.monotonic", lambda: now[0])
+    cache = StatsCache(ttl_seconds=10, max_entries=2)
+    for user_id in ("u1", "u2"):
+        cache.put(user_id, stats(1), [], cache.read_marker())
+    cache.get("u1")
+    cache.put("u3", stats(1), [], cache.read_marker())
+    assert cache.get("u2") is None and cache.stats()["evictions"] == 1
+    now[0] += 10
+    assert cache.get("u1") is None and cache.stats()["expirations"] == 1
+
+
+def test_prometheus_exposition():
+    cache = StatsCache()
+    cache.get("u1")
+    text = cache.prometheus()
+    assert "# TYPE infinea_stats_cache_misses_total counter\ninfinea_stats_cache_misses_total 1\n" in text
+    assert text.endswith("infinea_stats_cache_entries 0\n")
+
+
+def test_patched_stats_match_a_fresh_read(server, api):
+    body, headers = register(api)
+    actions = [a for a in api.get("/api/actions").json() if not a.get("is_premium")]
+    assert api.get("/api/stats", headers=headers).json()["total_sessions"] == 0
+    for n in range(12):
+        started = api.post("/api/sessions/start", json={"action_id": actions[n % 5]["action_id"]}, headers=headers)
+        api.post("/api/sessions/complete", json={"session_id": started.json()["session_id"], "actual_duration": 3},
+                 headers=headers)
+        cached = api.get("/api/stats", headers=headers).json()
+        server.stats_cache.invalidate(body["user_id"])
+        assert api.get("/api/stats", headers=headers).json() == cached
+    assert cached["total_sessions"] == 12 and len(cached["recent_sessions"]) == RECENT_SESSIONS
@@ -0,0 +1,91 @@
+"""Suggestion cache key normalization, duration buckets, expiry and size bounds."""
+import pytest
+
+from services.duration_index import DurationIndex
+from services.suggestion_cache import SuggestionCache, suggestion_context_key
+
+from .conftest import register
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(bucket=5, energy="medium", category=None, premium=False, recent=(), version=1):
+    return suggestion_context_key(version, bucket, energy, category, premium, recent)
+
+
+def test_key_ignores_recent_order_and_blank_categories():
+    assert key(recent=["learning", "", "well_being", None]) == key(recent=["well_being", "learning"])
+    assert key(recent=["learning", "learning"]) != key(recent=["learning"])
+    assert key(category="") == key(category=None)
+
+
+@pytest.mark.parametrize("field", ["bucket", "energy", "category", "premium", "recent", "version"])
+def test_key_separates_every_context_field(field):
+    changed = {"bucket": 10, "energy": "high", "category": "learning", "premium": True,
+               "recent": ["learning"], "version": 2}
+    assert key(**{field: changed[field]}) != key()
+
+
+def test_durations_in_one_bucket_share_a_key():
+    actions = [
+        {"action_id": "a", "category": "learning", "energy_level": "low", "duration_min": 2, "duration_max": 5},
+        {"action_id": "b", "category": "learning", "energy_level": "low", "duration_min": 10, "duration_max": 15},
+    ]
+    index = DurationIndex(actions)
+    buckets = {t: index.duration_bucket(t) for t in range(0, 20)}
+    assert {buckets[t] for t in range(2, 10)} == {2}
+    assert {buckets[t] for t in range(10, 20)} == {10}
+    assert buckets[0] is buckets[1] is None
+    assert key(bucket=buckets[3]) == key(bucket=buckets[9]) != key(bucket=buckets[10])
+
+
+def test_entries_expire(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("services.suggestion_cache.time.monotonic", clock)
+    cache = SuggestionCache(ttl_seconds=60)
+    cache.put(key(), {"suggestion": "x"}, llm_seconds=1.5)
+    clock.now += 59
+    assert cache.get(key()) == {"suggestion": "x"}
+    clock.now += 1
+    assert cache.get(key()) is None
+    assert cache.stats()["saved_llm_seconds"] == 1.5
+
+
+def test_entry_and_byte_bounds_evict_least_recently_used():
+    cache = SuggestionCache(max_entries=2)
+    for bucket in (1, 2):
+        cache.put(key(bucket=bucket), {"suggestion": bucket})
+    cache.get(key(bucket=1))
+    cache.put(key(bucket=3), {"suggestion": 3})
+    assert cache.get(key(bucket=2)) is None and cache.get(key(bucket=1)) is not None
+
+    response = {"suggestion": "y" * 100}
+    cache = SuggestionCache(max_bytes=250)
+    for bucket in (1, 2, 3):
+        cache.put(key(bucket=bucket), response)
+    assert cache.stats()["size"] == 2 and cache.stats()["bytes"] <= 250
+    assert cache.get(key(bucket=1)) is None
+
+    cache.put(key(bucket=4), {"suggestion": "z" * 300})
+    assert cache.get(key(bucket=4)) is None
+
+
+def test_same_bucket_request_is_served_from_cache(server, api):
+    _, headers = register(api)
+    index = server.action_catalog.duration_index
+    action = next(a for a in api.get("/api/actions").json() if not a.get("is_premium"))
+    first_time = action["duration_min"]
+    second_time = first_time + 1 if index.duration_bucket(first_time + 1) == first_time else first_time
+    request = {"energy_level": action["energy_level"], "preferred_category": action["category"]}
+
+    first = api.post("/api/suggestions", json={**request, "available_time": first_time}, headers=headers).json()
+    second = api.post("/api/suggestions", json={**request, "available_time": second_time}, headers=headers).json()
+    assert first["source"] == "llm"
+    assert second["source"] == "cache"
+    assert second["recommended_actions"] == first["recommended_actions"]
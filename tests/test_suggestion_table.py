@@ -0,0 +1,88 @@
+"""SuggestionTable lookups and incremental updates against the engine and a fresh build."""
+import itertools
+import random
+
+from benchmarks.bench_duration_index import CATEGORIES, ENERGY_LEVELS, make_catalog
+from services.scoring_engine import ScoringEngine
+from services.suggestion_table import SuggestionTable
+
+from .test_admin_actions import ACTION
+
+CONTEXTS = list(itertools.product(
+    range(0, 30), [None] + ENERGY_LEVELS, [None, "unknown"] + CATEGORIES, [True, False]
+))
+
+
+def assert_table_matches_engine(table, engine, top_n=3):
+    for time, energy, category, include_premium in CONTEXTS:
+        expected = engine.top_k(time, energy, category, k=top_n, include_premium=include_premium,
+                                require_category=True, require_energy=True)
+        assert table.lookup(time, energy, category, include_premium) == expected, (time, energy, category)
+
+
+def test_lookup_matches_engine(catalog):
+    engine = ScoringEngine(catalog)
+    assert_table_matches_engine(SuggestionTable(engine), engine)
+
+
+def test_lookup_with_larger_top_n(catalog):
+    engine = ScoringEngine(catalog)
+    assert_table_matches_engine(SuggestionTable(engine, top_n=8), engine, top_n=8)
+
+
+def test_update_after_edits_matches_fresh_build():
+    rng = random.Random(11)
+    actions = make_catalog(40, seed=11, max_duration=15)
+    table = SuggestionTable(ScoringEngine(actions))
+
+    for step in range(30):
+        actions = list(actions)
+        if step % 3 == 0:
+            old = None
+            new = dict(rng.choice(actions), action_id=f"added_{step}", category=rng.choice(CATEGORIES))
+            actions.append(new)
+        else:
+            i = rng.randrange(len(actions))
+            old = actions[i]
+            new = dict(old, energy_level=rng.choice(ENERGY_LEVELS), is_premium=not old["is_premium"])
+            if step % 2:
+                # Stay inside the existing duration boundaries
+                other = rng.choice(actions)
+                new.update(duration_min=other["duration_min"], duration_max=other["duration_max"])
+            actions[i] = new
+        engine = ScoringEngine(actions)
+        table.update(engine, [a for a in (old, new) if a is not None])
+
+        fresh = SuggestionTable(engine)
+        assert table.stats()["buckets"] == fresh.stats()["buckets"]
+        assert (table._cells == fresh._cells).all(), step
+    assert_table_matches_engine(table, engine)
+
+
+def test_update_outside_boundaries_rebuilds():
+    actions = make_catalog(20, seed=5, max_duration=15)
+    table = SuggestionTable(ScoringEngine(actions))
+    new = dict(actions[0], action_id="long", duration_min=40, duration_max=45)
+    engine = ScoringEngine(actions + [new])
+    assert table.update(engine, [new]) == table.stats()["cells"]
+    assert_table_matches_engine(table, engine)
+
+
+def test_empty_catalog():
+    table = SuggestionTable(ScoringEngine([]))
+    assert table.lookup(10, "low", None, True) == []
+
+
+def test_admin_edit_keeps_the_served_table_fresh(server, api, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_API_KEY", "secret-key")
+    existing = next(a for a in api.get("/api/actions").json() if not a.get("is_premium"))
+    edited = {**ACTION, "duration_min": existing["duration_min"], "duration_max": existing["duration_max"],
+              "category": existing["category"], "energy_level": "high"}
+    response = api.put("/api/admin/actions/action_test_table", json=edited, headers={"X-Admin-Key": "secret-key"})
+    assert response.status_code == 200
+
+    catalog = server.action_catalog
+    assert response.json() in catalog.scoring_engine.actions
+    fresh = SuggestionTable(ScoringEngine(catalog.scoring_engine.actions))
+    assert (catalog.suggestion_table._cells == fresh._cells).all()
+    assert_table_matches_engine(catalog.suggestion_table, catalog.scoring_engine)
@@ -0,0 +1,105 @@
+"""user_stats counters and the history backfill merged with live completions."""
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.company_stats import backfill_user_counters
+from services.db_migrations import MIGRATIONS
+from services.user_stats import (
+    get_user_stats_doc, longest_run, rebuild_user_stats, record_completion, UNCATEGORIZED,
+)
+
+
+def history(user_id, days, category="learning", minutes=5):
+    return [
+        {"session_id": f"{user_id}_{n}", "user_id": user_id, "category": category, "completed": True,
+         "actual_duration": minutes, "completed_at": f"{day}T10:00:00+00:00"}
+        for n, day in enumerate(days)
+    ]
+
+
+async def complete_live(db, user_id, session, streak=1):
+    """What complete_session does: the history row, the user pipeline, then the stats upsert."""
+    await db.user_sessions_history.insert_one(session)
+    await db.users.update_one({"user_id": user_id}, {"$inc": {"total_sessions": 1}})
+    return await record_completion(db, user_id, session["category"], session["actual_duration"], streak)
+
+
+def migration(name_prefix):
+    return next(fn for name, fn, _ in MIGRATIONS if name.startswith(name_prefix))
+
+
+def test_longest_run():
+    assert longest_run([]) == 0
+    assert longest_run(["2026-01-01", "2026-01-02", "2026-01-02", "2026-01-04", "bad"]) == 2
+    assert longest_run(["2026-02-27", "2026-03-01", "2026-02-28"]) == 3
+
+
+def test_record_completion_counts_per_category():
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await record_completion(db, "u1", "learning", 5, 1)
+        await record_completion(db, "u1", None, 3, 4)
+        return await record_completion(db, "u1", "learning", 2, 2)
+
+    stats = asyncio.run(run())
+    assert (stats["total_sessions"], stats["total_time"], stats["longest_streak"]) == (3, 10, 4)
+    assert stats["sessions_by_category"] == {"learning": 2, UNCATEGORIZED: 1}
+    assert stats["time_by_category"] == {"learning": 7, UNCATEGORIZED: 3}
+
+
+def test_rebuild_from_history():
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.users.insert_one({"user_id": "u1", "streak_days": 1})
+        await db.user_sessions_history.insert_many(
+            history("u1", ["2026-01-01", "2026-01-02", "2026-01-03"])
+            + history("u1", ["2026-01-05"], category=None, minutes=7)
+            + [{"user_id": "u1", "category": "learning", "completed": False, "actual_duration": 9}]
+        )
+        return await rebuild_user_stats(db, "u1")
+
+    stats = asyncio.run(run())
+    assert (stats["total_sessions"], stats["total_time"], stats["longest_streak"]) == (4, 22, 3)
+    assert stats["sessions_by_category"] == {"learning": 3, UNCATEGORIZED: 1}
+
+
+def test_completed_before_backfill_is_merged():
+    """A live completion before the migration leaves a short document that the backfill must fill in."""
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.users.insert_many([{"user_id": "u1", "total_sessions": 0}, {"user_id": "u2"}])
+        await db.user_sessions_history.insert_many(
+            history("u1", ["2026-01-01", "2026-01-02", "2026-01-03", "2026-01-04", "2026-01-05"])
+            + history("u2", ["2026-01-01"], category="well_being")
+        )
+        live = await complete_live(db, "u1", history("u1", ["2026-01-06"], category="productivity")[0] | {
+            "session_id": "u1_live"
+        })
+        assert live["total_sessions"] == 1
+
+        assert await migration("user_stats")(db) == 2
+        await migration("user_total_sessions")(db)
+        # Running it again changes nothing
+        await migration("user_stats")(db)
+        return (
+            await get_user_stats_doc(db, "u1"), await get_user_stats_doc(db, "u2"),
+            await db.users.find_one({"user_id": "u1"}),
+        )
+
+    stats, other, user = asyncio.run(run())
+    assert (stats["total_sessions"], stats["total_time"], stats["longest_streak"]) == (6, 30, 6)
+    assert stats["sessions_by_category"] == {"learning": 5, "productivity": 1}
+    assert other["total_sessions"] == 1
+    assert user["total_sessions"] == 6
+
+
+def test_counter_copy_keeps_live_increments():
+    async def run():
+        db = AsyncMongoMockClient()["infinea_test"]
+        await db.users.insert_one({"user_id": "u1", "total_sessions": 4})
+        await db.user_stats.insert_one({"user_id": "u1", "total_sessions": 3})
+        await backfill_user_counters(db)
+        return await db.users.find_one({"user_id": "u1"})
+
+    assert asyncio.run(run())["total_sessions"] == 4